@@ -1,28 +1,51 @@
+import importlib
+
 import streamlit as st
-import bloque1 # type: ignore
-import bloque2 # type: ignore
-import bloque3
-import bloque4
+import curvas
+import graficos
+import instrumentacion
+import trabajos
 
 # Configuración general (solo UNA vez en toda la app)
 st.set_page_config(page_title="App Estadística Inferencial", layout="wide")
 
 st.title("📊 App de Estadística Inferencial - Modular")
 
+# Cada bloque se importa solo cuando se selecciona por primera vez; así el
+# arranque no paga el coste de importar los cuatro módulos y sus dependencias.
+PAGINAS = {
+    "Bloque 1": "bloque1",
+    "Bloque 2": "bloque2",
+    "Bloque 3": "bloque3",
+    "Bloque 4": "bloque4",
+}
+
+
+def cargar_pagina(nombre):
+    return importlib.import_module(PAGINAS[nombre])
+
+
 if "pagina" not in st.session_state:
     st.session_state.pagina = "Bloque 1"
 
-menu = ["Bloque 1", "Bloque 2", "Bloque 3", "Bloque 4"]
+menu = list(PAGINAS)
 
 st.sidebar.title("Navegación")
 seleccion = st.sidebar.radio("Seleccione un bloque", menu)
 st.session_state.pagina = seleccion
 
-if seleccion == "Bloque 1":
-    bloque1.run()
-elif seleccion == "Bloque 2":
-    bloque2.run()
-elif seleccion == "Bloque 3":
-    bloque3.run()
-elif seleccion == "Bloque 4":
-    bloque4.run()
+# Instrumentación opcional (APP_DEV=1): tiempos por sección y perfilado
+instrumentacion.iniciar_rerun(seleccion)
+with instrumentacion.seccion("importacion"):
+    pagina = cargar_pagina(seleccion)
+instrumentacion.ejecutar_pagina(pagina.run)
+
+cache = graficos.estadisticas_cache()
+st.sidebar.caption(
+    f"Caché de gráficos: {cache['hits']} aciertos, {cache['misses']} fallos, "
+    f"{cache['entradas']} imágenes ({cache['bytes'] / 1e6:.1f} MB). "
+    f"Curvas precalculadas: {curvas.memoria_bytes() / 1e6:.1f} MB. "
+    f"Trabajos en segundo plano: {len(trabajos.en_curso())}"
+)
+
+instrumentacion.panel(instrumentacion.finalizar_rerun())
@@ -0,0 +1,69 @@
+"""Benchmark de arranque en frío de la app.
+
+Cada medición se hace en un intérprete nuevo para que ningún módulo esté ya
+importado. Compara la carga perezosa actual (solo el bloque seleccionado)
+con la carga ansiosa de los cuatro bloques y sus librerías.
+
+Uso: python benchmarks/arranque.py [--repeticiones 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+ESCENARIOS = {
+    # Lo que se ejecuta antes de que aparezca el título (primer pintado)
+    "primer_pintado": "import streamlit, graficos",
+    # Arranque actual: la página por defecto importa solo bloque1
+    "carga_perezosa": "import streamlit, graficos, bloque1",
+    # Arranque anterior: los cuatro bloques más seaborn y pyplot al inicio
+    "carga_ansiosa": (
+        "import streamlit, graficos, bloque1, bloque2, bloque3, bloque4, "
+        "seaborn, matplotlib.pyplot"
+    ),
+    # Primer rerun completo de app.py (página por defecto dibujada)
+    "primera_pagina": (
+        "from streamlit.testing.v1 import AppTest; "
+        f"AppTest.from_file({str(RAIZ / 'app.py')!r}, default_timeout=120).run()"
+    ),
+}
+
+
+def medir(codigo):
+    script = (
+        "import time; t0 = time.perf_counter(); "
+        f"{codigo}; "
+        "print(time.perf_counter() - t0)"
+    )
+    salida = subprocess.run(
+        [sys.executable, "-c", script], cwd=RAIZ, capture_output=True, text=True, check=True
+    )
+    return float(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    resultados = {}
+    for nombre, codigo in ESCENARIOS.items():
+        tiempos = [medir(codigo) for _ in range(args.repeticiones)]
+        resultados[nombre] = {
+            "mediana_s": statistics.median(tiempos),
+            "min_s": min(tiempos),
+            "max_s": max(tiempos),
+        }
+        print(f"{nombre:>16}: mediana {resultados[nombre]['mediana_s'] * 1000:8.1f} ms")
+
+    ahorro = resultados["carga_ansiosa"]["mediana_s"] - resultados["carga_perezosa"]["mediana_s"]
+    print(f"{'ahorro':>16}: {ahorro * 1000:8.1f} ms por arranque")
+    print(json.dumps(resultados, indent=2))
+
+
+if __name__ == "__main__":
+    main()
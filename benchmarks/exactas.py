@@ -0,0 +1,74 @@
+"""Control de precisión de las pruebas exactas frente a scipy.
+
+Compara `exactas.binomial_exacta` y `exactas.fisher_exacta` con
+scipy.stats.binomtest y fisher_exact sobre entradas aleatorias, y revisa
+tablas con márgenes de millones (que no deben desbordar ni ir a la rama
+exacta). Falla (código de salida 1) si algún caso no se cumple.
+
+Uso: python benchmarks/exactas.py [--n 300] [--tolerancia 1e-6]
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import exactas  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=300)
+    parser.add_argument("--tolerancia", type=float, default=1e-6)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    fallos = 0
+
+    def informar(nombre, error, ok):
+        nonlocal fallos
+        fallos += not ok
+        print(f"{nombre:>28}: error relativo máx {error:.2e} [{'ok' if ok else 'FALLA'}]")
+
+    # Binomial: n hasta 10^4, p0 en (0, 1)
+    n = rng.integers(1, 10_000, args.n)
+    p0 = rng.uniform(0.01, 0.99, args.n)
+    k = rng.binomial(n, np.clip(p0 + rng.normal(0, 0.02, args.n), 0, 1))
+    t0 = time.perf_counter()
+    p = exactas.binomial_exacta(k, n, p0)["p_valor"]
+    t_lote = time.perf_counter() - t0
+    esperado = np.array([stats.binomtest(int(x), int(m), q).pvalue for x, m, q in zip(k, n, p0)])
+    error = np.max(np.abs(p - esperado) / np.maximum(esperado, 1e-300))
+    informar("binomial vs binomtest", error, error <= args.tolerancia)
+
+    # Fisher: tablas pequeñas y medianas, siempre por la rama exacta
+    tablas = rng.integers(0, 2000, (args.n, 2, 2))
+    t0 = time.perf_counter()
+    p = exactas.fisher_exacta(tablas, metodo="exacta")["p_valor"]
+    t_lote += time.perf_counter() - t0
+    esperado = np.array([stats.fisher_exact(tabla).pvalue for tabla in tablas])
+    error = np.max(np.abs(p - esperado) / np.maximum(esperado, 1e-300))
+    informar("fisher vs fisher_exact", error, error <= args.tolerancia)
+
+    # Márgenes de millones: los productos de márgenes no caben en int64
+    grandes = np.array([[[50_000_000, 50_000_000], [50_000_000, 50_000_000]],
+                        [[3_000_000_000, 1_000_000_000], [2_000_000_000, 4_000_000_000]]])
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        resultado = exactas.fisher_exacta(grandes)
+    esperado_or = np.array([1.0, 6.0])
+    error = np.max(np.abs(resultado["odds_ratio"] / esperado_or - 1))
+    ok = (not resultado["exacta"].any()) and np.isclose(resultado["p_valor"][0], 1.0) and error <= args.tolerancia
+    informar("fisher márgenes grandes", error, ok)
+
+    print(f"Tiempo de los lotes: {t_lote * 1000:.1f} ms")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Benchmark de latencia de reruns de cada página con AppTest.
+
+Recorre todos los temas de los cuatro bloques sin navegador: selecciona el
+tema (rerun inicial) y después mueve cada slider, selector, radio y casilla
+de la página a otros valores, midiendo cada rerun por separado. De cada
+rerun se guarda el tiempo de pared, el tiempo de CPU, el pico de memoria
+(solo con --memoria, porque tracemalloc ralentiza mucho la ejecución), el
+número de imágenes dibujadas y las figuras vivas de la sesión.
+
+AppTest siempre ejecuta el script completo, pero en el navegador un widget
+que vive dentro de un fragmento (`instrumentacion.fragmento`) solo vuelve a
+ejecutar ese fragmento. Por eso cada rerun reporta también `efectivo_ms`: la
+duración del fragmento más interno que contiene al widget, o el tiempo de
+pared si el widget no está en ninguno. `comparar` usa `efectivo_ms` cuando
+está disponible.
+
+Uso:
+  python benchmarks/latencia.py medir [--salida benchmarks/latencia.json] [--repeticiones 3]
+  python benchmarks/latencia.py comparar base.json nuevo.json [--umbral 0.25] [--minimo-ms 5]
+
+`comparar` sale con código 1 si algún rerun empeora más que el umbral.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+BLOQUES = ["Bloque 1", "Bloque 2", "Bloque 3", "Bloque 4"]
+# Widgets que se barren: tipo de elemento de AppTest y valores a probar
+TIPOS_BARRIDOS = ("slider", "select_slider", "selectbox", "radio", "checkbox")
+MAX_OPCIONES = 3
+
+
+def _app():
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(str(RAIZ / "app.py"), default_timeout=300)
+
+
+def _etiquetas_menu(at):
+    return {r.label for r in at.sidebar.radio}
+
+
+def _widgets(at):
+    """(tipo, identificador) de los widgets barribles de la página, sin el menú lateral."""
+    menu = _etiquetas_menu(at)
+    encontrados = []
+    for tipo in TIPOS_BARRIDOS:
+        for w in at.get(tipo):
+            if w.label in menu:
+                continue
+            encontrados.append((tipo, w.key or w.label))
+    return list(dict.fromkeys(encontrados))
+
+
+def _buscar(at, tipo, identificador):
+    for w in at.get(tipo):
+        if (w.key or w.label) == identificador:
+            return w
+    return None
+
+
+def _valores(tipo, w):
+    """Valores distintos del actual a los que se mueve el widget."""
+    if tipo == "checkbox":
+        return [not w.value]
+    if tipo == "slider":
+        if isinstance(w.value, (tuple, list)):
+            return [(w.min, w.max)]
+        return [v for v in (w.min, w.max) if v != w.value]
+    opciones = [o for o in w.options if o != w.value and o != str(w.value)]
+    return opciones[:MAX_OPCIONES]
+
+
+def _fragmento(at, id_widget):
+    """Duración (ms) del fragmento más interno que creó el widget, o None."""
+    if id_widget is None or "_fragmentos" not in at.session_state:
+        return None
+    contienen = [f for f in at.session_state["_fragmentos"].values() if id_widget in f["widgets"]]
+    return min(contienen, key=lambda f: len(f["widgets"]))["ms"] if contienen else None
+
+
+def _rerun(at, memoria, id_widget=None):
+    import graficos
+
+    if memoria:
+        tracemalloc.start()
+    pared = time.perf_counter()
+    cpu = time.process_time()
+    at.run()
+    cpu = time.process_time() - cpu
+    pared = time.perf_counter() - pared
+    pico = tracemalloc.get_traced_memory()[1] if memoria else None
+    if memoria:
+        tracemalloc.stop()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    pool = at.session_state["_graficos_pool"] if "_graficos_pool" in at.session_state else {}
+    fragmento = _fragmento(at, id_widget)
+    return {
+        "pared_ms": pared * 1000,
+        "efectivo_ms": pared * 1000 if fragmento is None else fragmento,
+        "cpu_ms": cpu * 1000,
+        "pico_mb": None if pico is None else pico / 1e6,
+        "imagenes": len(at.get("image")),
+        "figuras_sesion": len(pool),
+        "cache_graficos": graficos.estadisticas_cache()["entradas"],
+    }
+
+
+def _abrir_tema(bloque, indice, memoria):
+    import graficos
+
+    at = _app().run()
+    at.sidebar.radio[0].set_value(bloque).run()
+    tema = at.sidebar.radio[1].options[indice]
+    at.sidebar.radio[1].set_value(tema)
+    # Caché de gráficos vacía justo antes del rerun medido (peor caso)
+    graficos.vaciar_cache()
+    return at, tema, _rerun(at, memoria)
+
+
+def _resumir(mediciones):
+    resumen = {}
+    for clave in mediciones[0]:
+        valores = [m[clave] for m in mediciones if m[clave] is not None]
+        if not valores:
+            resumen[clave] = None
+        elif clave in ("pared_ms", "efectivo_ms", "cpu_ms"):
+            resumen[clave] = statistics.median(valores)
+            resumen[clave.replace("_ms", "_min_ms")] = min(valores)
+        else:
+            resumen[clave] = max(valores)
+    return resumen
+
+
+def medir(repeticiones, memoria, filtro=None):
+    """Devuelve {escenario: métricas}, con un escenario por rerun medido."""
+    resultados = {}
+    for bloque in BLOQUES:
+        at = _app().run()
+        at.sidebar.radio[0].set_value(bloque).run()
+        temas = at.sidebar.radio[1].options
+        for indice, tema in enumerate(temas):
+            nombre_tema = f"{bloque} / {tema}"
+            if filtro and filtro not in nombre_tema:
+                continue
+
+            mediciones = []
+            for _ in range(repeticiones):
+                at, _, medicion = _abrir_tema(bloque, indice, memoria)
+                mediciones.append(medicion)
+            resultados[f"{nombre_tema} / inicial"] = _resumir(mediciones)
+            print(f"{nombre_tema} / inicial: {resultados[f'{nombre_tema} / inicial']['pared_ms']:.1f} ms",
+                  flush=True)
+
+            for tipo, identificador in _widgets(at):
+                w = _buscar(at, tipo, identificador)
+                if w is None:
+                    continue
+                original = w.value
+                for valor in _valores(tipo, w):
+                    mediciones = []
+                    for _ in range(repeticiones):
+                        w = _buscar(at, tipo, identificador)
+                        if w is None:
+                            break
+                        w.set_value(valor)
+                        mediciones.append(_rerun(at, memoria, w.id))
+                        # Volver al valor original sin medir, para que cada repetición parta igual
+                        w = _buscar(at, tipo, identificador)
+                        if w is not None:
+                            w.set_value(original)
+                            at.run()
+                    if mediciones:
+                        escenario = f"{nombre_tema} / {tipo} '{identificador}' = {valor}"
+                        resultados[escenario] = _resumir(mediciones)
+                        print(f"  {escenario}: {resultados[escenario]['pared_ms']:.1f} ms "
+                              f"(efectivo {resultados[escenario]['efectivo_ms']:.1f} ms)", flush=True)
+    return resultados
+
+
+def _entorno():
+    import numpy
+    import streamlit
+
+    return {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "streamlit": streamlit.__version__,
+        "numpy": numpy.__version__,
+    }
+
+
+def _latencia(metricas):
+    # Los JSON anteriores a los fragmentos no tienen `efectivo_ms`
+    return metricas.get("efectivo_ms", metricas["pared_ms"])
+
+
+def comparar(base, nuevo, umbral, minimo_ms):
+    """Lista de (escenario, base_ms, nuevo_ms, cambio) y las regresiones detectadas."""
+    filas = []
+    regresiones = []
+    for escenario in sorted(set(base["escenarios"]) & set(nuevo["escenarios"])):
+        antes = _latencia(base["escenarios"][escenario])
+        despues = _latencia(nuevo["escenarios"][escenario])
+        cambio = despues / antes - 1 if antes > 0 else 0.0
+        filas.append((escenario, antes, despues, cambio))
+        if cambio > umbral and despues - antes > minimo_ms:
+            regresiones.append(escenario)
+    return filas, regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_medir = sub.add_parser("medir", help="mide todas las páginas y guarda un JSON")
+    p_medir.add_argument("--salida", type=Path, default=RAIZ / "benchmarks" / "latencia.json")
+    p_medir.add_argument("--repeticiones", type=int, default=3)
+    p_medir.add_argument("--memoria", action="store_true", help="mide el pico de memoria con tracemalloc")
+    p_medir.add_argument("--filtro", help="solo escenarios cuyo nombre contenga este texto")
+
+    p_comparar = sub.add_parser("comparar", help="compara dos JSON y marca regresiones")
+    p_comparar.add_argument("base", type=Path)
+    p_comparar.add_argument("nuevo", type=Path)
+    p_comparar.add_argument("--umbral", type=float, default=0.25, help="aumento relativo tolerado (0.25 = 25%%)")
+    p_comparar.add_argument("--minimo-ms", type=float, default=5.0,
+                            help="diferencias absolutas menores que esta no cuentan como regresión")
+    args = parser.parse_args()
+
+    if args.comando == "medir":
+        resultados = {"entorno": _entorno(), "repeticiones": args.repeticiones,
+                      "escenarios": medir(args.repeticiones, args.memoria, args.filtro)}
+        args.salida.write_text(json.dumps(resultados, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"{len(resultados['escenarios'])} escenarios guardados en {args.salida}")
+        return
+
+    base = json.loads(args.base.read_text(encoding="utf-8"))
+    nuevo = json.loads(args.nuevo.read_text(encoding="utf-8"))
+    filas, regresiones = comparar(base, nuevo, args.umbral, args.minimo_ms)
+    for escenario, antes, despues, cambio in sorted(filas, key=lambda f: -f[3]):
+        marca = "  << REGRESIÓN" if escenario in regresiones else ""
+        print(f"{cambio:+8.1%} {antes:9.1f} → {despues:9.1f} ms  {escenario}{marca}")
+    faltan = set(base["escenarios"]) ^ set(nuevo["escenarios"])
+    if faltan:
+        print(f"{len(faltan)} escenarios aparecen solo en uno de los archivos.")
+    print(f"{len(regresiones)} regresiones de {len(filas)} escenarios (umbral {args.umbral:.0%}).")
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Prueba de memoria estable de una página tras muchos reruns con AppTest.
+
+Abre un tema y lo vuelve a ejecutar `--reruns` veces cambiando un widget en
+cada rerun para que se dibuje de nuevo: en el tema por defecto (intervalos de
+confianza del bloque 4) se alterna entre la media, servida desde la caché de
+imágenes de `graficos`, y el forest plot de proporciones, que usa el pool de
+figuras de la sesión, y se recorren varios niveles de confianza.
+
+Tras cada rerun comprueba que el pool de figuras (`_graficos_pool`) no pase
+de `graficos.MAX_FIGURAS_POR_SESION` y que la caché de PNG no pase de su
+límite de bytes (reducido con --max-bytes-cache para que haya expulsiones).
+Con tracemalloc mide la memoria viva tras el calentamiento y al final, y
+falla (código de salida 1) si crece más que la tolerancia.
+
+Uso: python benchmarks/memoria.py [--reruns 1000] [--calentamiento 100] [--tolerancia-mb 2]
+También se ejecuta con pytest (tests/test_memoria.py), con menos reruns.
+"""
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+BLOQUE = "Bloque 4"
+TEMA = 0
+NIVELES_CONFIANZA = list(range(80, 100, 2))
+
+
+def _app():
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(str(RAIZ / "app.py"), default_timeout=300)
+
+
+def _mover(at, paso):
+    """Cambia un widget del tema (sin ejecutar): en los pasos pares el tipo de
+    intervalo y en los impares el nivel de confianza de la página visible."""
+    if paso % 2 == 0:
+        radio = at.radio(key="b4_ic_tipo")
+        radio.set_value(radio.options[(paso // 2) % len(radio.options)])
+        return
+    # Cada tipo pasa por todos los niveles (uno por cada visita)
+    nivel = NIVELES_CONFIANZA[(paso // 4) % len(NIVELES_CONFIANZA)]
+    for slider in at.slider:
+        if slider.label.startswith("Nivel de confianza"):
+            slider.set_value(nivel)
+
+
+def _comprobar(at, graficos):
+    """Lista de violaciones de los límites del pool de figuras y de la caché de PNG."""
+    errores = []
+    pool = at.session_state["_graficos_pool"] if "_graficos_pool" in at.session_state else {}
+    if len(pool) > graficos.MAX_FIGURAS_POR_SESION:
+        errores.append(f"pool con {len(pool)} figuras (máximo {graficos.MAX_FIGURAS_POR_SESION})")
+    cache = graficos.estadisticas_cache()
+    # Una sola imagen mayor que el límite se conserva igualmente
+    if cache["bytes"] > graficos.MAX_BYTES_CACHE and cache["entradas"] > 1:
+        errores.append(f"caché de PNG con {cache['bytes']:,} bytes (máximo {graficos.MAX_BYTES_CACHE:,})")
+    return errores
+
+
+def comprobar(reruns=1000, calentamiento=100, tolerancia_mb=2.0, max_bytes_cache=512 * 1024):
+    """Ejecuta la prueba y devuelve la lista de fallos (vacía si todo va bien)."""
+    import graficos
+
+    graficos.MAX_BYTES_CACHE = max_bytes_cache
+    graficos.vaciar_cache()
+
+    at = _app().run()
+    at.sidebar.radio[0].set_value(BLOQUE).run()
+    at.sidebar.radio[1].set_value(at.sidebar.radio[1].options[TEMA]).run()
+    print(f"{BLOQUE} / {at.sidebar.radio[1].value}: {reruns} reruns "
+          f"(+{calentamiento} de calentamiento)", flush=True)
+
+    errores = []
+    muestras = []
+    t0 = time.perf_counter()
+    try:
+        for paso in range(calentamiento + reruns):
+            if paso == calentamiento:
+                gc.collect()
+                tracemalloc.start()
+                muestras.append((paso, tracemalloc.get_traced_memory()[0]))
+            _mover(at, paso)
+            at.run()
+            if at.exception:
+                return [f"excepción en el rerun {paso}: {at.exception[0].message}"]
+            errores += [f"rerun {paso}: {e}" for e in _comprobar(at, graficos)]
+            if paso >= calentamiento and (paso + 1 - calentamiento) % 100 == 0:
+                gc.collect()
+                muestras.append((paso + 1, tracemalloc.get_traced_memory()[0]))
+                print(f"  rerun {paso + 1}: {muestras[-1][1] / 1e6:6.2f} MB vivos desde el calentamiento, "
+                      f"pool {len(at.session_state['_graficos_pool'])}, "
+                      f"caché {graficos.estadisticas_cache()['bytes'] / 1024:.0f} KB", flush=True)
+        gc.collect()
+        muestras.append((calentamiento + reruns, tracemalloc.get_traced_memory()[0]))
+    finally:
+        tracemalloc.stop()
+
+    crecimiento = (muestras[-1][1] - muestras[0][1]) / 1e6
+    cache = graficos.estadisticas_cache()
+    print(f"Tiempo: {time.perf_counter() - t0:.1f} s | caché de PNG: {cache['entradas']} entradas, "
+          f"{cache['hits']} aciertos, {cache['misses']} fallos")
+    print(f"Crecimiento de memoria: {crecimiento:+.2f} MB (tolerancia {tolerancia_mb} MB)")
+    if crecimiento > tolerancia_mb:
+        errores.append(f"la memoria crece {crecimiento:.2f} MB en {reruns} reruns")
+    return errores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=1000)
+    parser.add_argument("--calentamiento", type=int, default=100,
+                        help="reruns previos a la medición (llenan cachés e imports)")
+    parser.add_argument("--tolerancia-mb", type=float, default=2.0)
+    parser.add_argument("--max-bytes-cache", type=int, default=512 * 1024,
+                        help="límite de la caché de PNG durante la prueba")
+    args = parser.parse_args()
+
+    errores = comprobar(args.reruns, args.calentamiento, args.tolerancia_mb, args.max_bytes_cache)
+    for error in errores[:20]:
+        print("FALLA:", error)
+    sys.exit(1 if errores else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark y control de precisión de la tabla de cuantiles t.
+
+Compara `tablas.isf("t", ...)` con `scipy.stats.t.isf` sobre entradas
+aleatorias (df enteros y df no enteros a partir de 30, que se interpolan
+entre filas) y falla (código de salida 1) si el error relativo máximo supera
+la tolerancia.
+
+Uso: python benchmarks/tablas.py [--n 100000] [--tolerancia 5e-4]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import stats
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import tablas  # noqa: E402
+
+
+def cronometrar(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return min(tiempos), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--tolerancia", type=float, default=5e-4)
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.semilla)
+    alpha = 10 ** rng.uniform(-6, np.log10(0.5), args.n)
+    df = np.where(rng.random(args.n) < 0.5,
+                  rng.integers(1, 5000, args.n).astype(float),
+                  tablas.DF_INTERPOLACION_MIN + rng.exponential(200, args.n))
+
+    t0 = time.perf_counter()
+    tablas.tabla("t")
+    print(f"Construcción de la tabla: {(time.perf_counter() - t0) * 1000:.0f} ms "
+          f"({tablas.memoria_bytes() / 1e6:.2f} MB)")
+
+    t_tabla, aprox = cronometrar(lambda: tablas.isf("t", alpha, df))
+    t_scipy, exacto = cronometrar(lambda: stats.t.isf(alpha, df))
+    error = np.max(np.abs(aprox / exacto - 1))
+    fallos = int(error > args.tolerancia)
+    print(f"t: tabla {t_tabla * 1000:7.1f} ms | scipy {t_scipy * 1000:7.1f} ms | "
+          f"x{t_scipy / t_tabla:5.1f} | error relativo máx {error:.2e} "
+          f"[{'FALLA' if fallos else 'ok'}]")
+
+    # Llamadas escalares, como las de un rerun interactivo
+    t_tabla, _ = cronometrar(lambda: [tablas.ppf("t", 0.975, d) for d in range(1, 1001)])
+    t_scipy, _ = cronometrar(lambda: [stats.t.ppf(0.975, d) for d in range(1, 1001)])
+    print(f"escalar t.ppf x1000: tabla {t_tabla * 1000:.1f} ms | scipy {t_scipy * 1000:.1f} ms")
+
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from scipy.stats import norm, t
+import curvas
+import graficos
+import instrumentacion
+import simulacion
+import componentes
 
 def run():
  
@@ -42,19 +45,21 @@ def run():
         """)
 
         # Pequeña visualización
-        fig, ax = plt.subplots(figsize=(6,3))
-        x = np.linspace(-4,4,500)
-        y = norm.pdf(x)
-        ax.plot(x,y,color='blue')
-        z_crit = norm.ppf(1-alpha/2)
-        ax.fill_between(x,0,y,where=(x<-z_crit),color='red',alpha=0.3,label='Región de error (α/2)')
-        ax.fill_between(x,0,y,where=(x>z_crit),color='red',alpha=0.3)
-        ax.fill_between(x,0,y,where=(x>=-z_crit)&(x<=z_crit),color='green',alpha=0.3,label='Zona de confianza')
-        ax.axvline(-z_crit,color='black',linestyle='--')
-        ax.axvline(z_crit,color='black',linestyle='--')
-        ax.set_title(f"Zona de confianza ({confianza}%) vs Región de error ({alpha*100:.1f}%)")
-        ax.legend()
-        st.pyplot(fig)
+        def dibujar(ax):
+            # Curva y regiones son vistas de las tablas compartidas de `curvas`
+            x = curvas.x()
+            y = curvas.pdf()
+            ax.plot(x,y,color='blue')
+            z_crit = norm.ppf(1-alpha/2)
+            izquierda, centro, derecha = curvas.tramo(hasta=-z_crit), curvas.tramo(-z_crit, z_crit), curvas.tramo(desde=z_crit)
+            ax.fill_between(x[izquierda],0,y[izquierda],color='red',alpha=0.3,label='Región de error (α/2)')
+            ax.fill_between(x[derecha],0,y[derecha],color='red',alpha=0.3)
+            ax.fill_between(x[centro],0,y[centro],color='green',alpha=0.3,label='Zona de confianza')
+            ax.axvline(-z_crit,color='black',linestyle='--')
+            ax.axvline(z_crit,color='black',linestyle='--')
+            ax.set_title(f"Zona de confianza ({confianza}%) vs Región de error ({alpha*100:.1f}%)")
+            ax.legend()
+        graficos.mostrar_cacheado("b1_confianza", (confianza,), dibujar, figsize=(6,3))
 
     elif opcion == "Error estándar":
         st.header("Error estándar")
@@ -82,17 +87,16 @@ def run():
         st.success(f"El error estándar es: {ee:.3f}")
 
         # Visualización dinámica del EE según n
-        n_vals = np.arange(1, 201)
-        ee_vals = sigma / np.sqrt(n_vals)
-
-        fig, ax = plt.subplots(figsize=(8,4))
-        ax.plot(n_vals, ee_vals, label="Error estándar (EE)")
-        ax.axvline(n, color='red', linestyle='--', label=f'Tamaño muestra actual = {n}')
-        ax.set_xlabel("Tamaño de la muestra (n)")
-        ax.set_ylabel("Error estándar (EE)")
-        ax.set_title("Cómo disminuye el Error Estándar al aumentar el tamaño de muestra")
-        ax.legend()
-        st.pyplot(fig)
+        def dibujar(ax):
+            n_vals = np.arange(1, 201)
+            ee_vals = sigma / np.sqrt(n_vals)
+            ax.plot(n_vals, ee_vals, label="Error estándar (EE)")
+            ax.axvline(n, color='red', linestyle='--', label=f'Tamaño muestra actual = {n}')
+            ax.set_xlabel("Tamaño de la muestra (n)")
+            ax.set_ylabel("Error estándar (EE)")
+            ax.set_title("Cómo disminuye el Error Estándar al aumentar el tamaño de muestra")
+            ax.legend()
+        graficos.mostrar_cacheado("b1_error_estandar", (sigma, n), dibujar, figsize=(8,4))
 
 
     elif opcion == "Distribuciones Z vs t":
@@ -132,25 +136,26 @@ def run():
         st.write(f"Valor crítico Z para α = {alpha:.3f}: **{z_crit:.3f}**")
         st.write(f"Valor crítico t para α = {alpha:.3f} y df = {df}: **{t_crit:.3f}**")
 
-        x = np.linspace(-4, 4, 500)
-        z_pdf = norm.pdf(x)
-        t_pdf = t.pdf(x, df)
-
-        fig, ax = plt.subplots(figsize=(8,4))
+        def dibujar(ax):
+            x = curvas.x()
+            z_pdf = curvas.pdf()
+            t_pdf = curvas.pdf(df)
 
-        # Áreas de rechazo y aceptación para la Z (normal)
-        ax.fill_between(x, 0, z_pdf, where=(x < -z_crit) | (x > z_crit), color='red', alpha=0.3, label='Región rechazo H₀')
-        ax.fill_between(x, 0, z_pdf, where=(x >= -z_crit) & (x <= z_crit), color='green', alpha=0.3, label='Región aceptación H₀')
+            # Áreas de rechazo y aceptación para la Z (normal)
+            izquierda, centro, derecha = curvas.tramo(hasta=-z_crit), curvas.tramo(-z_crit, z_crit), curvas.tramo(desde=z_crit)
+            ax.fill_between(x[izquierda], 0, z_pdf[izquierda], color='red', alpha=0.3, label='Región rechazo H₀')
+            ax.fill_between(x[derecha], 0, z_pdf[derecha], color='red', alpha=0.3)
+            ax.fill_between(x[centro], 0, z_pdf[centro], color='green', alpha=0.3, label='Región aceptación H₀')
 
-        sns.lineplot(x=x, y=z_pdf, label="Z (Normal estándar)", color="blue", ax=ax)
-        sns.lineplot(x=x, y=t_pdf, label=f"t-Student (df={df})", color="red", ax=ax)
-        ax.axvline(z_crit, color='blue', linestyle='--', label=f'Z crítico = {z_crit:.2f}')
-        ax.axvline(-z_crit, color='blue', linestyle='--')
-        ax.axvline(t_crit, color='red', linestyle='--', label=f't crítico = {t_crit:.2f}')
-        ax.axvline(-t_crit, color='red', linestyle='--')
-        ax.set_title("Comparación: Distribución Z vs t-Student con valores críticos")
-        ax.legend()
-        st.pyplot(fig)
+            ax.plot(x, z_pdf, label="Z (Normal estándar)", color="blue")
+            ax.plot(x, t_pdf, label=f"t-Student (df={df})", color="red")
+            ax.axvline(z_crit, color='blue', linestyle='--', label=f'Z crítico = {z_crit:.2f}')
+            ax.axvline(-z_crit, color='blue', linestyle='--')
+            ax.axvline(t_crit, color='red', linestyle='--', label=f't crítico = {t_crit:.2f}')
+            ax.axvline(-t_crit, color='red', linestyle='--')
+            ax.set_title("Comparación: Distribución Z vs t-Student con valores críticos")
+            ax.legend()
+        graficos.mostrar_cacheado("b1_z_vs_t", (alpha, df), dibujar, figsize=(8,4))
 
 
     elif opcion == "Ejemplo interactivo":
@@ -163,23 +168,68 @@ def run():
         confianza = st.slider("Nivel de confianza (%):", 80, 99, 95)
         alpha = 1 - confianza/100
 
-        # Generamos una muestra aleatoria
-        muestra = np.random.normal(mu, sigma, n)
-        media_muestral = np.mean(muestra)
-        ee = sigma/np.sqrt(n)
-
-        # Z crítico para el nivel de confianza
-        z_critico = norm.ppf(1 - alpha/2)
-        intervalo = (media_muestral - z_critico*ee, media_muestral + z_critico*ee)
-
-        st.write(f"Media muestral: **{media_muestral:.2f}**")
-        st.write(f"Intervalo de confianza del {confianza}%: **({intervalo[0]:.2f}, {intervalo[1]:.2f})**")
-
-        fig, ax = plt.subplots(figsize=(6,3))
-        ax.axvline(mu, color='green', linestyle='--', label='Media real')
-        ax.axvline(intervalo[0], color='red', linestyle='--', label='Límite inferior')
-        ax.axvline(intervalo[1], color='red', linestyle='--', label='Límite superior')
-        ax.hist(muestra, bins=10, alpha=0.5, color='blue')
-        ax.legend()
-        st.pyplot(fig)
-
+        modo = st.radio("Modo:", ["Una muestra", "Simulación de cobertura"], horizontal=True)
+        # La muestra depende solo de (semilla, μ, σ, n): cambiar otros controles no la vuelve a sortear
+        semilla = componentes.controles_semilla("b1_semilla")
+
+        if modo == "Una muestra":
+            # Generamos una muestra aleatoria
+            muestra = simulacion.muestra_normal(semilla, mu, sigma, n)
+            media_muestral = np.mean(muestra)
+            ee = sigma/np.sqrt(n)
+
+            # Z crítico para el nivel de confianza
+            z_critico = norm.ppf(1 - alpha/2)
+            intervalo = (media_muestral - z_critico*ee, media_muestral + z_critico*ee)
+
+            st.write(f"Media muestral: **{media_muestral:.2f}**")
+            st.write(f"Intervalo de confianza del {confianza}%: **({intervalo[0]:.2f}, {intervalo[1]:.2f})**")
+
+            def dibujar(ax):
+                ax.axvline(mu, color='green', linestyle='--', label='Media real')
+                ax.axvline(intervalo[0], color='red', linestyle='--', label='Límite inferior')
+                ax.axvline(intervalo[1], color='red', linestyle='--', label='Límite superior')
+                ax.hist(muestra, bins=10, alpha=0.5, color='blue')
+                ax.legend()
+            graficos.mostrar_cacheado("b1_ejemplo", (semilla, mu, sigma, n, confianza), dibujar, figsize=(6,3))
+
+        else:
+            st.write("""
+            Repetimos el muestreo muchas veces y contamos cuántos intervalos contienen la media real.
+            La **cobertura empírica** debería acercarse al nivel de confianza elegido.
+            """)
+            repeticiones = st.select_slider("Número de intervalos simulados:",
+                                            [100, 1_000, 10_000, 100_000, 1_000_000], value=10_000)
+            sigma_conocida = st.checkbox("σ conocida (intervalo Z; si no, intervalo t con s)", value=True)
+
+            # Con muchos intervalos la simulación tarda: corre como trabajo en segundo plano
+            # (compartido entre sesiones con la misma semilla y parámetros) y aquí se sigue su avance
+            with instrumentacion.seccion("calculo"):
+                componentes.lanzar_trabajo("b1_cobertura", simulacion.cobertura_ic_semilla, semilla, mu, sigma, n,
+                                           confianza/100, repeticiones, sigma_conocida,
+                                           descripcion=f"Simulando {repeticiones:,} intervalos")
+
+            def parcial(avance):
+                st.write(f"Cobertura parcial: **{avance['cubiertos'] / avance['repeticiones'] * 100:.2f}%** "
+                         f"tras {avance['repeticiones']:,} intervalos (nominal {confianza}%)")
+
+            resultado = componentes.seguir_trabajo("b1_cobertura", parcial)
+            if resultado is not None:
+                st.write(f"Intervalos que contienen μ = {mu}: **{resultado['cubiertos']:,} de {repeticiones:,}**")
+                st.write(f"Cobertura empírica: **{resultado['cobertura']*100:.2f}%** (nominal {confianza}%)")
+
+                # Escalera de intervalos: solo una submuestra para que el gráfico sea legible
+                inferior = resultado["escalera_inferior"]
+                superior = resultado["escalera_superior"]
+                cubre = (inferior <= mu) & (mu <= superior)
+                filas = np.arange(len(inferior))
+
+                def dibujar(ax):
+                    ax.hlines(filas[cubre], inferior[cubre], superior[cubre], color='blue', label='Contiene μ')
+                    ax.hlines(filas[~cubre], inferior[~cubre], superior[~cubre], color='red', label='No contiene μ')
+                    ax.axvline(mu, color='green', linestyle='--', label='Media real')
+                    ax.set_yticks([])
+                    ax.set_title(f"Primeros {len(inferior)} de {repeticiones:,} intervalos")
+                    ax.legend()
+                graficos.mostrar_cacheado("b1_escalera", (semilla, mu, sigma, n, confianza, repeticiones, sigma_conocida),
+                                          dibujar, figsize=(6,5))
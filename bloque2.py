@@ -1,8 +1,12 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.stats import norm, t
+from scipy.stats import norm
+import inferencia
+import potencia
+import curvas
+import graficos
+import instrumentacion
+import componentes
 
 def run():
 
@@ -13,7 +17,8 @@ def run():
         "Pruebas de una y dos colas",
         "Cálculo del estadístico Z o t",
         "Decisión: rechazar o no H₀",
-        "Ejemplo interactivo"
+        "Ejemplo interactivo",
+        "Tamaño de muestra"
     ])
 
     if opcion == "Tipos de errores (I y II)":
@@ -51,26 +56,13 @@ def run():
         st.write("### Interactividad: relación entre α y los errores")
     
 
-        alpha_slider = st.slider("Selecciona nivel de significancia (α)", 0.01, 0.2, 0.05)
-        # Para ilustrar, asumimos que al reducir α aumenta β (relación conceptual)
-        beta_estimada = 0.25 - alpha_slider  # solo para fines didácticos
-        if beta_estimada < 0:
-            beta_estimada = 0.01
-
-        st.write(f"**Error Tipo I (α):** {alpha_slider:.2f}")
-        st.write(f"**Error Tipo II (β):** {beta_estimada:.2f} (aprox.)")
-
-        # Visualización simple
-        fig, ax = plt.subplots(figsize=(5,3))
-        ax.bar(["Error Tipo I (α)", "Error Tipo II (β)"], [alpha_slider, beta_estimada], color=["red", "orange"])
-        ax.set_ylim(0, 0.3)
-        ax.set_title("Relación conceptual entre α y β")
-        st.pyplot(fig)
+        _errores_y_potencia()
 
         st.info("""
         🔍 **Interpretación:**  
         - Si reduces **α**, cometes menos **Error Tipo I**, pero es más probable cometer **Error Tipo II** (β).  
         - Si aumentas **α**, al revés: más riesgo de **Error Tipo I**, pero menos **Error Tipo II**.  
+        - β también depende del tamaño del efecto real: efectos pequeños son más difíciles de detectar.  
         Lo ideal es equilibrar α y β aumentando el tamaño de la muestra para reducir ambos.
         """)
 
@@ -111,16 +103,18 @@ def run():
         """)
 
         # Visualización de regiones de rechazo para dos colas
-        x = np.linspace(-4,4,500)
-        y = norm.pdf(x)
         alpha = 0.05
-        z_crit = norm.ppf(1-alpha/2)
-        fig, ax = plt.subplots(figsize=(8,3))
-        ax.plot(x,y)
-        ax.fill_between(x,0,y,where=(x<-z_crit)|(x>z_crit),color='red',alpha=0.3,label='Región de rechazo')
-        ax.fill_between(x,0,y,where=(x>=-z_crit)&(x<=z_crit),color='green',alpha=0.3,label='Aceptación H₀')
-        ax.legend()
-        st.pyplot(fig)
+        def dibujar(ax):
+            x = curvas.x()
+            y = curvas.pdf()
+            z_crit = norm.ppf(1-alpha/2)
+            izquierda, centro, derecha = curvas.tramo(hasta=-z_crit), curvas.tramo(-z_crit, z_crit), curvas.tramo(desde=z_crit)
+            ax.plot(x,y)
+            ax.fill_between(x[izquierda],0,y[izquierda],color='red',alpha=0.3,label='Región de rechazo')
+            ax.fill_between(x[derecha],0,y[derecha],color='red',alpha=0.3)
+            ax.fill_between(x[centro],0,y[centro],color='green',alpha=0.3,label='Aceptación H₀')
+            ax.legend()
+        graficos.mostrar_cacheado("b2_colas", (), dibujar, figsize=(8,3))
 
     elif opcion == "Cálculo del estadístico Z o t":
         st.header("Cálculo del estadístico de prueba")
@@ -161,28 +155,23 @@ def run():
         mu0 = st.number_input("Media hipotética μ₀:", value=50.0)
         sigma_known = st.checkbox("¿Conoces la desviación estándar poblacional? (usa Z si sí, t si no)", value=True)
         alpha = st.slider("Nivel de significancia (α en %):", 1, 10, 5) / 100
-        tipo_prueba = st.selectbox("Tipo de prueba:", ["Dos colas", "Cola derecha", "Cola izquierda"])
-
-        n = st.number_input("Tamaño de la muestra (n):", 1, 1000, 30)
-        media_muestral = st.number_input("Media muestral:", value=52.0)
-        desv_muestral = st.number_input("Desviación estándar muestral:", value=10.0)
-
-        error_estandar = desv_muestral / np.sqrt(n)
-        estadistico = (media_muestral - mu0) / error_estandar
-
-        # Valores críticos
-        if tipo_prueba == "Dos colas":
-            valor_critico = norm.ppf(1 - alpha/2) if sigma_known else t.ppf(1 - alpha/2, n-1)
-            region_rechazo = abs(estadistico) > valor_critico
-        elif tipo_prueba == "Cola derecha":
-            valor_critico = norm.ppf(1 - alpha) if sigma_known else t.ppf(1 - alpha, n-1)
-            region_rechazo = estadistico > valor_critico
-        else:
-            valor_critico = norm.ppf(alpha) if sigma_known else t.ppf(alpha, n-1)
-            region_rechazo = estadistico < valor_critico
+        tipo_prueba = st.selectbox("Tipo de prueba:", inferencia.TIPOS_COLA)
+
+        componentes.cargar_resumenes("b2_archivo", [("la muestra", "b2_n", "b2_media", "b2_desv")])
+        componentes.inicializar({"b2_n": 30, "b2_media": 52.0, "b2_desv": 10.0})
+        n = st.number_input("Tamaño de la muestra (n):", min_value=1, key="b2_n")
+        media_muestral = st.number_input("Media muestral:", key="b2_media")
+        desv_muestral = st.number_input("Desviación estándar muestral:", key="b2_desv")
+
+        with instrumentacion.seccion("calculo"):
+            resultado = inferencia.prueba_media(media_muestral, desv_muestral, n, mu0, alpha, tipo_prueba, sigma_known)
+        estadistico = resultado["estadistico"]
+        valor_critico = resultado["valor_critico"]
+        region_rechazo = resultado["rechazo"]
 
         st.write(f"Estadístico calculado: **{estadistico:.3f}**")
         st.write(f"Valor crítico: **{valor_critico:.3f}**")
+        st.write(f"p-valor: **{resultado['p_valor']:.4f}**")
 
         if region_rechazo:
             st.error("🚨 Conclusión: Rechazamos H₀. Hay evidencia para aceptar H₁.")
@@ -190,24 +179,128 @@ def run():
             st.success("Conclusión: No rechazamos H₀. No hay evidencia suficiente contra ella.")
 
         # Visualización
-        x = np.linspace(-4,4,500)
-        y = norm.pdf(x) if sigma_known else t.pdf(x, n-1)
-
-        fig, ax = plt.subplots(figsize=(8,4))
-        ax.plot(x,y,label="Distribución bajo H₀")
-        ax.axvline(estadistico, color='green', linestyle='--', label='Estadístico muestral')
-
-        if tipo_prueba == "Dos colas":
-            ax.axvline(valor_critico, color='red', linestyle='--', label='Valor crítico')
-            ax.axvline(-valor_critico, color='red', linestyle='--')
-            ax.fill_between(x,0,y,where=(x>valor_critico)|(x<-valor_critico),color='red',alpha=0.3)
-        else:
-            ax.axvline(valor_critico, color='red', linestyle='--', label='Valor crítico')
-            if tipo_prueba == "Cola derecha":
-                ax.fill_between(x,0,y,where=(x>valor_critico),color='red',alpha=0.3)
+        def dibujar(ax):
+            x = curvas.x()
+            y = curvas.pdf() if sigma_known else curvas.pdf(n-1)
+
+            ax.plot(x,y,label="Distribución bajo H₀")
+            ax.axvline(estadistico, color='green', linestyle='--', label='Estadístico muestral')
+
+            if tipo_prueba == "Dos colas":
+                ax.axvline(valor_critico, color='red', linestyle='--', label='Valor crítico')
+                ax.axvline(-valor_critico, color='red', linestyle='--')
+                for region in (curvas.tramo(desde=valor_critico), curvas.tramo(hasta=-valor_critico)):
+                    ax.fill_between(x[region],0,y[region],color='red',alpha=0.3)
             else:
-                ax.fill_between(x,0,y,where=(x<valor_critico),color='red',alpha=0.3)
+                ax.axvline(valor_critico, color='red', linestyle='--', label='Valor crítico')
+                if tipo_prueba == "Cola derecha":
+                    region = curvas.tramo(desde=valor_critico)
+                else:
+                    region = curvas.tramo(hasta=valor_critico)
+                ax.fill_between(x[region],0,y[region],color='red',alpha=0.3)
+
+            ax.legend()
+            ax.set_title("Prueba de hipótesis: región de rechazo vs aceptación")
+        graficos.mostrar_cacheado("b2_ejemplo", (estadistico, valor_critico, tipo_prueba, sigma_known, n), dibujar, figsize=(8,4))
+
+    elif opcion == "Tamaño de muestra":
+        st.header("Tamaño de muestra para una media")
+        st.write("""
+        Al planificar un estudio la pregunta es al revés: ¿cuántas observaciones necesito?
+
+        - **Por potencia:** el n mínimo para detectar un efecto d = |μ - μ₀| / σ con probabilidad 1 - β.
+        - **Por margen de error:** el n mínimo para que el intervalo de confianza tenga semiamplitud ≤ E.
+        """)
 
-        ax.legend()
-        ax.set_title("Prueba de hipótesis: región de rechazo vs aceptación")
-        st.pyplot(fig)
+        sigma_conocida = st.checkbox("σ conocida (prueba Z; si no, t)", value=False, key="b2_tam_sigma")
+
+        st.subheader("Por potencia")
+
+        def resolver(efectos, alphas, objetivo, cola):
+            signo = -1 if cola == inferencia.COLA_IZQUIERDA else 1
+            return potencia.n_una_media(signo * efectos, alphas, objetivo, cola, sigma_conocida)
+        componentes.tabla_tamanos("b2_tam", "Tamaño del efecto d", 0.05, 2.0, (0.1, 1.0), resolver)
+
+        st.subheader("Por margen de error")
+        col1, col2, col3 = st.columns(3)
+        desv = col1.number_input("Desviación estándar (σ o s previa):", min_value=0.0001, value=10.0, key="b2_tam_desv")
+        margen = col2.number_input("Margen de error máximo (E):", min_value=0.0001, value=2.0, key="b2_tam_margen")
+        confianza = col3.slider("Nivel de confianza (%):", 80, 99, 95, key="b2_tam_confianza") / 100
+        n_margen = potencia.n_margen_media(desv, margen, confianza, sigma_conocida)
+        st.success(f"Se necesitan al menos **n = {n_margen:,.0f}** observaciones.")
+
+
+@instrumentacion.fragmento
+def _errores_y_potencia():
+    # α, efecto, cola y σ → curvas y superficie. n solo cambia β, que va en un
+    # fragmento propio: mover n no vuelve a tocar las figuras de potencia
+    alpha_slider = st.slider("Selecciona nivel de significancia (α)", 0.01, 0.2, 0.05)
+    col1, col2 = st.columns(2)
+    with col1:
+        efecto = st.slider("Tamaño del efecto real d = (μ - μ₀) / σ", 0.0, 1.5, 0.5, 0.05,
+                           key="b2_potencia_efecto")
+    with col2:
+        cola_potencia = st.selectbox("Tipo de prueba:", inferencia.TIPOS_COLA, key="b2_potencia_cola")
+        sigma_potencia = st.checkbox("σ conocida (prueba Z; si no, t)", value=True, key="b2_potencia_sigma")
+
+    # Con una prueba de cola izquierda el efecto que interesa detectar es negativo
+    signo = -1 if cola_potencia == inferencia.COLA_IZQUIERDA else 1
+    _errores_para_n(alpha_slider, efecto, signo, cola_potencia, sigma_potencia)
+
+    # Curvas y superficie de potencia: la rejilla completa se calcula una vez
+    # por combinación de parámetros y queda memorizada para todas las sesiones.
+    # Las figuras no dependen de n, así que mover ese slider no las vuelve a dibujar
+    ns = np.arange(2, 201)
+    efectos_curva = tuple(sorted({0.2, 0.5, 0.8, efecto}))
+    with instrumentacion.seccion("calculo"):
+        potencias = potencia.rejilla_potencia(ns, signo * np.array(efectos_curva), alpha_slider,
+                                              cola_potencia, sigma_potencia)[:, :, 0]
+
+    def dibujar(ax):
+        for j, d in enumerate(efectos_curva):
+            ax.plot(ns, potencias[:, j], lw=2.5 if d == efecto else 1.2, label=f"d = {d:.2f}")
+        ax.axhline(0.8, color="gray", linestyle=":", label="Potencia 0.8")
+        ax.set_xlabel("Tamaño de la muestra (n)")
+        ax.set_ylabel("Potencia (1 - β)")
+        ax.set_ylim(0, 1.02)
+        ax.set_title("Curvas de potencia")
+        ax.legend(loc="lower right")
+    graficos.mostrar_cacheado("b2_curvas_potencia", (alpha_slider, efecto, cola_potencia, sigma_potencia),
+                              dibujar, figsize=(8,4))
+
+    efectos_superficie = np.linspace(0, 1.5, 61)
+    with instrumentacion.seccion("calculo"):
+        superficie = potencia.rejilla_potencia(ns, signo * efectos_superficie, alpha_slider,
+                                               cola_potencia, sigma_potencia)[:, :, 0]
+
+    def dibujar(ax):
+        malla = ax.pcolormesh(ns, efectos_superficie, superficie.T, cmap="viridis", vmin=0, vmax=1,
+                              shading="auto")
+        ax.contour(ns, efectos_superficie, superficie.T, levels=[0.8], colors="white")
+        ax.figure.colorbar(malla, ax=ax, label="Potencia (1 - β)")
+        ax.set_xlabel("Tamaño de la muestra (n)")
+        ax.set_ylabel("Tamaño del efecto (d)")
+        ax.set_title("Superficie de potencia (línea blanca: potencia 0.8)")
+    graficos.mostrar_cacheado("b2_superficie_potencia", (alpha_slider, cola_potencia, sigma_potencia),
+                              dibujar, figsize=(8,4))
+
+
+@instrumentacion.fragmento
+def _errores_para_n(alpha_slider, efecto, signo, cola_potencia, sigma_potencia):
+    n_potencia = st.slider("Tamaño de la muestra (n)", 2, 200, 30, key="b2_potencia_n")
+    with instrumentacion.seccion("calculo"):
+        potencia_actual = potencia.potencia_media(n_potencia, signo * efecto, alpha_slider,
+                                                  cola_potencia, sigma_potencia)
+    beta = 1 - potencia_actual
+
+    st.write(f"**Error Tipo I (α):** {alpha_slider:.2f}")
+    st.write(f"**Error Tipo II (β):** {beta:.3f}")
+    st.write(f"**Potencia (1 - β):** {potencia_actual:.3f}")
+    if efecto == 0:
+        st.caption("Con d = 0 H₀ es verdadera: no hay error tipo II y la \"potencia\" es solo α.")
+
+    def dibujar(ax):
+        ax.bar(["Error Tipo I (α)", "Error Tipo II (β)"], [alpha_slider, beta], color=["red", "orange"])
+        ax.set_ylim(0, 1)
+        ax.set_title(f"α y β con n = {n_potencia} y d = {efecto:.2f}")
+    graficos.mostrar_cacheado("b2_errores", (alpha_slider, beta, n_potencia, efecto), dibujar, figsize=(5,3))
@@ -1,8 +1,16 @@
+import hashlib
+
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pandas as pd
 from scipy.stats import norm, t
+import inferencia
+import potencia
+import graficos
+import instrumentacion
+import componentes
+import ingesta
+import remuestreo
 
 def run():
 
@@ -12,18 +20,20 @@ def run():
         "Intervalo de confianza para una media (recordatorio)",
         "Intervalo de confianza para dos medias",
         "Muestras independientes vs apareadas",
-        "Ejemplo interactivo"
+        "Ejemplo interactivo",
+        "Tamaño de muestra",
+        "Comparación de muchas métricas (A/B)"
     ])
 
     def plot_ic(mean, se, ci_lower, ci_upper, label="Intervalo de confianza"):
-        fig, ax = plt.subplots(figsize=(8, 2))
-        ax.errorbar(0, mean, yerr=[[mean - ci_lower], [ci_upper - mean]], fmt='o', capsize=10, label=label)
-        ax.set_xlim(-1, 1)
-        ax.set_ylim(ci_lower - 1, ci_upper + 1)
-        ax.set_xticks([])
-        ax.set_title("Intervalo de confianza")
-        ax.legend()
-        st.pyplot(fig)
+        def dibujar(ax):
+            ax.errorbar(0, mean, yerr=[[mean - ci_lower], [ci_upper - mean]], fmt='o', capsize=10, label=label)
+            ax.set_xlim(-1, 1)
+            ax.set_ylim(ci_lower - 1, ci_upper + 1)
+            ax.set_xticks([])
+            ax.set_title("Intervalo de confianza")
+            ax.legend()
+        graficos.mostrar_cacheado("b3_ic", (mean, ci_lower, ci_upper, label), dibujar, figsize=(8, 2))
 
     if opcion == "Intervalo de confianza para una media (recordatorio)":
         st.header("Intervalo de confianza para una media (recordatorio)")
@@ -123,45 +133,244 @@ def run():
     elif opcion == "Ejemplo interactivo":
         st.header("✅ Ejemplo interactivo: Comparar dos muestras")
 
+        modo = st.radio("Datos de entrada:", ["Resúmenes (t de Welch o apareada)", "Datos crudos (bootstrap y permutación)"],
+                        horizontal=True, key="b3_modo")
         tipo_muestra = st.selectbox("Tipo de muestras:", ["Independientes", "Apareadas"])
 
-        n1 = st.number_input("Tamaño muestra 1 (n1):", min_value=2, value=30)
-        n2 = n1 if tipo_muestra == "Apareadas" else st.number_input("Tamaño muestra 2 (n2):", min_value=2, value=30)
-        
-        mean1 = st.number_input("Media muestra 1 (X̄₁):", value=50.0)
-        mean2 = st.number_input("Media muestra 2 (X̄₂):", value=52.0)
+        if modo == "Datos crudos (bootstrap y permutación)":
+            st.write("""
+            Con los datos originales no hace falta suponer normalidad: el **bootstrap** remuestrea cada
+            muestra con reemplazo para aproximar la distribución de X̄₁ - X̄₂, y la **prueba de permutación**
+            reparte los datos al azar entre los grupos (o cambia el signo de las diferencias si son
+            apareadas) para ver qué diferencias aparecen cuando H₀ es cierta.
+            """)
+            apareadas = tipo_muestra == "Apareadas"
+            datos_archivo = componentes.cargar_columnas("b3_crudos", ["la muestra 1", "la muestra 2"])
+            if datos_archivo is None:
+                texto1 = st.text_area("Datos de la muestra 1 (separados por coma, espacio o salto de línea)",
+                                      "12.1, 14.3, 11.8, 15.2, 13.4, 12.9, 14.8, 13.1, 12.5, 15.9", key="b3_datos1")
+                texto2 = st.text_area("Datos de la muestra 2 (separados por coma, espacio o salto de línea)",
+                                      "13.5, 15.1, 14.2, 16.8, 14.9, 13.8, 16.1, 15.4, 14.0, 17.2", key="b3_datos2")
+                try:
+                    x = ingesta.parsear_numeros(texto1)
+                    y = ingesta.parsear_numeros(texto2)
+                except ValueError as e:
+                    st.error(f"Error al leer los datos: {e}")
+                    return
+            else:
+                x, y = datos_archivo["la muestra 1"], datos_archivo["la muestra 2"]
+                st.caption(f"Datos del archivo: n₁ = {len(x):,}, n₂ = {len(y):,}.")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                repeticiones = st.select_slider("Número de remuestreos:", [1_000, 10_000, 100_000, 1_000_000],
+                                                value=10_000, key="b3_repeticiones")
+                confianza = st.slider("Nivel de confianza (%):", 80, 99, 95, key="b3_confianza_remuestreo") / 100
+            with col2:
+                cola = st.selectbox("Hipótesis alternativa de la permutación:", inferencia.TIPOS_COLA, key="b3_cola_permutacion")
+                semilla = st.number_input("Semilla:", min_value=0, value=2024, step=1, key="b3_semilla")
+
+            # Huella de los datos y parámetros: los resultados guardados solo se muestran si coinciden
+            huella = (hashlib.blake2b(np.asarray(x).tobytes() + b"|" + np.asarray(y).tobytes(), digest_size=16).digest(),
+                      apareadas, repeticiones, confianza, cola, int(semilla))
+            if st.button("Calcular bootstrap y permutación", key="b3_calcular_remuestreo"):
+                try:
+                    with st.spinner("Generando remuestreos..."):
+                        with instrumentacion.seccion("calculo"):
+                            bootstrap = remuestreo.bootstrap_diferencia(x, y, repeticiones, confianza, apareadas, int(semilla))
+                            permutacion = remuestreo.permutacion_diferencia(x, y, repeticiones, cola, apareadas, int(semilla))
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                st.session_state["b3_remuestreo"] = (huella, bootstrap, permutacion)
+
+            guardado = st.session_state.get("b3_remuestreo")
+            if guardado is None or guardado[0] != huella:
+                st.info("Pulsa **Calcular** para generar los remuestreos con estos datos y parámetros.")
+                return
+            _, bootstrap, permutacion = guardado
+
+            st.write(f"Diferencia observada X̄₁ - X̄₂: **{bootstrap['diferencia']:.4f}**")
+            st.write(f"Error estándar bootstrap: {bootstrap['error_estandar']:.4f}")
+            st.write(f"IC bootstrap percentil al {100*confianza:.0f}%: "
+                     f"[{bootstrap['percentil'][0]:.4f}, {bootstrap['percentil'][1]:.4f}]")
+            st.write(f"IC bootstrap BCa al {100*confianza:.0f}%: "
+                     f"[{bootstrap['bca'][0]:.4f}, {bootstrap['bca'][1]:.4f}]")
+            if apareadas:
+                d = np.asarray(x) - np.asarray(y)
+                t_clasico = inferencia.ic_dos_medias(d.mean(), d.std(ddof=1), len(d), 0.0, alpha=1 - confianza,
+                                                     apareadas=True)
+            else:
+                t_clasico = inferencia.ic_dos_medias(np.mean(x), np.std(x, ddof=1), len(x),
+                                                     np.mean(y), np.std(y, ddof=1), len(y), 1 - confianza)
+            st.write(f"IC t clásico (para comparar): [{t_clasico['ci_lower']:.4f}, {t_clasico['ci_upper']:.4f}]")
+            st.write(f"p-valor de la permutación ({permutacion['repeticiones']:,} remuestreos): "
+                     f"**{permutacion['p_valor']:.4g}**")
+
+            if permutacion["p_valor"] < 1 - confianza:
+                st.success(f"✅ Con α = {1 - confianza:.2f} se rechaza H₀: hay diferencia significativa entre las muestras.")
+            else:
+                st.warning(f"⚠️ Con α = {1 - confianza:.2f} no se rechaza H₀.")
+
+            fig, (ax1, ax2) = graficos.subplots("b3_remuestreo", 1, 2, figsize=(10, 4))
+            conteos, bordes = np.histogram(bootstrap["distribucion"], bins=60)
+            ax1.stairs(conteos, bordes, fill=True, color="skyblue")
+            for limite in bootstrap["bca"]:
+                ax1.axvline(limite, color="red", linestyle="--")
+            ax1.axvline(bootstrap["diferencia"], color="black")
+            ax1.set_title("Bootstrap de X̄₁ - X̄₂ (rojo: IC BCa)")
+            conteos, bordes = np.histogram(permutacion["distribucion"], bins=60)
+            ax2.stairs(conteos, bordes, fill=True, color="lightgray")
+            ax2.axvline(permutacion["diferencia"], color="green", linestyle="--", label="Diferencia observada")
+            ax2.set_title("Distribución bajo H₀ (permutación)")
+            ax2.legend()
+            graficos.mostrar(fig)
+            st.caption(f"Semilla {bootstrap['semilla']}: con la misma semilla se obtienen los mismos resultados.")
+
+        else:
+            componentes.cargar_resumenes("b3_archivo", [("la muestra 1", "b3_n1", "b3_mean1", "b3_std1"),
+                                                        ("la muestra 2", "b3_n2", "b3_mean2", "b3_std2")])
+            componentes.inicializar({"b3_n1": 30, "b3_n2": 30, "b3_mean1": 50.0, "b3_mean2": 52.0,
+                                     "b3_std1": 10.0, "b3_std2": 10.0})
+
+            n1 = st.number_input("Tamaño muestra 1 (n1):", min_value=2, key="b3_n1")
+            n2 = n1 if tipo_muestra == "Apareadas" else st.number_input("Tamaño muestra 2 (n2):", min_value=2, key="b3_n2")
         
-        std1 = st.number_input("Desviación estándar muestra 1 (s₁):", min_value=0.01, value=10.0)
-        std2 = std1 if tipo_muestra == "Apareadas" else st.number_input("Desviación estándar muestra 2 (s₂):", min_value=0.01, value=10.0)
+            mean1 = st.number_input("Media muestra 1 (X̄₁):", key="b3_mean1")
+            mean2 = st.number_input("Media muestra 2 (X̄₂):", key="b3_mean2")
         
-        alpha = st.slider("Nivel de significancia (α):", 1, 10, 5) / 100
-
-        # Cálculos
-        if tipo_muestra == "Independientes":
-            se_diff = np.sqrt((std1**2)/n1 + (std2**2)/n2)
-            df_num = ((std1**2)/n1 + (std2**2)/n2)**2
-            df_den = (( (std1**2)/n1 )**2)/(n1-1) + (( (std2**2)/n2 )**2)/(n2-1)
-            df = int(df_num / df_den)
-            t_crit = stats.t.ppf(1 - alpha/2, df)
-            diff_means = mean1 - mean2
-        else:
-            se_diff = std1 / np.sqrt(n1)
-            df = n1 - 1
-            t_crit = stats.t.ppf(1 - alpha/2, df)
-            diff_means = mean1 - mean2  # diferencia muestral de pares
+            std1 = st.number_input("Desviación estándar muestra 1 (s₁):", min_value=0.01, key="b3_std1")
+            std2 = std1 if tipo_muestra == "Apareadas" else st.number_input("Desviación estándar muestra 2 (s₂):", min_value=0.01, key="b3_std2")
         
-        ci_lower = diff_means - t_crit * se_diff
-        ci_upper = diff_means + t_crit * se_diff
+            alpha = st.slider("Nivel de significancia (α):", 1, 10, 5) / 100
 
-        st.write(f"Diferencia de medias: {diff_means:.3f}")
-        st.write(f"Intervalo de confianza al {100*(1-alpha):.1f}%: [{ci_lower:.3f}, {ci_upper:.3f}]")
+            # Cálculos
+            with instrumentacion.seccion("calculo"):
+                resultado = inferencia.ic_dos_medias(mean1, std1, n1, mean2, std2, n2, alpha,
+                                                     apareadas=(tipo_muestra == "Apareadas"))
+            diff_means = resultado["diff_means"]
+            se_diff = resultado["se_diff"]
+            ci_lower = resultado["ci_lower"]
+            ci_upper = resultado["ci_upper"]
 
-        # Interpretación
-        if ci_lower > 0 or ci_upper < 0:
-            st.success("✅ El intervalo no incluye 0, hay diferencia significativa entre las muestras.")
-        else:
-            st.warning("⚠️ El intervalo incluye 0, no hay diferencia significativa entre las muestras.")
+            st.write(f"Diferencia de medias: {diff_means:.3f}")
+            st.write(f"Intervalo de confianza al {100*(1-alpha):.1f}%: [{ci_lower:.3f}, {ci_upper:.3f}]")
+
+            # Interpretación
+            if resultado["significativo"]:
+                st.success("✅ El intervalo no incluye 0, hay diferencia significativa entre las muestras.")
+            else:
+                st.warning("⚠️ El intervalo incluye 0, no hay diferencia significativa entre las muestras.")
+
+            # Gráfico del intervalo
+            plot_ic(diff_means, se_diff, ci_lower, ci_upper, label="Diferencia de medias")
+
+    elif opcion == "Tamaño de muestra":
+        st.header("Tamaño de muestra para comparar dos medias (Welch)")
+        st.write("""
+        El n de cada grupo para detectar una diferencia μ₁ - μ₂ con la prueba t de Welch, o para
+        que el intervalo de la diferencia tenga un margen de error dado. Con grupos de distinto
+        tamaño se fija la razón n₂ / n₁.
+        """)
+
+        col1, col2, col3 = st.columns(3)
+        desv1 = col1.number_input("Desviación estándar grupo 1 (σ₁):", min_value=0.0001, value=10.0, key="b3_tam_desv1")
+        desv2 = col2.number_input("Desviación estándar grupo 2 (σ₂):", min_value=0.0001, value=10.0, key="b3_tam_desv2")
+        razon = col3.number_input("Razón n₂ / n₁:", min_value=0.1, max_value=10.0, value=1.0, key="b3_tam_razon")
+
+        st.subheader("Por potencia")
+
+        def resolver(diferencias, alphas, objetivo, cola):
+            signo = -1 if cola == inferencia.COLA_IZQUIERDA else 1
+            return potencia.n_dos_medias(signo * diferencias, desv1, desv2, alphas, objetivo, cola, razon)
+        tabla = componentes.tabla_tamanos("b3_tam", "Diferencia |μ₁ - μ₂|", 0.1, 20.0, (1.0, 10.0), resolver,
+                                          paso=0.1)
+        if tabla is not None and razon != 1:
+            st.caption(f"La tabla muestra n₁; n₂ = ⌈{razon:g} · n₁⌉.")
+
+        st.subheader("Por margen de error")
+        col1, col2 = st.columns(2)
+        margen = col1.number_input("Margen de error máximo para μ₁ - μ₂ (E):", min_value=0.0001, value=3.0,
+                                   key="b3_tam_margen")
+        confianza = col2.slider("Nivel de confianza (%):", 80, 99, 95, key="b3_tam_confianza") / 100
+        n1 = potencia.n_margen_dos_medias(desv1, desv2, margen, confianza, razon)
+        st.success(f"Se necesitan al menos **n₁ = {n1:,.0f}** y **n₂ = {max(np.ceil(razon * n1), 2):,.0f}** observaciones.")
+
+    elif opcion == "Comparación de muchas métricas (A/B)":
+        st.header("Comparación de muchas métricas (A/B)")
+        st.write("""
+        En un experimento A/B se suelen comparar muchas métricas y segmentos a la vez. Cada fila es
+        una comparación de Welch entre el grupo 1 y el grupo 2. Al hacer m pruebas, la probabilidad de
+        algún falso positivo crece con m, por eso los p-valores se corrigen:
+
+        - **Bonferroni:** multiplica cada p-valor por m (controla la probabilidad de cualquier error tipo I).
+        - **Holm:** versión escalonada de Bonferroni, igual de segura y más potente.
+        - **Benjamini-Hochberg:** controla la proporción esperada de falsos descubrimientos (FDR).
+        """)
+
+        _metricas()
+
+
+@instrumentacion.fragmento
+def _metricas():
+    # Datos → tabla de métricas. α y la corrección viven en un fragmento interno,
+    # así que cambiarlos no vuelve a leer el archivo ni a reconstruir el editor
+    columnas = ["mean1", "sd1", "n1", "mean2", "sd2", "n2"]
+    with st.expander("📂 Cargar tabla desde archivo"):
+        st.caption("Columnas necesarias: " + ", ".join(columnas) + " (y opcionalmente `metrica`).")
+        fuente = componentes.fuente_de_datos("b3_metricas")
+    if fuente is not None:
+        try:
+            tabla = ingesta.leer_tabla(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+    else:
+        componentes.inicializar({"b3_metricas_ejemplo": pd.DataFrame({
+            "metrica": ["conversión", "ingreso", "páginas vistas", "tiempo en sitio"],
+            "mean1": [0.110, 25.3, 4.10, 181.0], "sd1": [0.313, 40.2, 2.30, 95.0], "n1": [5000, 5000, 5000, 5000],
+            "mean2": [0.118, 26.9, 4.05, 186.0], "sd2": [0.323, 41.5, 2.40, 97.0], "n2": [5000, 5000, 5000, 5000],
+        })})
+        tabla = st.data_editor(st.session_state["b3_metricas_ejemplo"], num_rows="dynamic", key="b3_metricas_tabla")
+
+    faltan = [c for c in columnas if c not in tabla.columns]
+    if faltan:
+        st.error("Faltan columnas: " + ", ".join(faltan))
+        return
+    _resultados_metricas(tabla, columnas)
+
+
+@instrumentacion.fragmento
+def _resultados_metricas(tabla, columnas):
+    col1, col2 = st.columns(2)
+    alpha = col1.slider("Nivel de significancia (α):", 1, 10, 5, key="b3_metricas_alpha") / 100
+    correccion = col2.selectbox("Corrección por comparaciones múltiples:", inferencia.CORRECCIONES, index=2,
+                                key="b3_metricas_correccion")
 
-        # Gráfico del intervalo
-        plot_ic(diff_means, se_diff, ci_lower, ci_upper, label="Diferencia de medias")
+    valores = [tabla[c].to_numpy(dtype=float) for c in columnas]
+    with instrumentacion.seccion("calculo"):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            resultado = inferencia.comparar_metricas(*valores, alpha=alpha, correccion=correccion)
+    nombres = tabla["metrica"].astype(str) if "metrica" in tabla.columns else pd.RangeIndex(1, len(tabla) + 1)
+    salida = pd.DataFrame({
+        "metrica": np.asarray(nombres),
+        "diferencia": resultado["diff_means"],
+        "se_diff": resultado["se_diff"],
+        "df": resultado["df"],
+        "t": resultado["estadistico"],
+        "p_valor": resultado["p_valor"],
+        "p_ajustado": resultado["p_ajustado"],
+        "ci_lower": resultado["ci_lower"],
+        "ci_upper": resultado["ci_upper"],
+        "significativa": resultado["rechazo"],
+    })
 
+    validas = int(np.count_nonzero(~np.isnan(resultado["p_valor"])))
+    st.write(f"**{int(salida['significativa'].sum())}** de {validas} métricas son significativas "
+             f"con α = {alpha:.2f} y corrección {correccion}.")
+    if validas < len(salida):
+        st.warning(f"{len(salida) - validas} filas no se pudieron evaluar (faltan datos o n < 2).")
+    st.dataframe(salida, hide_index=True)
+    st.caption(f"Los intervalos son al {100*(1-alpha):.0f}% sin corregir; haz clic en una columna para ordenar.")
+    st.download_button("⬇️ Descargar resultados (CSV)", salida.to_csv(index=False).encode("utf-8"),
+                       file_name="comparacion_metricas.csv", mime="text/csv", key="b3_metricas_descargar")
@@ -1,8 +1,18 @@
+import hashlib
+
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.stats import norm, t , f , chi2_contingency
+import pandas as pd
+import inferencia
+import potencia
+import curvas
+import graficos
+import instrumentacion
+import componentes
+import ingesta
+import exactas
+import posthoc
+import secuencial
 
 def run():
 
@@ -14,55 +24,62 @@ def run():
             "Intervalos de confianza para medias y proporciones",
             "Pruebas para proporciones",
             "Pruebas chi-cuadrado (independencia y bondad de ajuste)",
-            "Introducción a ANOVA (análisis de varianza)"
+            "Introducción a ANOVA (análisis de varianza)",
+            "Tamaño de muestra para proporciones"
         ]
     )
 
     if opcion == "Intervalos de confianza para medias y proporciones":
-        st.subheader("Intervalos de confianza para la media")
-        st.write("""
-        Un intervalo de confianza (IC) para la media es un rango donde esperamos que esté el valor real de la media poblacional, con un nivel de confianza dado.
-        """)
-
-        media_muestral = st.number_input("Media muestral (\\(\\bar{x}\\))", value=50.0)
-        desviacion = st.number_input("Desviación estándar (s)", value=10.0)
-        tamano_muestra = st.number_input("Tamaño de la muestra (n)", value=30)
-        nivel_confianza = st.slider("Nivel de confianza (%)", 80, 99, 95)
-
-        alpha = 1 - nivel_confianza / 100
-
-        if tamano_muestra > 30:
-            critico = norm.ppf(1 - alpha / 2)
-            distribucion = "Normal (Z)"
-        else:
-            critico = t.ppf(1 - alpha / 2, df=tamano_muestra - 1)
-            distribucion = f"t de Student (df={tamano_muestra - 1})"
-
-        error_estandar = desviacion / np.sqrt(tamano_muestra)
-        margen_error = critico * error_estandar
-
-        limite_inferior = media_muestral - margen_error
-        limite_superior = media_muestral + margen_error
-
-        st.write(f"Distribución usada: **{distribucion}**")
-        st.write(f"Valor crítico: **{critico:.3f}**")
-        st.write(f"Error estándar: **{error_estandar:.3f}**")
-        st.write(f"Margen de error: **{margen_error:.3f}**")
-        st.write(f"Intervalo de confianza: [{limite_inferior:.3f}, {limite_superior:.3f}]")
+        tipo_ic = st.radio("Parámetro:", ["Media", "Proporción (muchos segmentos)"], horizontal=True,
+                           key="b4_ic_tipo")
+
+        if tipo_ic == "Media":
+            st.subheader("Intervalos de confianza para la media")
+            st.write("""
+            Un intervalo de confianza (IC) para la media es un rango donde esperamos que esté el valor real de la media poblacional, con un nivel de confianza dado.
+            """)
+
+            media_muestral = st.number_input("Media muestral (\\(\\bar{x}\\))", value=50.0)
+            desviacion = st.number_input("Desviación estándar (s)", value=10.0)
+            tamano_muestra = st.number_input("Tamaño de la muestra (n)", value=30)
+            nivel_confianza = st.slider("Nivel de confianza (%)", 80, 99, 95)
+
+            alpha = 1 - nivel_confianza / 100
+
+            resultado = inferencia.ic_media(media_muestral, desviacion, tamano_muestra, nivel_confianza / 100)
+            critico = resultado["valor_critico"]
+            error_estandar = resultado["error_estandar"]
+            margen_error = resultado["margen_error"]
+            limite_inferior = resultado["limite_inferior"]
+            limite_superior = resultado["limite_superior"]
+
+            if tamano_muestra > 30:
+                distribucion = "Normal (Z)"
+            else:
+                distribucion = f"t de Student (df={tamano_muestra - 1})"
+
+            st.write(f"Distribución usada: **{distribucion}**")
+            st.write(f"Valor crítico: **{critico:.3f}**")
+            st.write(f"Error estándar: **{error_estandar:.3f}**")
+            st.write(f"Margen de error: **{margen_error:.3f}**")
+            st.write(f"Intervalo de confianza: [{limite_inferior:.3f}, {limite_superior:.3f}]")
+
+            def dibujar(ax):
+                # Curva estándar compartida, reescalada a la media y el error estándar
+                x = media_muestral + error_estandar * curvas.x()
+                y = (curvas.pdf() if tamano_muestra > 30 else curvas.pdf(tamano_muestra - 1)) / error_estandar
+                intervalo = curvas.tramo((limite_inferior - media_muestral) / error_estandar,
+                                         (limite_superior - media_muestral) / error_estandar)
+
+                ax.plot(x, y, label='Distribución del estimador')
+                ax.fill_between(x[intervalo], 0, y[intervalo], color='green', alpha=0.3, label='Intervalo de confianza')
+                ax.axvline(media_muestral, color='red', linestyle='--', label='Media muestral')
+                ax.set_title("Intervalo de confianza para la media")
+                ax.legend()
+            graficos.mostrar_cacheado("b4_ic_media", (media_muestral, error_estandar, limite_inferior, limite_superior, tamano_muestra), dibujar, figsize=(8, 4))
 
-        x = np.linspace(media_muestral - 4 * error_estandar, media_muestral + 4 * error_estandar, 500)
-        if tamano_muestra > 30:
-            y = norm.pdf(x, media_muestral, error_estandar)
         else:
-            y = t.pdf((x - media_muestral) / error_estandar, df=tamano_muestra - 1) / error_estandar
-
-        fig, ax = plt.subplots(figsize=(8, 4))
-        ax.plot(x, y, label='Distribución del estimador')
-        ax.fill_between(x, 0, y, where=(x >= limite_inferior) & (x <= limite_superior), color='green', alpha=0.3, label='Intervalo de confianza')
-        ax.axvline(media_muestral, color='red', linestyle='--', label='Media muestral')
-        ax.set_title("Intervalo de confianza para la media")
-        ax.legend()
-        st.pyplot(fig)
+            _ic_proporciones()
 
 
     elif opcion == "Pruebas para proporciones":
@@ -84,47 +101,68 @@ def run():
         - \\(n\\) es el tamaño de la muestra
         """)
 
-        # Inputs
-        p0 = st.number_input("Proporción bajo hipótesis nula (p0)", min_value=0.0, max_value=1.0, value=0.5)
-        exito = st.number_input("Número de éxitos en la muestra", min_value=0, value=40)
-        n = st.number_input("Tamaño de la muestra (n)", min_value=1, value=100)
-        alpha = st.slider("Nivel de significancia (α)", min_value=0.01, max_value=0.10, value=0.05)
-
-        # Proporción muestral
-        p_hat = exito / n
-
-        # Estadístico Z
-        se = np.sqrt(p0 * (1 - p0) / n)
-        z_stat = (p_hat - p0) / se
+        modo = st.radio("Modo:", ["Una muestra", "Monitoreo secuencial (lotes)"], horizontal=True, key="b4_modo_proporcion")
+
+        if modo == "Una muestra":
+            # Inputs
+            p0 = st.number_input("Proporción bajo hipótesis nula (p0)", min_value=0.0, max_value=1.0, value=0.5)
+            exito = st.number_input("Número de éxitos en la muestra", min_value=0, value=40)
+            n = st.number_input("Tamaño de la muestra (n)", min_value=1, value=100)
+            alpha = st.slider("Nivel de significancia (α)", min_value=0.01, max_value=0.10, value=0.05)
+            metodo = st.radio("Cálculo del p-valor:", ["Binomial exacta", "Aproximación normal (Z)"],
+                              horizontal=True, key="b4_prop_metodo")
+
+            # Estadístico Z y p-valor (prueba bilateral)
+            resultado = inferencia.prueba_proporcion(exito, n, p0, alpha)
+            p_hat = resultado["p_hat"]
+            z_stat = resultado["estadistico"]
+            p_texto = f"{resultado['p_valor']:.4f}"
+            if metodo == "Binomial exacta":
+                # Exacta para cualquier n: la aproximación normal falla con conteos pequeños y en colas extremas
+                if exito > n or not 0 < p0 < 1:
+                    st.warning("La prueba exacta necesita éxitos ≤ n y 0 < p₀ < 1; se usa la aproximación normal.")
+                    metodo = "Aproximación normal (Z)"
+                else:
+                    exacta = exactas.binomial_exacta(exito, n, p0, alpha)
+                    resultado = {**resultado, "p_valor": exacta["p_valor"], "rechazo": exacta["rechazo"]}
+                    p_texto = exactas.formatear_p(exacta["p_valor"], exacta["log10_p"])
 
-        # Prueba bilateral: p-valor
-        from scipy.stats import norm
-        p_value = 2 * (1 - norm.cdf(abs(z_stat)))
+            st.write(f"Proporción muestral \\(\\hat{{p}}\\): **{p_hat:.3f}**")
+            st.write(f"Estadístico Z: **{z_stat:.3f}**")
+            st.write(f"p-valor ({metodo}, prueba bilateral): **{p_texto}**")
 
-        st.write(f"Proporción muestral \\(\\hat{{p}}\\): **{p_hat:.3f}**")
-        st.write(f"Estadístico Z: **{z_stat:.3f}**")
-        st.write(f"p-valor (prueba bilateral): **{p_value:.4f}**")
+            if resultado["rechazo"]:
+                st.success(f"Se rechaza la hipótesis nula con un nivel de significancia de {alpha}")
+            else:
+                st.info(f"No se rechaza la hipótesis nula con un nivel de significancia de {alpha}")
 
-        if p_value < alpha:
-            st.success(f"Se rechaza la hipótesis nula con un nivel de significancia de {alpha}")
-        else:
-            st.info(f"No se rechaza la hipótesis nula con un nivel de significancia de {alpha}")
+            # Gráfica para visualización
+            def dibujar(ax):
+                x = curvas.x()
+                y = curvas.pdf()
 
-        # Gráfica para visualización
-        x = np.linspace(-4, 4, 1000)
-        y = norm.pdf(x)
+                ax.plot(x, y, label="Distribución normal estándar")
 
-        fig, ax = plt.subplots(figsize=(8,4))
-        ax.plot(x, y, label="Distribución normal estándar")
+                # Región rechazo para prueba bilateral
+                crit = resultado["valor_critico"]
+                izquierda, derecha = curvas.tramo(hasta=-crit), curvas.tramo(desde=crit)
+                ax.fill_between(x[izquierda], 0, y[izquierda], color='red', alpha=0.3, label="Región de rechazo")
+                ax.fill_between(x[derecha], 0, y[derecha], color='red', alpha=0.3)
+                ax.axvline(z_stat, color='black', linestyle='--', label="Estadístico Z calculado")
+                ax.set_title("Prueba para proporciones: Regiones de rechazo")
+                ax.legend()
+            graficos.mostrar_cacheado("b4_proporciones", (z_stat, alpha), dibujar, figsize=(8,4))
 
-        # Región rechazo para prueba bilateral
-        crit = norm.ppf(1 - alpha/2)
-        ax.fill_between(x, 0, y, where=(x <= -crit) | (x >= crit), color='red', alpha=0.3, label="Región de rechazo")
-        ax.axvline(z_stat, color='black', linestyle='--', label="Estadístico Z calculado")
-        ax.set_title("Prueba para proporciones: Regiones de rechazo")
-        ax.legend()
-        st.pyplot(fig)
+        else:
+            st.write("""
+            Cuando los datos llegan por lotes y se mira el resultado después de cada uno, el p-valor clásico
+            deja de ser válido: con suficientes miradas termina bajando de α aunque H₀ sea cierta. Aquí la
+            decisión se toma con una **frontera secuencial** que controla el error tipo I aunque se mire
+            después de cada lote. Solo se guardan los totales acumulados, así que cada lote nuevo se
+            procesa sin recorrer la historia.
+            """)
 
+            _monitoreo_secuencial()
 
     elif opcion == "Pruebas chi-cuadrado (independencia y bondad de ajuste)":
         st.subheader("Pruebas Chi-cuadrado")
@@ -148,54 +186,132 @@ def run():
         tipo_prueba = st.radio("Selecciona tipo de prueba Chi-cuadrado:", ["Independencia", "Bondad de ajuste"])
 
         if tipo_prueba == "Independencia":
-            st.write("Introduce la tabla de contingencia:")
-
-            # Ejemplo de tabla 2x2 para simplificar, se puede ampliar
-            col1, col2 = st.columns(2)
-            with col1:
-                st.write("Grupo A")
-                a11 = st.number_input("Celda (1,1)", min_value=0, value=30)
-                a12 = st.number_input("Celda (1,2)", min_value=0, value=20)
-            with col2:
-                st.write("Grupo B")
-                a21 = st.number_input("Celda (2,1)", min_value=0, value=10)
-                a22 = st.number_input("Celda (2,2)", min_value=0, value=40)
-
-            tabla = np.array([[a11, a12],
-                            [a21, a22]])
-
-            chi2_stat, p_val, dof, expected = chi2_contingency(tabla)
-
-            st.write(f"Estadístico Chi-cuadrado: **{chi2_stat:.3f}**")
-            st.write(f"Grados de libertad: **{dof}**")
-            st.write(f"p-valor: **{p_val:.4f}**")
-
-            alpha = st.slider("Nivel de significancia (α)", 0.01, 0.10, 0.05)
+            entrada = st.radio("Datos de entrada:",
+                               ["Tabla 2×2", "Tabla r×c editable", "Columnas categóricas (archivo)",
+                                "Lote de tablas 2×2 (Fisher)"],
+                               horizontal=True)
+
+            tabla = None
+            if entrada == "Tabla 2×2":
+                st.write("Introduce la tabla de contingencia:")
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.write("Grupo A")
+                    a11 = st.number_input("Celda (1,1)", min_value=0, value=30)
+                    a12 = st.number_input("Celda (1,2)", min_value=0, value=20)
+                with col2:
+                    st.write("Grupo B")
+                    a21 = st.number_input("Celda (2,1)", min_value=0, value=10)
+                    a22 = st.number_input("Celda (2,2)", min_value=0, value=40)
+
+                tabla = np.array([[a11, a12],
+                                [a21, a22]])
+
+            elif entrada == "Tabla r×c editable":
+                st.write("Elige el número de filas y columnas y edita los conteos de la tabla.")
+                col1, col2 = st.columns(2)
+                filas = int(col1.number_input("Filas:", min_value=2, max_value=50, value=2, key="chi2_rxc_filas"))
+                columnas = int(col2.number_input("Columnas:", min_value=2, max_value=50, value=3,
+                                                 key="chi2_rxc_columnas"))
+                # Tabla nueva con la forma elegida; el ejemplo ocupa la esquina superior izquierda
+                inicial = np.full((filas, columnas), 10)
+                ejemplo = np.array([[30, 20, 15], [10, 40, 25]])
+                inicial[:min(filas, 2), :min(columnas, 3)] = ejemplo[:filas, :columnas]
+                editada = st.data_editor(
+                    pd.DataFrame(inicial, index=[f"Fila {i}" for i in range(1, filas + 1)],
+                                 columns=[f"Col {j}" for j in range(1, columnas + 1)]),
+                    key=f"chi2_tabla_rxc_{filas}x{columnas}",
+                )
+                tabla = editada.fillna(0).to_numpy(dtype=float)
+                if tabla.shape[0] < 2 or tabla.shape[1] < 2 or (tabla < 0).any():
+                    st.error("La tabla debe tener al menos 2 filas y 2 columnas con conteos no negativos.")
+                    tabla = None
+
+            elif entrada == "Lote de tablas 2×2 (Fisher)":
+                _lote_fisher()
 
-            if p_val < alpha:
-                st.success("Se rechaza la hipótesis de independencia (hay asociación entre variables).")
             else:
-                st.info("No se rechaza la hipótesis de independencia (las variables parecen independientes).")
-
-            st.write("Tabla esperada bajo independencia:")
-            st.write(expected)
+                st.write("Cada fila del archivo es una observación; se cruzan dos columnas categóricas.")
+                fuente = componentes.fuente_de_datos("chi2_archivo")
+                if fuente is not None:
+                    try:
+                        columnas = ingesta.columnas_disponibles(fuente)
+                    except (ValueError, ImportError) as e:
+                        st.error(str(e))
+                        return
+                    columna_a = st.selectbox("Variable 1:", columnas, key="chi2_col_a")
+                    columna_b = st.selectbox("Variable 2:", columnas, index=min(1, len(columnas) - 1), key="chi2_col_b")
+                    # El conteo recorre todo el archivo: corre en segundo plano y muestra su avance
+                    # El resultado solo vale para el archivo y las columnas con que se lanzó
+                    seleccion = (componentes.identidad_fuente(fuente), columna_a, columna_b)
+                    if st.button("Construir tabla de contingencia", key="chi2_construir"):
+                        componentes.lanzar_trabajo("chi2_pares", ingesta.contar_pares, fuente, columna_a, columna_b,
+                                                   descripcion="Contando pares por bloques", forzar=True)
+                        st.session_state["chi2_pares_seleccion"] = seleccion
+                    pares = None
+                    if st.session_state.get("chi2_pares_seleccion") != seleccion:
+                        st.info("Pulsa «Construir tabla de contingencia» para contar los pares de este archivo "
+                                "con estas columnas.")
+                    else:
+                        pares = componentes.seguir_trabajo("chi2_pares", _filas_leidas, relanzable=False)
+                    if pares is not None:
+                        niveles_a, niveles_b, tabla = pares
+                        st.write(f"Tabla de {len(niveles_a):,} × {len(niveles_b):,} niveles "
+                                 f"con {tabla.nnz:,} celdas no nulas.")
+
+            if tabla is not None:
+                with instrumentacion.seccion("calculo"):
+                    resultado = inferencia.chi2_independencia(tabla)
+                chi2_stat = resultado["estadistico"]
+                p_val = resultado["p_valor"]
+                dof = resultado["dof"]
+
+                st.write(f"Estadístico Chi-cuadrado: **{chi2_stat:.3f}**")
+                st.write(f"Grados de libertad: **{dof}**")
+                st.write(f"p-valor: **{p_val:.4f}**")
+
+                alpha = st.slider("Nivel de significancia (α)", 0.01, 0.10, 0.05)
+
+                if p_val < alpha:
+                    st.success("Se rechaza la hipótesis de independencia (hay asociación entre variables).")
+                else:
+                    st.info("No se rechaza la hipótesis de independencia (las variables parecen independientes).")
+
+                if isinstance(tabla, np.ndarray) and tabla.shape == (2, 2) and np.all(tabla == np.round(tabla)):
+                    # Con conteos pequeños la aproximación chi-cuadrado no es fiable: la exacta de Fisher sí
+                    fisher = exactas.fisher_exacta(tabla, alpha)
+                    metodo = "exacta" if fisher["exacta"] else "aproximada con χ² (márgenes muy grandes)"
+                    st.write(f"Prueba de Fisher ({metodo}): odds ratio **{fisher['odds_ratio']:.3f}**, "
+                             f"p-valor **{exactas.formatear_p(fisher['p_valor'], fisher['log10_p'])}** → "
+                             + ("se rechaza" if fisher["rechazo"] else "no se rechaza") + " la independencia.")
+
+                if "esperados" in resultado:
+                    st.write("Tabla esperada bajo independencia:")
+                    st.write(resultado["esperados"])
+                else:
+                    # Tabla dispersa: no se materializan los esperados, solo el mínimo
+                    st.write(f"Menor frecuencia esperada: **{resultado['esperado_minimo']:.3f}**")
+                    if resultado["esperado_minimo"] < 5:
+                        st.warning("Hay celdas con frecuencia esperada menor que 5: la aproximación chi-cuadrado puede no ser fiable.")
 
         else:  # Bondad de ajuste
             st.write("Introduce los valores observados y esperados:")
 
-            obs_str = st.text_area("Valores observados (separados por coma)", "30, 10, 20, 40")
-            exp_str = st.text_area("Valores esperados (separados por coma)", "25, 15, 25, 35")
+            obs_str = st.text_area("Valores observados (separados por coma, espacio o salto de línea)", "30, 10, 20, 40")
+            exp_str = st.text_area("Valores esperados (separados por coma, espacio o salto de línea)", "25, 15, 25, 35")
 
             try:
-                observados = np.array([float(x.strip()) for x in obs_str.split(",")])
-                esperados = np.array([float(x.strip()) for x in exp_str.split(",")])
+                observados = ingesta.parsear_numeros(obs_str)
+                esperados = ingesta.parsear_numeros(exp_str)
 
                 if len(observados) != len(esperados):
                     st.error("Los vectores de observados y esperados deben tener la misma longitud.")
                 else:
-                    chi2_stat = np.sum((observados - esperados) ** 2 / esperados)
-                    dof = len(observados) - 1
-                    p_val = 1 - chi2.cdf(chi2_stat, dof)
+                    resultado = inferencia.chi2_bondad(observados, esperados)
+                    chi2_stat = resultado["estadistico"]
+                    dof = resultado["dof"]
+                    p_val = resultado["p_valor"]
 
                     st.write(f"Estadístico Chi-cuadrado: **{chi2_stat:.3f}**")
                     st.write(f"Grados de libertad: **{dof}**")
@@ -227,54 +343,522 @@ def run():
         \]
         """)
 
+        _anova()
+
+    elif opcion == "Tamaño de muestra para proporciones":
+        st.subheader("Tamaño de muestra para una proporción")
+        st.write("""
+        El n mínimo para que la prueba Z de una proporción detecte una proporción real p₁ frente a
+        la hipotética p₀, o para estimar p con un margen de error dado.
+        """)
+
+        st.markdown("#### Por potencia")
+        p0 = st.number_input("Proporción bajo H₀ (p₀):", min_value=0.01, max_value=0.99, value=0.5, key="b4_tam_p0")
+        componentes.tabla_tamanos(
+            "b4_tam", "Proporción real (p₁)", 0.01, 0.99, (0.55, 0.75),
+            lambda p1, alphas, objetivo, cola: potencia.n_proporcion(p0, p1, alphas, objetivo, cola),
+        )
+
+        st.markdown("#### Por margen de error")
+        col1, col2, col3 = st.columns(3)
+        p_previa = col1.number_input("Proporción esperada (0.5 si no se sabe):", min_value=0.01, max_value=0.99,
+                                     value=0.5, key="b4_tam_p")
+        margen = col2.number_input("Margen de error máximo (E):", min_value=0.001, max_value=0.5, value=0.03,
+                                   format="%.3f", key="b4_tam_margen")
+        confianza = col3.slider("Nivel de confianza (%):", 80, 99, 95, key="b4_tam_confianza") / 100
+        n_margen = potencia.n_margen_proporcion(p_previa, margen, confianza)
+        st.success(f"Se necesitan al menos **n = {n_margen:,.0f}** observaciones.")
+
+
+@instrumentacion.fragmento
+def _monitoreo_secuencial():
+    # Cada lote nuevo solo vuelve a ejecutar este fragmento
+    col1, col2 = st.columns(2)
+    with col1:
+        p0 = st.number_input("Proporción bajo H₀ (p₀):", min_value=0.01, max_value=0.99, value=0.5,
+                             key="b4_sec_p0")
+        alpha = st.slider("Nivel de significancia (α):", 0.01, 0.10, 0.05, key="b4_sec_alpha")
+        cola = st.selectbox("Tipo de prueba:", inferencia.TIPOS_COLA, key="b4_sec_cola")
+    with col2:
+        frontera = st.selectbox("Frontera:", secuencial.FRONTERAS, key="b4_sec_frontera")
+        if frontera == secuencial.FRONTERA_MSPRT:
+            parametro = st.number_input("Escala del efecto esperado (τ):", min_value=0.001, max_value=0.5,
+                                        value=0.05, format="%.3f", key="b4_sec_tau")
+        else:
+            parametro = st.number_input("n máximo planificado:", min_value=10, value=10_000, step=100,
+                                        key="b4_sec_nmax")
+
+    configuracion = (p0, alpha, cola, frontera, parametro)
+    if (st.session_state.get("b4_sec_configuracion") != configuracion
+            or st.button("Reiniciar monitoreo", key="b4_sec_reiniciar")):
+        opciones = {"tau": parametro} if frontera == secuencial.FRONTERA_MSPRT else {"n_max": parametro}
+        st.session_state["b4_sec_estado"] = secuencial.estado_inicial(p0, alpha, cola, frontera, **opciones)
+        st.session_state["b4_sec_configuracion"] = configuracion
+        st.session_state["b4_sec_posicion"] = 0
+
+    origenes = ["Añadir a mano", "Simular lotes"]
+    if componentes.rutas_habilitadas():
+        origenes.append("Seguir un archivo local")
+    origen = st.radio("Origen de los lotes:", origenes, horizontal=True, key="b4_sec_origen")
+    exitos_nuevos = n_nuevos = None
+    if origen == "Añadir a mano":
+        col1, col2 = st.columns(2)
+        exitos_lote = col1.number_input("Éxitos del lote:", min_value=0, value=55, key="b4_sec_exitos")
+        n_lote = col2.number_input("Tamaño del lote:", min_value=1, value=100, key="b4_sec_n")
+        if st.button("Añadir lote", key="b4_sec_anadir"):
+            exitos_nuevos, n_nuevos = exitos_lote, n_lote
+    elif origen == "Simular lotes":
+        col1, col2, col3 = st.columns(3)
+        p_real = col1.slider("Proporción real:", 0.01, 0.99, 0.55, key="b4_sec_p_real")
+        n_lote = col2.number_input("Tamaño de cada lote:", min_value=1, value=100, key="b4_sec_n_sim")
+        cantidad = col3.number_input("Lotes a simular:", min_value=1, max_value=100_000, value=20,
+                                     key="b4_sec_cantidad")
+        if st.button("Simular lotes", key="b4_sec_simular"):
+            n_nuevos = np.full(int(cantidad), n_lote)
+            exitos_nuevos = componentes.generador_sesion().binomial(n_lote, p_real, int(cantidad))
+    else:
+        st.caption("Una línea por lote con `éxitos,n`. Solo se leen las líneas añadidas desde la última lectura.")
+        ruta = st.text_input("Ruta del archivo (dentro del directorio de datos):", key="b4_sec_ruta")
+        ruta_datos = None
+        if ruta and st.button("Leer lotes nuevos", key="b4_sec_leer"):
+            ruta_datos = componentes.resolver_ruta(ruta)
+        if ruta_datos is not None:
+            try:
+                lineas, st.session_state["b4_sec_posicion"] = ingesta.leer_nuevas_lineas(
+                    ruta_datos, st.session_state["b4_sec_posicion"])
+                exitos_nuevos, n_nuevos = secuencial.parsear_lotes(lineas)
+            except (OSError, ValueError) as e:
+                st.error(str(e))
+            else:
+                st.caption(f"{len(n_nuevos)} lotes nuevos leídos.")
+
+    if n_nuevos is not None:
+        try:
+            st.session_state["b4_sec_estado"] = secuencial.actualizar(st.session_state["b4_sec_estado"],
+                                                                     exitos_nuevos, n_nuevos)
+        except ValueError as e:
+            st.error(str(e))
+
+    estado = st.session_state["b4_sec_estado"]
+    if estado["n"] == 0:
+        st.info("Todavía no hay datos: añade, simula o lee un lote.")
+    else:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("n acumulado", f"{estado['n']:,}")
+        col2.metric("Proporción observada", f"{estado['exitos'] / estado['n']:.4f}")
+        col3.metric("Lotes", f"{estado['lotes']:,}")
+        st.write(f"Estadístico Z: **{estado['estadistico']:.3f}**; frontera actual: **±{estado['limite']:.3f}**")
+        st.write(f"p-valor clásico (no válido con miradas repetidas): {estado['p_valor']:.4f}")
+        if frontera == secuencial.FRONTERA_MSPRT:
+            p_valido = estado["p_siempre_valido"]
+            st.write("p-valor siempre válido: **" + ("< 0.0001" if p_valido < 1e-4 else f"{p_valido:.4f}") + "**")
+        if estado["rechazo"]:
+            st.success(f"Se rechaza H₀: la frontera se cruzó con n = {estado['n_rechazo']:,}.")
+        else:
+            st.info("Aún no se cruza la frontera: se puede seguir recogiendo datos.")
+
+        _, n_acum, z, limite = secuencial.trayectoria(estado)
+        fig, ax = graficos.subplots("b4_secuencial", figsize=(8, 4))
+        ax.plot(n_acum, z, color="black", label="Z acumulado")
+        if estado["codigo"] >= 0:
+            ax.plot(n_acum, limite, color="red", linestyle="--", label="Frontera de rechazo")
+        if estado["codigo"] <= 0:
+            ax.plot(n_acum, -limite, color="red", linestyle="--")
+        critico = inferencia.valor_critico(alpha, cola)
+        ax.axhline(critico, color="gray", linestyle=":", label="Valor crítico fijo (una sola mirada)")
+        if cola == inferencia.DOS_COLAS:
+            ax.axhline(-critico, color="gray", linestyle=":")
+        ax.set_ylim(-max(6, abs(estado["estadistico"]) + 1), max(6, abs(estado["estadistico"]) + 1))
+        ax.set_xlabel("n acumulado")
+        ax.set_ylabel("Z")
+        ax.set_title("Trayectoria del estadístico Z")
+        ax.legend()
+        graficos.mostrar(fig)
+        st.caption(f"El gráfico guarda como mucho {estado['capacidad']} puntos "
+                   f"(ahora uno de cada {estado['paso']} lotes).")
+
+
+@instrumentacion.fragmento
+def _anova():
+    # Datos → estadístico F. Es un fragmento: editar los grupos solo vuelve a
+    # ejecutar esta función, no la barra lateral ni el resto de la página
+    modo_anova = st.radio("Formato de los datos:",
+                          ["Datos por grupo", "Resúmenes por grupo (n, media, desviación)",
+                           "Factorial (dos o más factores)"],
+                          horizontal=True)
+    if modo_anova == "Factorial (dos o más factores)":
+        _anova_factorial()
+        return
+
+    resultado = None
+    if modo_anova == "Datos por grupo":
         # Número de grupos
         k = st.number_input("Número de grupos", min_value=2, max_value=10, value=3)
 
         data = []
         for i in range(1, k+1):
-            grupo = st.text_area(f"Datos del grupo {i} (separados por coma)", key=f"grupo_{i}", value="12,15,14,10,13")
+            grupo = st.text_area(f"Datos del grupo {i} (separados por coma, espacio o salto de línea)", key=f"grupo_{i}", value="12,15,14,10,13")
             try:
-                valores = [float(x.strip()) for x in grupo.split(",") if x.strip() != '']
-                data.append(valores)
-            except:
-                st.error(f"Error al procesar datos del grupo {i}")
+                data.append(ingesta.parsear_numeros(grupo))
+            except ValueError as e:
+                st.error(f"Error al procesar datos del grupo {i}: {e}")
 
         # Solo hacer cálculo si todos los grupos tienen datos
-        if all(len(g) > 0 for g in data):
-            # Calcular ANOVA one-way manualmente
-            N = sum(len(g) for g in data)
-            k = len(data)
-            # Media global
-            all_data = [item for sublist in data for item in sublist]
-            media_global = np.mean(all_data)
-
-            # Suma de cuadrados entre grupos
-            ss_between = sum(len(g) * (np.mean(g) - media_global) ** 2 for g in data)
-            # Suma de cuadrados dentro de grupos
-            ss_within = sum(sum((x - np.mean(g)) ** 2 for x in g) for g in data)
-
-            df_between = k - 1
-            df_within = N - k
-
-            ms_between = ss_between / df_between
-            ms_within = ss_within / df_within
-
-            F = ms_between / ms_within
-
-            # p-valor
-            p_val = 1 - f.cdf(F, df_between, df_within)
-
-            st.write(f"Estadístico F: **{F:.3f}**")
-            st.write(f"Grados de libertad entre grupos: {df_between}")
-            st.write(f"Grados de libertad dentro de grupos: {df_within}")
-            st.write(f"p-valor: **{p_val:.4f}**")
-
-            alpha = st.slider("Nivel de significancia (α)", 0.01, 0.10, 0.05, key="anova_alpha")
+        if len(data) == k and all(len(g) > 0 for g in data):
+            # Formato largo: un arreglo de valores y otro con el grupo de cada valor
+            with instrumentacion.seccion("calculo"):
+                valores = np.concatenate(data)
+                grupos = np.repeat(np.arange(k), [len(g) for g in data])
+                resultado = inferencia.anova_un_factor(valores, grupos)
+            resultado["grupos"] = [f"Grupo {i}" for i in range(1, k + 1)]
+
+    else:
+        desde_archivo = componentes.cargar_grupos("anova_archivo")
+        st.write("Una fila por grupo; puedes añadir tantas filas como grupos tengas.")
+        # La clave depende del contenido cargado para que el editor se reinicie con
+        # datos nuevos y se conserve entre reruns mientras sean los mismos
+        if desde_archivo is None:
+            inicial = pd.DataFrame({"n": [5, 5, 5], "media": [12.8, 12.8, 12.8], "desviacion": [1.92, 1.92, 1.92]})
+            clave_editor = "anova_resumen_manual"
+        else:
+            inicial = desde_archivo
+            contenido = pd.util.hash_pandas_object(desde_archivo, index=False).to_numpy().tobytes()
+            clave_editor = f"anova_resumen_{hashlib.blake2b(contenido, digest_size=8).hexdigest()}"
+        resumen = st.data_editor(inicial, num_rows="dynamic", key=clave_editor).dropna()
 
-            if p_val < alpha:
-                st.success("Se rechaza la hipótesis nula: al menos un grupo tiene media diferente.")
+        if len(resumen) < 2 or (resumen["n"] < 1).any():
+            st.error("Se necesitan al menos 2 grupos, cada uno con n ≥ 1.")
+        else:
+            n = resumen["n"].to_numpy(dtype=float)
+            medias = resumen["media"].to_numpy(dtype=float)
+            varianzas = resumen["desviacion"].to_numpy(dtype=float) ** 2
+            with instrumentacion.seccion("calculo"):
+                resultado = inferencia.anova_resumen(n, medias, varianzas)
+            if "grupo" in resumen.columns:
+                grupos = resumen["grupo"].astype(str).tolist()
             else:
-                st.info("No se rechaza la hipótesis nula: no hay evidencia suficiente para decir que las medias difieren.")
-
-
-
+                grupos = [f"Grupo {i}" for i in range(1, len(resumen) + 1)]
+            resultado.update(n=n, medias=medias, varianzas=varianzas, grupos=grupos)
+
+    if resultado is not None:
+        _decision_anova(resultado)
+
+
+def _filas_leidas(parcial):
+    # Resultado parcial de una lectura por bloques en segundo plano
+    st.caption(f"{parcial['filas']:,} filas leídas, {parcial['celdas']:,} celdas distintas por ahora.")
+
+
+@instrumentacion.fragmento
+def _anova_factorial():
+    # Formato largo (valor + factores) → resúmenes por celda → tabla ANOVA.
+    # Los datos se reducen a (n, media, M2) por celda antes de ajustar el modelo
+    st.write("""
+    Con dos o más factores el ANOVA separa la variabilidad en **efectos principales** (cada factor por separado)
+    e **interacciones** (el efecto de un factor cambia según el nivel de otro).
+
+    - **Tipo I (secuencial):** cada término se evalúa después de los anteriores; el resultado depende del orden de los factores.
+    - **Tipo II:** cada término se evalúa después de todos los que no lo contienen; no depende del orden
+      y es la opción habitual cuando los grupos tienen tamaños distintos.
+    """)
+
+    with st.expander("📂 Cargar datos en formato largo desde archivo"):
+        st.caption("Una fila por observación: una columna numérica con el valor y una columna por factor.")
+        fuente = componentes.fuente_de_datos("anova_factorial")
+    if fuente is not None:
+        try:
+            columnas = ingesta.columnas_disponibles(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+    else:
+        generador = np.random.default_rng(7)
+        fertilizante = np.repeat(["A", "B", "C"], 8)
+        riego = np.tile(np.repeat(["bajo", "alto"], 4), 3)
+        rendimiento = (20 + 3 * (fertilizante == "B") + 5 * (fertilizante == "C") + 4 * (riego == "alto")
+                       + 3 * ((fertilizante == "C") & (riego == "alto")) + generador.normal(0, 2, 24))
+        componentes.inicializar({"anova_factorial_ejemplo": pd.DataFrame({
+            "fertilizante": fertilizante, "riego": riego, "rendimiento": rendimiento.round(1),
+        })})
+        datos = st.data_editor(st.session_state["anova_factorial_ejemplo"], num_rows="dynamic",
+                               key="anova_factorial_tabla")
+        columnas = list(datos.columns)
+
+    col1, col2 = st.columns(2)
+    valor = col1.selectbox("Columna con los valores:", columnas, index=len(columnas) - 1,
+                           key="anova_factorial_valor")
+    factores = col2.multiselect("Factores (en orden):", [c for c in columnas if c != valor],
+                                default=[c for c in columnas if c != valor][:2], key="anova_factorial_factores")
+    if len(factores) < 2:
+        st.info("Elige al menos dos factores.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    tipo = col1.radio("Suma de cuadrados:", inferencia.TIPOS_SS, index=1, key="anova_factorial_tipo")
+    interacciones = col2.checkbox("Incluir interacciones", value=True, key="anova_factorial_interacciones")
+    alpha = col3.slider("Nivel de significancia (α)", 0.01, 0.10, 0.05, key="anova_factorial_alpha")
+
+    if fuente is not None:
+        # El archivo se resume una vez (una pasada por bloques); cambiar α, el
+        # tipo de SC o las interacciones reutiliza los resúmenes por celda. Los
+        # resúmenes solo valen para el archivo y las columnas con que se lanzaron
+        seleccion = (componentes.identidad_fuente(fuente), valor, factores)
+        if st.button("Calcular resúmenes por celda", key="anova_factorial_calcular"):
+            componentes.lanzar_trabajo("anova_factorial_resumenes", ingesta.resumir_por_celdas, fuente, valor,
+                                       factores, descripcion="Resumiendo el archivo por celdas", forzar=True)
+            st.session_state["anova_factorial_columnas"] = seleccion
+        if st.session_state.get("anova_factorial_columnas") != seleccion:
+            st.info("Pulsa «Calcular resúmenes por celda» para leer el archivo con estas columnas.")
+            return
+        resumenes = componentes.seguir_trabajo("anova_factorial_resumenes", _filas_leidas, relanzable=False)
+        if resumenes is None:
+            return
+        niveles, celdas, n, medias, m2 = resumenes
+    else:
+        datos = datos.dropna(subset=[valor] + factores)
+        try:
+            with instrumentacion.seccion("calculo"):
+                niveles, celdas, n, medias, m2 = inferencia.resumen_celdas(
+                    datos[valor].to_numpy(dtype=float), [datos[c].astype(str).to_numpy() for c in factores])
+        except ValueError as e:
+            st.error(str(e))
+            return
+
+    terminos = inferencia.terminos_factoriales(len(factores), None if interacciones else 1)
+    with instrumentacion.seccion("calculo"):
+        resultado = inferencia.anova_factorial_resumen(celdas, [len(v) for v in niveles], n, medias, m2,
+                                                       terminos, tipo, alpha)
+    if resultado["df_residual"] < 1:
+        st.error("No quedan grados de libertad para el error: hace falta más de una observación por celda.")
+        return
+
+    fuentes = [" × ".join(factores[f] for f in termino) for termino in terminos]
+    tabla = pd.DataFrame({
+        "Fuente": fuentes + ["Residual", "Total"],
+        "SC": np.append(resultado["ss"], [resultado["ss_residual"], resultado["ss_total"]]),
+        "gl": np.append(resultado["df"], [resultado["df_residual"], resultado["df_total"]]),
+        "CM": np.append(resultado["ms"], [resultado["ms_residual"], np.nan]),
+        "F": np.append(resultado["F"], [np.nan, np.nan]),
+        "p-valor": np.append(resultado["p_valor"], [np.nan, np.nan]),
+    })
+    st.dataframe(tabla, hide_index=True)
+    st.caption(f"{int(n.sum()):,} observaciones en {resultado['celdas']:,} celdas; "
+               f"matriz de diseño dispersa de {resultado['columnas']:,} columnas.")
+    if tipo == inferencia.SS_TIPO_I:
+        st.caption("Con tamaños de celda distintos, las SC de tipo I suman la SC del modelo pero dependen del orden.")
+
+    significativos = [fuente for fuente, rechazo in zip(fuentes, resultado["rechazo"]) if rechazo]
+    if significativos:
+        st.success("Términos significativos con α = " + f"{alpha:.2f}: " + ", ".join(significativos) + ".")
+    else:
+        st.info("Ningún término es significativo: no hay evidencia de efectos de los factores.")
+
+
+@instrumentacion.fragmento
+def _decision_anova(resultado):
+    # α → decisión: mover α no vuelve a leer los grupos ni a calcular F
+    F = resultado["F"]
+    df_between = resultado["df_between"]
+    df_within = resultado["df_within"]
+    p_val = resultado["p_valor"]
+
+    st.write(f"Estadístico F: **{F:.3f}**")
+    st.write(f"Grados de libertad entre grupos: {df_between}")
+    st.write(f"Grados de libertad dentro de grupos: {df_within:.0f}")
+    st.write(f"p-valor: **{p_val:.4f}**")
+
+    alpha = st.slider("Nivel de significancia (α)", 0.01, 0.10, 0.05, key="anova_alpha")
+
+    if p_val < alpha:
+        st.success("Se rechaza la hipótesis nula: al menos un grupo tiene media diferente.")
+        _comparaciones_posthoc(resultado, alpha)
+    else:
+        st.info("No se rechaza la hipótesis nula: no hay evidencia suficiente para decir que las medias difieren.")
+
+
+def _comparaciones_posthoc(resultado, alpha):
+    # ¿Qué grupos difieren? Todos los pares de una vez y un resumen con letras
+    st.subheader("Comparaciones post-hoc")
+    st.write("""
+    El ANOVA solo dice que **alguna** media es distinta. Las comparaciones post-hoc revisan cada par de grupos
+    controlando el error de tipo I del conjunto:
+
+    - **Tukey HSD:** rango studentizado con la varianza combinada; el estándar con varianzas parecidas.
+    - **Games-Howell:** rango studentizado con las varianzas de cada grupo y gl de Welch; no supone varianzas iguales.
+    - **Bonferroni:** pruebas t por pares con el p-valor multiplicado por el número de pares; más conservador.
+    """)
+    metodo = st.selectbox("Método:", posthoc.METODOS_POSTHOC, key="anova_posthoc")
+    n, medias = resultado["n"], resultado["medias"]
+    with instrumentacion.seccion("calculo"):
+        pares = posthoc.comparaciones_por_pares(n, medias, resultado["varianzas"], alpha, metodo)
+        letras = posthoc.letras_compactas(medias, pares["i"], pares["j"], pares["rechazo"])
+
+    grupos = np.asarray(resultado["grupos"])
+    tabla = pd.DataFrame({"grupo": grupos, "n": n, "media": medias, "letras": letras})
+    st.dataframe(tabla.sort_values("media", ascending=False), hide_index=True)
+    st.caption(f"{int(pares['rechazo'].sum()):,} de {len(pares['i']):,} pares difieren con α = {alpha:.2f}. "
+               "Dos grupos que comparten alguna letra no difieren significativamente.")
+    if metodo == "Games-Howell" and np.any(n < 2):
+        st.warning("Games-Howell necesita n ≥ 2 en cada grupo; los pares con grupos de un solo dato quedan sin p-valor.")
+
+    detalle = pd.DataFrame({
+        "grupo_1": grupos[pares["i"]],
+        "grupo_2": grupos[pares["j"]],
+        "diferencia": pares["diferencia"],
+        "estadistico": pares["estadistico"],
+        "gl": pares["df"],
+        "p_valor": pares["p_valor"],
+        "significativo": pares["rechazo"],
+    })
+    st.download_button("⬇️ Descargar todas las comparaciones (CSV)", detalle.to_csv(index=False).encode("utf-8"),
+                       file_name="comparaciones_posthoc.csv", mime="text/csv", key="anova_posthoc_descargar")
+
+
+@instrumentacion.fragmento
+def _lote_fisher():
+    # Muchas tablas 2×2 a la vez: una sola llamada vectorizada a la prueba de Fisher
+    st.write("""
+    Cada fila es una tabla 2×2 con celdas **a** (1,1), **b** (1,2), **c** (2,1) y **d** (2,2).
+    Se usa la prueba exacta de Fisher; solo si los márgenes son enormes se pasa a χ² con corrección de Yates.
+    """)
+    columnas = ["a", "b", "c", "d"]
+    with st.expander("📂 Cargar tablas desde archivo"):
+        st.caption("Columnas necesarias: a, b, c, d (y opcionalmente `nombre`).")
+        fuente = componentes.fuente_de_datos("b4_fisher")
+    if fuente is not None:
+        try:
+            lote = ingesta.leer_tabla(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+    else:
+        componentes.inicializar({"b4_fisher_ejemplo": pd.DataFrame({
+            "nombre": ["segmento 1", "segmento 2", "segmento 3"],
+            "a": [3, 12, 250], "b": [9, 5, 4800], "c": [10, 2, 180], "d": [4, 11, 4900],
+        })})
+        lote = st.data_editor(st.session_state["b4_fisher_ejemplo"], num_rows="dynamic", key="b4_fisher_tabla")
+
+    faltan = [c for c in columnas if c not in lote.columns]
+    if faltan:
+        st.error("Faltan columnas: " + ", ".join(faltan))
+        return
+    lote = lote.dropna(subset=columnas)
+
+    col1, col2, col3 = st.columns(3)
+    alpha = col1.slider("Nivel de significancia (α):", 1, 10, 5, key="b4_fisher_alpha") / 100
+    cola = col2.selectbox("Tipo de prueba:", inferencia.TIPOS_COLA, key="b4_fisher_cola")
+    correccion = col3.selectbox("Corrección por comparaciones múltiples:", inferencia.CORRECCIONES, index=2,
+                                key="b4_fisher_correccion")
+
+    tablas = lote[columnas].to_numpy(dtype=float).reshape(-1, 2, 2)
+    try:
+        with instrumentacion.seccion("calculo"):
+            resultado = exactas.fisher_exacta(tablas, alpha, cola)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    p_ajustado = inferencia.ajustar_p_valores(resultado["p_valor"], correccion)
+    nombres = lote["nombre"].astype(str) if "nombre" in lote.columns else pd.RangeIndex(1, len(lote) + 1)
+    salida = pd.DataFrame({
+        "nombre": np.asarray(nombres),
+        "odds_ratio": resultado["odds_ratio"],
+        "p_valor": resultado["p_valor"],
+        "log10_p": resultado["log10_p"],
+        "p_ajustado": p_ajustado,
+        "metodo": np.where(resultado["exacta"], "exacta", "chi2 Yates"),
+        "significativa": p_ajustado < alpha,
+    })
+    st.write(f"**{int(salida['significativa'].sum())}** de {len(salida)} tablas son significativas "
+             f"con α = {alpha:.2f} y corrección {correccion}.")
+    st.dataframe(salida, hide_index=True)
+    st.caption("`log10_p` sigue siendo exacto cuando el p-valor es tan pequeño que se muestra como 0.")
+    st.download_button("⬇️ Descargar resultados (CSV)", salida.to_csv(index=False).encode("utf-8"),
+                       file_name="fisher_lote.csv", mime="text/csv", key="b4_fisher_descargar")
+
+
+MAX_FILAS_FOREST = 60
+
+
+@instrumentacion.fragmento
+def _ic_proporciones():
+    # Segmentos → intervalos (una llamada vectorizada) → tabla y forest plot
+    st.subheader("Intervalos de confianza para proporciones por segmento")
+    st.write("""
+    Cada fila es un segmento con sus éxitos y su tamaño. Todos los intervalos se calculan de una vez:
+
+    - **Wald:** p̂ ± z·√(p̂(1-p̂)/n). Sencillo, pero falla con n pequeño o p̂ cerca de 0 o 1.
+    - **Wilson:** invierte la prueba Z con el error estándar bajo H₀; buen comportamiento en general.
+    - **Agresti-Coull:** Wald después de sumar z²/2 éxitos y z²/2 fracasos.
+    - **Clopper-Pearson:** exacto, a partir de cuantiles de la distribución beta; es conservador.
+    """)
+
+    columnas = ["exitos", "n"]
+    with st.expander("📂 Cargar segmentos desde archivo"):
+        st.caption("Columnas necesarias: exitos, n (y opcionalmente `segmento`).")
+        fuente = componentes.fuente_de_datos("b4_ic_prop")
+    if fuente is not None:
+        try:
+            segmentos = ingesta.leer_tabla(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+    else:
+        componentes.inicializar({"b4_ic_prop_ejemplo": pd.DataFrame({
+            "segmento": ["móvil", "escritorio", "tableta", "app"],
+            "exitos": [120, 340, 4, 58], "n": [1500, 2900, 35, 410],
+        })})
+        segmentos = st.data_editor(st.session_state["b4_ic_prop_ejemplo"], num_rows="dynamic",
+                                   key="b4_ic_prop_tabla")
+
+    faltan = [c for c in columnas if c not in segmentos.columns]
+    if faltan:
+        st.error("Faltan columnas: " + ", ".join(faltan))
+        return
+    segmentos = segmentos.dropna(subset=columnas)
+    exitos = segmentos["exitos"].to_numpy(dtype=float)
+    n = segmentos["n"].to_numpy(dtype=float)
+    if len(n) == 0 or np.any(n < 1) or np.any((exitos < 0) | (exitos > n)):
+        st.error("Cada segmento necesita n ≥ 1 y 0 ≤ éxitos ≤ n.")
+        return
+
+    col1, col2 = st.columns(2)
+    confianza = col1.slider("Nivel de confianza (%):", 80, 99, 95, key="b4_ic_prop_confianza") / 100
+    metodo = col2.selectbox("Método:", inferencia.METODOS_IC_PROPORCION, index=1, key="b4_ic_prop_metodo")
+
+    with instrumentacion.seccion("calculo"):
+        resultado = inferencia.ic_proporcion(exitos, n, confianza, metodo)
+    nombres = segmentos["segmento"].astype(str) if "segmento" in segmentos.columns else pd.RangeIndex(1, len(n) + 1)
+    salida = pd.DataFrame({
+        "segmento": np.asarray(nombres),
+        "exitos": exitos,
+        "n": n,
+        "p_hat": resultado["p_hat"],
+        "limite_inferior": resultado["limite_inferior"],
+        "limite_superior": resultado["limite_superior"],
+        "ancho": resultado["ancho"],
+    })
+    st.dataframe(salida, hide_index=True)
+    st.download_button("⬇️ Descargar intervalos (CSV)", salida.to_csv(index=False).encode("utf-8"),
+                       file_name="intervalos_proporciones.csv", mime="text/csv", key="b4_ic_prop_descargar")
+
+    # Forest plot ordenado por p̂; con demasiadas filas se dibuja una muestra
+    # equiespaciada en ese orden, que conserva la forma de la distribución
+    orden = np.argsort(salida["p_hat"].to_numpy(), kind="stable")
+    if len(orden) > MAX_FILAS_FOREST:
+        orden = orden[np.linspace(0, len(orden) - 1, MAX_FILAS_FOREST).round().astype(int)]
+    filas = salida.iloc[orden]
+    posiciones = np.arange(len(filas))
+    fig, ax = graficos.subplots("b4_forest", figsize=(8, max(3, 0.22 * len(filas) + 1)))
+    ax.hlines(posiciones, filas["limite_inferior"], filas["limite_superior"], color="steelblue")
+    ax.plot(filas["p_hat"], posiciones, "o", color="black", markersize=3)
+    ax.axvline(exitos.sum() / n.sum(), color="gray", linestyle=":", label="Proporción global")
+    ax.set_yticks(posiciones)
+    ax.set_yticklabels(filas["segmento"], fontsize=7)
+    ax.set_xlim(0, 1)
+    ax.set_xlabel("Proporción")
+    ax.set_title(f"Intervalos {metodo} al {confianza:.0%}")
+    ax.legend(loc="lower right")
+    graficos.mostrar(fig)
+    if len(salida) > MAX_FILAS_FOREST:
+        st.caption(f"Se dibujan {MAX_FILAS_FOREST} de {len(salida):,} segmentos, repartidos uniformemente "
+                   "en el orden de p̂; la tabla y el CSV tienen todos.")
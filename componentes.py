@@ -0,0 +1,318 @@
+import io
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import inferencia
+import ingesta
+import instrumentacion
+import trabajos
+
+# Componentes de interfaz compartidos por varias páginas.
+#
+# pandas se importa solo en las funciones que lo usan (como en ingesta): las
+# páginas que solo usan la semilla o los trabajos no lo cargan al arrancar.
+
+# Directorio del servidor del que se pueden leer archivos por ruta. Sin él la
+# app solo acepta archivos subidos: una ruta escrita por el visitante nunca
+# puede salir de este directorio.
+DIRECTORIO_DATOS = os.environ.get("APP_DATOS")
+
+
+def inicializar(valores):
+    """Valores por defecto de widgets con `key`, sin pisar lo que ya haya en la sesión."""
+    for clave, valor in valores.items():
+        if clave not in st.session_state:
+            st.session_state[clave] = valor
+
+
+def generador_sesion():
+    """`np.random.Generator` propio de la sesión, creado con semilla aleatoria la primera vez."""
+    if "_generador_sesion" not in st.session_state:
+        st.session_state["_generador_sesion"] = np.random.default_rng()
+    return st.session_state["_generador_sesion"]
+
+
+def controles_semilla(clave):
+    """Campo de semilla y botón para sortear otra con el generador de la sesión; devuelve la semilla."""
+    inicializar({clave: int(generador_sesion().integers(2**31))})
+
+    def sortear():
+        st.session_state[clave] = int(generador_sesion().integers(2**31))
+
+    col1, col2 = st.columns([3, 1])
+    semilla = col1.number_input("Semilla:", min_value=0, max_value=2**31 - 1, step=1, key=clave)
+    col2.button("🎲 Nueva semilla", key=f"{clave}_sortear", on_click=sortear)
+    return int(semilla)
+
+
+def rutas_habilitadas():
+    return DIRECTORIO_DATOS is not None
+
+
+def resolver_ruta(ruta):
+    """Ruta absoluta de `ruta` dentro de DIRECTORIO_DATOS, o None (con el error en pantalla)."""
+    if not rutas_habilitadas():
+        st.error("La lectura de archivos del servidor no está habilitada (variable APP_DATOS).")
+        return None
+    base = Path(DIRECTORIO_DATOS).resolve()
+    destino = (base / ruta).resolve()
+    if destino != base and base not in destino.parents:
+        st.error(f"La ruta debe estar dentro de {base}.")
+        return None
+    if not destino.is_file():
+        st.error(f"No existe el archivo: {ruta}")
+        return None
+    return str(destino)
+
+
+def fuente_de_datos(clave):
+    """Devuelve un archivo subido, una ruta del directorio de datos o None si aún no se eligió nada."""
+    origenes = ["Subir archivo", "Ruta en el servidor"] if rutas_habilitadas() else ["Subir archivo"]
+    origen = st.radio("Origen de los datos:", origenes, horizontal=True, key=f"{clave}_origen")
+    if origen == "Subir archivo":
+        return st.file_uploader("Archivo CSV, Parquet o .npy", type=["csv", "parquet", "npy"],
+                                key=f"{clave}_archivo")
+
+    st.caption("Para extractos grandes: el archivo se lee por bloques (y los .npy con memmap) sin cargarlo entero. "
+               f"Las rutas son relativas a {Path(DIRECTORIO_DATOS).resolve()}.")
+    ruta = st.text_input("Ruta del archivo", key=f"{clave}_ruta")
+    if not ruta:
+        return None
+    return resolver_ruta(ruta)
+
+
+def identidad_fuente(fuente):
+    """Identificador barato de la fuente (sin leer su contenido), para saber si cambió."""
+    if isinstance(fuente, str):
+        estado = Path(fuente).stat()
+        return (fuente, estado.st_size, estado.st_mtime_ns)
+    return (fuente.name, fuente.size, getattr(fuente, "file_id", None))
+
+
+def cargar_resumenes(clave, destinos):
+    """Resume columnas de un archivo y vuelca (n, media, desviación) en los widgets.
+
+    `destinos` es una lista de (etiqueta, clave_n, clave_media, clave_desv);
+    hay que llamarla antes de crear esos widgets.
+    """
+    with st.expander("📂 Cargar resumen desde archivo"):
+        fuente = fuente_de_datos(clave)
+        if fuente is None:
+            return
+        try:
+            columnas = ingesta.columnas_disponibles(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return
+
+        elegidas = [st.selectbox(f"Columna para {etiqueta}:", columnas, index=min(i, len(columnas) - 1),
+                                 key=f"{clave}_col_{i}")
+                    for i, (etiqueta, *_) in enumerate(destinos)]
+
+        if st.button("Calcular resumen", key=f"{clave}_calcular"):
+            with st.spinner("Leyendo el archivo por bloques..."):
+                resumenes = ingesta.resumir(fuente, list(dict.fromkeys(elegidas)))
+            for columna, (etiqueta, clave_n, clave_media, clave_desv) in zip(elegidas, destinos):
+                n, media, desv = resumenes[columna]
+                st.session_state[clave_n] = int(n)
+                st.session_state[clave_media] = float(media)
+                st.session_state[clave_desv] = float(desv)
+                st.write(f"{etiqueta} ({columna}): n = {n:,}, media = {media:.4f}, s = {desv:.4f}")
+
+
+def cargar_grupos(clave):
+    """Resume un archivo en formato largo (valor, grupo) y devuelve un DataFrame por grupo."""
+    with st.expander("📂 Cargar grupos desde archivo"):
+        fuente = fuente_de_datos(clave)
+        if fuente is None:
+            return None
+        try:
+            columnas = ingesta.columnas_disponibles(fuente)
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+            return None
+
+        valor = st.selectbox("Columna con los valores:", columnas, key=f"{clave}_valor")
+        grupo = st.selectbox("Columna con el grupo:", columnas, index=min(1, len(columnas) - 1),
+                             key=f"{clave}_grupo")
+        if st.button("Calcular resúmenes por grupo", key=f"{clave}_calcular"):
+            with st.spinner("Leyendo el archivo por bloques..."):
+                niveles, n, medias, desviaciones = ingesta.resumir_por_grupo(fuente, valor, grupo)
+            import pandas as pd
+
+            st.session_state[f"{clave}_resultado"] = pd.DataFrame(
+                {"grupo": niveles.astype(str), "n": n, "media": medias, "desviacion": desviaciones}
+            )
+    return st.session_state.get(f"{clave}_resultado")
+
+
+def cargar_columnas(clave, etiquetas):
+    """Lee columnas completas de un archivo y devuelve {etiqueta: arreglo sin NaN}, o None.
+
+    El archivo solo se lee al pulsar el botón; el resultado queda en la sesión.
+    """
+    with st.expander("📂 Cargar datos desde archivo"):
+        fuente = fuente_de_datos(clave)
+        if fuente is not None:
+            try:
+                columnas = ingesta.columnas_disponibles(fuente)
+            except (ValueError, ImportError) as e:
+                st.error(str(e))
+                columnas = None
+            if columnas:
+                elegidas = [st.selectbox(f"Columna para {etiqueta}:", columnas, index=min(i, len(columnas) - 1),
+                                         key=f"{clave}_col_{i}")
+                            for i, etiqueta in enumerate(etiquetas)]
+                if st.button("Cargar columnas", key=f"{clave}_cargar"):
+                    with st.spinner("Leyendo el archivo por bloques..."):
+                        partes = {c: [] for c in dict.fromkeys(elegidas)}
+                        for bloque in ingesta.leer_bloques(fuente, list(partes)):
+                            for c in partes:
+                                partes[c].append(np.asarray(bloque[c], dtype=float))
+                    datos = {}
+                    for etiqueta, columna in zip(etiquetas, elegidas):
+                        valores = np.concatenate(partes[columna]) if partes[columna] else np.empty(0)
+                        datos[etiqueta] = valores[~np.isnan(valores)]
+                    st.session_state[f"{clave}_resultado"] = datos
+
+        if st.session_state.get(f"{clave}_resultado") is not None:
+            if st.button("Descartar datos del archivo", key=f"{clave}_descartar"):
+                st.session_state[f"{clave}_resultado"] = None
+    return st.session_state.get(f"{clave}_resultado")
+
+
+def tabla_tamanos(clave, etiqueta_efecto, minimo, maximo, rango, resolver, paso=0.01):
+    """Tabla del n mínimo por tamaño del efecto (filas) y nivel α (columnas).
+
+    `resolver(efectos, alphas, objetivo, cola)` recibe arreglos que se combinan
+    por broadcasting y devuelve la matriz de n en una sola llamada.
+    """
+    col1, col2 = st.columns(2)
+    with col1:
+        objetivo = st.slider("Potencia objetivo (1 - β):", 0.5, 0.99, 0.8, 0.01, key=f"{clave}_objetivo")
+        alphas = st.multiselect("Niveles de significancia (α):", [0.01, 0.05, 0.10], default=[0.01, 0.05, 0.10],
+                                key=f"{clave}_alphas")
+    with col2:
+        cola = st.selectbox("Tipo de prueba:", inferencia.TIPOS_COLA, key=f"{clave}_cola")
+        desde, hasta = st.slider(etiqueta_efecto, minimo, maximo, rango, paso, key=f"{clave}_rango")
+        filas = st.number_input("Filas de la tabla:", min_value=2, max_value=200, value=10, key=f"{clave}_filas")
+    if not alphas:
+        st.warning("Elige al menos un nivel α.")
+        return None
+
+    alphas = sorted(alphas)
+    efectos = np.linspace(desde, hasta, int(filas))
+    with instrumentacion.seccion("calculo"):
+        n = resolver(efectos[:, None], np.array(alphas)[None, :], objetivo, cola)
+    import pandas as pd
+
+    tabla = pd.DataFrame(np.broadcast_to(n, (len(efectos), len(alphas))),
+                         index=pd.Index(np.round(efectos, 4), name=etiqueta_efecto),
+                         columns=[f"α = {a:.2f}" for a in alphas])
+    st.dataframe(tabla.style.format("{:,.0f}", na_rep="—"))
+    st.caption("— : la potencia objetivo no se alcanza (efecto nulo o en la dirección contraria a H₁).")
+    return tabla
+
+
+# Trabajos en segundo plano: la sesión guarda el manejador en session_state y
+# la página lo consulta. Si el trabajo termina enseguida se muestra como un
+# cálculo normal; si no, un fragmento se vuelve a ejecutar cada
+# INTERVALO_CONSULTA segundos con el progreso, los resultados parciales y un
+# botón para cancelar, y al terminar relanza la página.
+
+ESPERA_SINCRONA = 0.3
+INTERVALO_CONSULTA = 0.5
+
+
+def _id_sesion():
+    ctx = get_script_run_ctx()
+    return None if ctx is None else ctx.session_id
+
+
+def _independiente(valor):
+    # Un archivo subido se copia: el hilo del trabajo no comparte su cursor con la página
+    if hasattr(valor, "getvalue"):
+        copia = io.BytesIO(valor.getvalue())
+        copia.name = getattr(valor, "name", "")
+        return copia
+    return valor
+
+
+def lanzar_trabajo(clave, funcion, *args, descripcion="", forzar=False, **kwargs):
+    """Lanza (o reutiliza) `funcion` como trabajo y guarda el manejador en `st.session_state[clave]`.
+
+    Si la sesión tenía en esa clave otro trabajo (con otros parámetros), lo
+    suelta. Un cálculo que la sesión canceló no se relanza en cada rerun con
+    los mismos parámetros salvo con `forzar` (p. ej. desde un botón).
+    """
+    args = tuple(_independiente(a) for a in args)
+    huella = trabajos.huella(funcion, args, kwargs)
+    if not forzar and st.session_state.get(f"{clave}_cancelado") == huella:
+        return None
+    st.session_state.pop(f"{clave}_cancelado", None)
+    sesion = _id_sesion()
+    trabajo = trabajos.enviar(funcion, *args, interesado=sesion, descripcion=descripcion, clave=huella, **kwargs)
+    anterior = st.session_state.get(clave)
+    if anterior is not None and anterior is not trabajo:
+        trabajos.soltar(anterior, sesion)
+    st.session_state[clave] = trabajo
+    return trabajo
+
+
+def cancelar_trabajo(clave):
+    trabajo = st.session_state.pop(clave, None)
+    if trabajo is not None:
+        st.session_state[f"{clave}_cancelado"] = trabajo["clave"]
+        trabajos.soltar(trabajo, _id_sesion())
+
+
+def seguir_trabajo(clave, mostrar_parcial=None, relanzable=True):
+    """Resultado del trabajo de `clave`, o None mientras no haya terminado bien.
+
+    Mientras sigue en curso dibuja el progreso y, con `mostrar_parcial`, el
+    último resultado parcial; los errores y la cancelación se muestran aquí.
+    `relanzable` añade al aviso de cancelación un botón para volver a calcular
+    (para trabajos que la página lanza sola en cada rerun).
+    """
+    if f"{clave}_cancelado" in st.session_state:
+        st.info("Cálculo cancelado.")
+        if relanzable:
+            st.button("Volver a calcular", key=f"{clave}_reanudar",
+                      on_click=lambda: st.session_state.pop(f"{clave}_cancelado", None))
+        return None
+    trabajo = st.session_state.get(clave)
+    if trabajo is None:
+        return None
+    if not trabajos.esperar(trabajo, ESPERA_SINCRONA):
+        _progreso_trabajo(clave, mostrar_parcial)
+        return None
+    if trabajo["estado"] == trabajos.ERROR:
+        st.error(trabajo["error"])
+        return None
+    if trabajo["estado"] == trabajos.CANCELADO:
+        # Lo canceló otra sesión que lo compartía antes de que esta se uniera
+        st.session_state.pop(clave, None)
+        st.info("El cálculo se canceló; cambia algún parámetro o vuelve a lanzarlo.")
+        return None
+    return trabajo["resultado"]
+
+
+# Sin instrumentacion.fragmento: cada consulta periódica quedaría registrada como un rerun
+@st.fragment(run_every=INTERVALO_CONSULTA)
+def _progreso_trabajo(clave, mostrar_parcial):
+    trabajo = st.session_state.get(clave)
+    if trabajo is None or trabajos.terminado(trabajo):
+        st.rerun()
+    texto = f"{trabajo['descripcion'] or 'Calculando'} · {time.time() - trabajo['inicio']:.0f} s"
+    if trabajo["progreso"] is None:
+        st.caption(f"⏳ {texto}")
+    else:
+        st.progress(trabajo["progreso"], text=f"{texto} · {trabajo['progreso']:.0%}")
+    st.button("✖ Cancelar", key=f"{clave}_cancelar", on_click=cancelar_trabajo, args=(clave,))
+    if mostrar_parcial is not None and trabajo["parcial"] is not None:
+        mostrar_parcial(trabajo["parcial"])
@@ -0,0 +1,86 @@
+import threading
+
+import numpy as np
+
+# Curvas precalculadas de densidad (pdf) y de distribución acumulada (cdf) de
+# la normal estándar y de la t de Student con df = 1 … DF_MAX, sobre una misma
+# rejilla de x en [-X_MAX, X_MAX].
+#
+# Cada función se tabula una sola vez por proceso, la primera vez que se pide,
+# en una matriz (DF_MAX + 1, PUNTOS): la fila 0 es la normal y la fila df es la
+# t con esos grados de libertad. Las matrices son de solo lectura y las
+# comparten todas las sesiones; `pdf`, `cdf` y `tramo` devuelven vistas (filas
+# y rebanadas), nunca copias, así que dibujar una curva o sombrear una región
+# no reserva memoria nueva. scipy se importa al construir la primera tabla, así
+# que `app.py` puede importar este módulo para informar de la memoria sin
+# encarecer el arranque.
+
+X_MAX = 4.0
+# Paso de 0.01: la rejilla contiene 0 y los valores con dos decimales
+PUNTOS = 801
+# Grados de libertad con fila propia; por encima se calcula la curva aparte
+DF_MAX = 1000
+
+_x = np.linspace(-X_MAX, X_MAX, PUNTOS)
+_x.setflags(write=False)
+_tablas = {}
+_lock = threading.Lock()
+
+
+def x():
+    """Rejilla común de las curvas (solo lectura)."""
+    return _x
+
+
+def _funciones(funcion):
+    # (normal, t de Student) de scipy para "pdf" o "cdf"
+    from scipy import stats
+
+    return getattr(stats.norm, funcion), getattr(stats.t, funcion)
+
+
+def _tabla(funcion):
+    tabla = _tablas.get(funcion)
+    if tabla is not None:
+        return tabla
+    with _lock:
+        if funcion not in _tablas:
+            normal, student = _funciones(funcion)
+            tabla = np.empty((DF_MAX + 1, PUNTOS))
+            tabla[0] = normal(_x)
+            tabla[1:] = student(_x, np.arange(1.0, DF_MAX + 1)[:, None])
+            tabla.setflags(write=False)
+            _tablas[funcion] = tabla
+        return _tablas[funcion]
+
+
+def _fila(funcion, df):
+    if df is None or np.isinf(df):
+        return _tabla(funcion)[0]
+    if df == int(df) and 1 <= df <= DF_MAX:
+        return _tabla(funcion)[int(df)]
+    # df no entero o mayor que DF_MAX: se calcula aparte, fuera del almacén
+    valores = _funciones(funcion)[1](_x, df)
+    valores.setflags(write=False)
+    return valores
+
+
+def pdf(df=None):
+    """Densidad sobre `x()`: normal estándar con df=None (o ∞), t de Student si no."""
+    return _fila("pdf", df)
+
+
+def cdf(df=None):
+    """Distribución acumulada sobre `x()`, con la misma convención que `pdf`."""
+    return _fila("cdf", df)
+
+
+def tramo(desde=-np.inf, hasta=np.inf):
+    """Rebanada de la rejilla con desde ≤ x ≤ hasta, para sombrear regiones con vistas."""
+    return slice(int(np.searchsorted(_x, desde, side="left")), int(np.searchsorted(_x, hasta, side="right")))
+
+
+def memoria_bytes():
+    """Bytes ocupados por las tablas ya construidas (la rejilla incluida)."""
+    with _lock:
+        return _x.nbytes + sum(tabla.nbytes for tabla in _tablas.values())
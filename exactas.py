@@ -0,0 +1,225 @@
+import numpy as np
+from scipy import stats
+from scipy.special import logsumexp
+
+import inferencia
+
+# Pruebas exactas para una proporción (binomial) y para tablas 2×2 (Fisher).
+# Ambas aceptan arreglos con broadcasting: una llamada resuelve un lote entero
+# de pruebas sin bucles de Python.
+#
+# Las colas se calculan con las funciones de scipy (beta incompleta para la
+# binomial, sumas con recurrencias de boost para la hipergeométrica), que son
+# precisas en términos relativos hasta ~1e-300. Cuando una cola es más pequeña
+# que eso se suma en escala logarítmica: se parte de log pmf(k) y se avanza con
+# el cociente pmf(x + 1) / pmf(x) de la distribución, así que `log10_p` sigue
+# siendo exacto aunque el p-valor no quepa en un float.
+#
+# La prueba de dos colas suma todos los valores con probabilidad menor o igual
+# que la observada (el criterio de scipy.stats.binomtest y fisher_exact). El
+# límite del otro lado de la moda se encuentra por bisección, en O(log n).
+#
+# `metodo="auto"` usa la prueba exacta siempre que su costo es acotado. La
+# binomial cuesta O(log n) por prueba y es siempre exacta. Fisher cuesta del
+# orden de la desviación estándar de la celda (1,1): por encima de
+# DESVIACION_MAX_EXACTA se usa chi-cuadrado con corrección de Yates, que con
+# márgenes tan grandes es prácticamente idéntica.
+
+METODOS = ["auto", "exacta", "asintotica"]
+DESVIACION_MAX_EXACTA = 3000.0
+# Por debajo de este p-valor la cola se recalcula en escala logarítmica
+P_MIN_DIRECTO = 1e-280
+TERMINOS_SERIE = 512
+FILAS_SERIE = 2048
+# Tolerancia relativa para considerar "igual de probable" en dos colas (la de scipy)
+_EMPATE = np.log1p(1e-7)
+
+
+def _validar_metodo(metodo):
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}. Usa uno de {', '.join(METODOS)}.")
+
+
+def _serie(x, paso, logpmf, log_razon, lo, hi):
+    """log Σ pmf(x + paso·j), j ≥ 0, sumando TERMINOS_SERIE términos y acotando el resto."""
+    j = np.arange(TERMINOS_SERIE)
+    puntos = x[:, None] + paso * j[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if paso == 1:
+            desde = puntos[:, :-1]
+            log_r = np.where((desde >= lo[:, None]) & (desde < hi[:, None]), log_razon(desde), -np.inf)
+        else:
+            # pmf(y - 1) / pmf(y) es el inverso del cociente evaluado en y - 1
+            desde = puntos[:, 1:]
+            log_r = np.where((desde >= lo[:, None]) & (desde < hi[:, None]), -log_razon(desde), -np.inf)
+    log_terminos = logpmf(x)[:, None] + np.concatenate([np.zeros((len(x), 1)), np.cumsum(log_r, axis=1)], axis=1)
+    suma = logsumexp(log_terminos, axis=1)
+    # En la cola los cocientes decrecen: el último acota los siguientes (serie geométrica)
+    ultimo = np.exp(log_r[:, -1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        resto = np.where(ultimo < 1, log_terminos[:, -1] + np.log(ultimo) - np.log1p(-ultimo), -np.inf)
+    return np.logaddexp(suma, resto)
+
+
+def _log_cola(x, paso, directo, logpmf, log_razon, lo, hi):
+    """log P(X ≥ x) (paso 1) o log P(X ≤ x) (paso -1); `directo` es el valor de scipy."""
+    with np.errstate(divide="ignore"):
+        resultado = np.log(directo)
+    fuera = (paso * x > paso * np.where(paso == 1, hi, lo))
+    resultado[fuera] = -np.inf
+    pendientes = np.flatnonzero((directo < P_MIN_DIRECTO) & ~fuera)
+    # Por trozos: la serie usa una matriz (filas, TERMINOS_SERIE)
+    for inicio in range(0, len(pendientes), FILAS_SERIE):
+        filas = pendientes[inicio:inicio + FILAS_SERIE]
+        resultado[filas] = _serie(x[filas], paso, lambda v: logpmf(v, filas), lambda v: log_razon(v, filas),
+                                  lo[filas], hi[filas])
+    return resultado
+
+
+def _dos_colas(k, moda, lo, hi, logpmf):
+    """Límite y del otro lado de la moda con pmf(y) ≤ pmf(k), por bisección vectorizada.
+
+    Para k < moda devuelve el menor y ≥ moda (hi + 1 si no hay); para k > moda,
+    el mayor y ≤ moda (lo - 1 si no hay).
+    """
+    objetivo = logpmf(k) + _EMPATE
+    derecha = k < moda
+    # a cumple pmf(a) > objetivo; b cumple pmf(b) ≤ objetivo (los extremos fuera del soporte valen 0)
+    a = moda.copy()
+    b = np.where(derecha, hi + 1, lo - 1)
+    en_moda = logpmf(moda) <= objetivo
+    b = np.where(en_moda, moda, b)
+    while True:
+        abiertos = (np.abs(b - a) > 1) & ~en_moda
+        if not np.any(abiertos):
+            break
+        m = (a + b) // 2
+        cumple = logpmf(np.clip(m, lo, hi)) <= objetivo
+        b = np.where(abiertos & cumple, m, b)
+        a = np.where(abiertos & ~cumple, m, a)
+    return b
+
+
+def _p_valor(k, codigo, moda, lo, hi, logpmf, log_razon, cdf, sf):
+    """Log p-valor exacto de una distribución discreta unimodal, para cada cola."""
+    indices = np.arange(len(k))
+    pmf = lambda v, filas=indices: logpmf(v, filas)
+    razon = lambda v, filas=indices: log_razon(v, filas)
+    log_derecha = _log_cola(k, 1, sf(k - 1), pmf, razon, lo, hi)
+    log_izquierda = _log_cola(k, -1, cdf(k), pmf, razon, lo, hi)
+
+    y = _dos_colas(k, moda, lo, hi, pmf)
+    log_otro_derecha = _log_cola(y, 1, sf(y - 1), pmf, razon, lo, hi)
+    log_otro_izquierda = _log_cola(y, -1, cdf(y), pmf, razon, lo, hi)
+    log_dos = np.where(k < moda, np.logaddexp(log_izquierda, log_otro_derecha),
+                       np.where(k > moda, np.logaddexp(log_derecha, log_otro_izquierda), 0.0))
+    log_p = np.where(codigo == 0, log_dos, np.where(codigo == 1, log_derecha, log_izquierda))
+    return np.minimum(log_p, 0.0)
+
+
+def _log_p_normal(z, codigo):
+    dos = np.log(2) + stats.norm.logsf(np.abs(z))
+    return np.minimum(np.where(codigo == 0, dos, np.where(codigo == 1, stats.norm.logsf(z), stats.norm.logcdf(z))), 0.0)
+
+
+def binomial_exacta(exitos, n, p0=0.5, alpha=0.05, cola=inferencia.DOS_COLAS, metodo="auto"):
+    """Prueba binomial exacta para una proporción (o la Z con metodo="asintotica")."""
+    _validar_metodo(metodo)
+    exitos, n, p0, alpha, codigo = np.broadcast_arrays(
+        np.asarray(exitos, dtype=np.int64), np.asarray(n, dtype=np.int64),
+        np.asarray(p0, dtype=float), np.asarray(alpha, dtype=float), inferencia._codigo_cola(cola))
+    forma = exitos.shape
+    k, n, p, codigo = (v.ravel() for v in (exitos, n, p0, codigo))
+    if np.any((k < 0) | (k > n)) or np.any((p <= 0) | (p >= 1)):
+        raise ValueError("Se necesita 0 ≤ éxitos ≤ n y 0 < p₀ < 1.")
+
+    exacta = np.full(k.shape, metodo != "asintotica")
+    if metodo == "asintotica":
+        z = (k / n - p) / np.sqrt(p * (1 - p) / n)
+        log_p = _log_p_normal(z, codigo)
+    else:
+        log_p = _p_valor(
+            k, codigo, moda=np.minimum(np.floor((n + 1) * p).astype(np.int64), n), lo=np.zeros_like(n), hi=n,
+            logpmf=lambda v, f: stats.binom.logpmf(v, n[f], p[f]),
+            log_razon=lambda v, f: np.log(n[f, None] - v) - np.log1p(v) + np.log(p[f, None]) - np.log1p(-p[f, None]),
+            cdf=lambda v: stats.binom.cdf(v, n, p), sf=lambda v: stats.binom.sf(v, n, p))
+
+    p_valor = np.exp(log_p).reshape(forma)
+    return inferencia._escalar({
+        "p_hat": (k / n).reshape(forma),
+        "p_valor": p_valor,
+        "log10_p": (log_p / np.log(10)).reshape(forma),
+        "exacta": exacta.reshape(forma),
+        "rechazo": p_valor < alpha,
+    })
+
+
+def fisher_exacta(tablas, alpha=0.05, cola=inferencia.DOS_COLAS, metodo="auto"):
+    """Prueba exacta de Fisher para una tabla 2×2 o un lote (..., 2, 2) de tablas.
+
+    Cola derecha: odds ratio > 1 (la celda (1,1) mayor de lo esperado).
+    """
+    _validar_metodo(metodo)
+    tablas = np.asarray(tablas)
+    if tablas.shape[-2:] != (2, 2):
+        raise ValueError("Cada tabla debe ser de 2×2.")
+    if np.any(tablas < 0) or np.any(tablas != np.round(tablas)):
+        raise ValueError("Las tablas deben contener conteos enteros no negativos.")
+    forma = tablas.shape[:-2]
+    a, b, c, d = (tablas[..., i, j].astype(np.int64).ravel() for i, j in ((0, 0), (0, 1), (1, 0), (1, 1)))
+    alpha, codigo = (v.ravel() for v in np.broadcast_arrays(np.asarray(alpha, dtype=float),
+                                                             inferencia._codigo_cola(cola), np.empty(forma))[:2])
+    total, fila1, columna1 = a + b + c + d, a + b, a + c
+    lo = np.maximum(0, fila1 + columna1 - total)
+    hi = np.minimum(fila1, columna1)
+
+    # Los productos de conteos y márgenes se hacen en float: en int64 desbordan
+    # con márgenes de millones
+    a_r, b_r, c_r, d_r = (v.astype(float) for v in (a, b, c, d))
+    n, f1, c1 = total.astype(float), fila1.astype(float), columna1.astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        odds_ratio = (a_r * d_r) / (b_r * c_r)
+        varianza = f1 * c1 * (n - f1) * (n - c1) / (n ** 2 * (n - 1))
+    if metodo == "auto":
+        exacta = ~(np.sqrt(varianza) > DESVIACION_MAX_EXACTA)
+    else:
+        exacta = np.full(a.shape, metodo == "exacta")
+
+    log_p = np.zeros(a.shape)
+    # Márgenes con una sola tabla posible: p = 1
+    degeneradas = lo == hi
+    filas = np.flatnonzero(exacta & ~degeneradas)
+    if len(filas):
+        M, K, N = total[filas], columna1[filas], fila1[filas]
+        log_p[filas] = _p_valor(
+            a[filas], codigo[filas], moda=np.floor((N + 1) * (K + 1) / (M + 2)).astype(np.int64),
+            lo=lo[filas], hi=hi[filas],
+            logpmf=lambda v, f: stats.hypergeom.logpmf(v, M[f], K[f], N[f]),
+            log_razon=lambda v, f: (np.log(N[f, None] - v) + np.log(K[f, None] - v) - np.log1p(v)
+                                    - np.log(M[f, None] - N[f, None] - K[f, None] + v + 1)),
+            cdf=lambda v: stats.hypergeom.cdf(v, M, K, N), sf=lambda v: stats.hypergeom.sf(v, M, K, N))
+    filas = np.flatnonzero(~exacta & ~degeneradas)
+    if len(filas):
+        # Z con signo a partir del chi-cuadrado con corrección de Yates
+        chi2 = inferencia.chi2_independencia(tablas.reshape(-1, 2, 2)[filas])["estadistico"]
+        z = np.sign(a_r[filas] * d_r[filas] - b_r[filas] * c_r[filas]) * np.sqrt(chi2)
+        log_p[filas] = _log_p_normal(z, codigo[filas])
+
+    p_valor = np.exp(log_p)
+    return inferencia._escalar({
+        "odds_ratio": odds_ratio.reshape(forma),
+        "p_valor": p_valor.reshape(forma),
+        "log10_p": (log_p / np.log(10)).reshape(forma),
+        "exacta": exacta.reshape(forma),
+        "rechazo": (p_valor < alpha).reshape(forma),
+    })
+
+
+def formatear_p(p_valor, log10_p):
+    """Texto del p-valor; los que no caben en un float se muestran como potencia de 10."""
+    if p_valor >= 1e-4:
+        return f"{p_valor:.4f}"
+    if p_valor > 0:
+        return f"{p_valor:.2e}"
+    mantisa = 10 ** (log10_p - np.floor(log10_p))
+    return f"{mantisa:.2f}e{int(np.floor(log10_p))}"
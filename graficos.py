@@ -0,0 +1,125 @@
+import io
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+import instrumentacion
+
+# Capa central de gráficos. Las figuras se crean con `matplotlib.figure.Figure`
+# (no con pyplot), así que no quedan registradas en el gestor global de pyplot
+# y se liberan en cuanto nadie las referencia. Cada sesión guarda un pequeño
+# pool de figuras en `st.session_state` para reutilizarlas entre reruns.
+# matplotlib se importa solo al construir la primera figura: una imagen servida
+# desde la caché no lo necesita.
+
+MAX_FIGURAS_POR_SESION = 8
+_CLAVE_POOL = "_graficos_pool"
+
+# Caché de imágenes compartida por todas las sesiones del proceso. Los gráficos
+# que son función pura de unos pocos parámetros se rasterizan una sola vez y se
+# sirven como PNG; al superar el tamaño máximo se expulsan los menos usados.
+MAX_BYTES_CACHE = 64 * 1024 * 1024
+DPI = 200
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_estado = {"hits": 0, "misses": 0, "bytes": 0}
+
+
+def _pool():
+    if _CLAVE_POOL not in st.session_state:
+        st.session_state[_CLAVE_POOL] = OrderedDict()
+    return st.session_state[_CLAVE_POOL]
+
+
+def subplots(clave, nrows=1, ncols=1, figsize=(8, 4)):
+    """Devuelve (fig, ax) reutilizando la figura de la sesión asociada a `clave`.
+
+    Como `plt.subplots`, con más de un panel `ax` es el array de ejes.
+    """
+    from matplotlib.figure import Figure
+
+    pool = _pool()
+    fig = pool.pop(clave, None)
+    if fig is None or tuple(fig.get_size_inches()) != tuple(figsize):
+        fig = Figure(figsize=figsize)
+    else:
+        fig.clear()
+    ax = fig.subplots(nrows, ncols)
+    pool[clave] = fig
+    instrumentacion.marcar_inicio_figura()
+
+    # Límite de figuras vivas por sesión: se descartan las menos recientes
+    while len(pool) > MAX_FIGURAS_POR_SESION:
+        _, vieja = pool.popitem(last=False)
+        vieja.clear()
+    return fig, ax
+
+
+def mostrar(fig):
+    """Renderiza la figura y libera sus artistas; la figura vacía queda en el pool."""
+    instrumentacion.marcar_fin_figura()
+    with instrumentacion.seccion("serializacion"):
+        st.pyplot(fig)
+    fig.clear()
+
+
+def figuras_vivas():
+    return len(_pool())
+
+
+def _buscar(llave):
+    with _cache_lock:
+        png = _cache.get(llave)
+        if png is None:
+            _cache_estado["misses"] += 1
+        else:
+            _cache_estado["hits"] += 1
+            _cache.move_to_end(llave)
+        return png
+
+
+def _guardar(llave, png):
+    with _cache_lock:
+        if llave in _cache:
+            return
+        _cache[llave] = png
+        _cache_estado["bytes"] += len(png)
+        while _cache_estado["bytes"] > MAX_BYTES_CACHE and len(_cache) > 1:
+            _, viejo = _cache.popitem(last=False)
+            _cache_estado["bytes"] -= len(viejo)
+
+
+def mostrar_cacheado(clave, params, dibujar, figsize=(8, 4)):
+    """Muestra un gráfico que solo depende de `params`.
+
+    `dibujar(ax)` solo se ejecuta si la combinación (clave, params, figsize)
+    no está en la caché; en ese caso la figura se rasteriza a PNG y se guarda.
+    """
+    llave = (clave, tuple(figsize), tuple(params))
+    png = _buscar(llave)
+    if png is None:
+        from matplotlib.figure import Figure
+
+        with instrumentacion.seccion("figura"):
+            fig = Figure(figsize=figsize)
+            dibujar(fig.add_subplot())
+        with instrumentacion.seccion("serializacion"):
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format="png", dpi=DPI, bbox_inches="tight")
+            png = buffer.getvalue()
+        _guardar(llave, png)
+    with instrumentacion.seccion("serializacion"):
+        st.image(png, width="stretch")
+
+
+def estadisticas_cache():
+    with _cache_lock:
+        return {**_cache_estado, "entradas": len(_cache)}
+
+
+def vaciar_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_estado.update(hits=0, misses=0, bytes=0)
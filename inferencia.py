@@ -0,0 +1,562 @@
+import itertools
+
+import numpy as np
+from scipy import sparse
+from scipy.stats import norm, t, f, chi2, beta
+import tablas
+
+# Motor de inferencia sin interfaz: todas las funciones aceptan escalares o
+# arreglos de NumPy (con broadcasting) y devuelven diccionarios de arreglos.
+# Las páginas de Streamlit llaman a estas mismas funciones con un solo valor.
+
+DOS_COLAS = "Dos colas"
+COLA_DERECHA = "Cola derecha"
+COLA_IZQUIERDA = "Cola izquierda"
+TIPOS_COLA = [DOS_COLAS, COLA_DERECHA, COLA_IZQUIERDA]
+
+
+def _codigo_cola(cola):
+    # 0 = dos colas, 1 = cola derecha, -1 = cola izquierda
+    cola = np.asarray(cola)
+    if cola.dtype.kind in "iuf":
+        return cola.astype(int)
+    codigo = np.zeros(cola.shape, dtype=int)
+    codigo[cola == COLA_DERECHA] = 1
+    codigo[cola == COLA_IZQUIERDA] = -1
+    desconocidos = ~np.isin(cola, TIPOS_COLA)
+    if np.any(desconocidos):
+        raise ValueError(f"Tipo de prueba desconocido: {cola[desconocidos].ravel()[0]}")
+    return codigo
+
+
+def _escalar(resultado):
+    # Devuelve escalares de Python cuando todas las entradas fueron escalares
+    return {k: (np.asarray(v).item() if np.ndim(v) == 0 else v) for k, v in resultado.items()}
+
+
+def valor_critico(alpha, cola=DOS_COLAS, df=None):
+    """Valor crítico Z (df=None) o t para el tipo de cola indicado."""
+    alpha = np.asarray(alpha, dtype=float)
+    codigo = _codigo_cola(cola)
+    q = np.where(codigo == 0, 1 - alpha / 2, np.where(codigo == 1, 1 - alpha, alpha))
+    if df is None:
+        return tablas.ppf("z", q)
+    q, df = np.broadcast_arrays(q, np.asarray(df, dtype=float))
+    # La tabla t solo se consulta (y se construye) si hay algún df finito
+    infinitos = np.isinf(df)
+    critico = np.empty(q.shape)
+    if infinitos.any():
+        critico[infinitos] = tablas.ppf("z", q[infinitos])
+    if not infinitos.all():
+        critico[~infinitos] = tablas.ppf("t", q[~infinitos], df[~infinitos])
+    return critico
+
+
+def p_valor(estadistico, cola=DOS_COLAS, df=None):
+    estadistico = np.asarray(estadistico, dtype=float)
+    codigo = _codigo_cola(cola)
+    dist = norm if df is None else t
+    args = () if df is None else (np.asarray(df, dtype=float),)
+    derecha = dist.sf(estadistico, *args)
+    izquierda = dist.cdf(estadistico, *args)
+    dos = 2 * dist.sf(np.abs(estadistico), *args)
+    return np.where(codigo == 0, dos, np.where(codigo == 1, derecha, izquierda))
+
+
+def prueba_media(media, desv, n, mu0, alpha=0.05, cola=DOS_COLAS, sigma_conocida=True):
+    """Prueba Z (sigma conocida) o t para una media a partir de resúmenes."""
+    media, desv, n, mu0, alpha = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (media, desv, n, mu0, alpha))
+    )
+    codigo = _codigo_cola(cola)
+    sigma_conocida = np.asarray(sigma_conocida, dtype=bool)
+
+    error_estandar = desv / np.sqrt(n)
+    estadistico = (media - mu0) / error_estandar
+    df = np.where(sigma_conocida, np.inf, n - 1)
+
+    critico = valor_critico(alpha, codigo, df)
+    p = p_valor(estadistico, codigo, df)
+    rechazo = np.where(
+        codigo == 0, np.abs(estadistico) > critico,
+        np.where(codigo == 1, estadistico > critico, estadistico < critico),
+    )
+    return _escalar({
+        "error_estandar": error_estandar,
+        "estadistico": estadistico,
+        "df": df,
+        "valor_critico": critico,
+        "p_valor": p,
+        "rechazo": rechazo,
+    })
+
+
+def ic_media(media, desv, n, confianza=0.95, usar_t=None):
+    """Intervalo de confianza para una media (Z si n > 30, t si no, salvo que se indique usar_t)."""
+    media, desv, n, confianza = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (media, desv, n, confianza))
+    )
+    usar_t = n <= 30 if usar_t is None else np.broadcast_to(np.asarray(usar_t, dtype=bool), n.shape)
+    alpha = 1 - confianza
+    df = np.where(usar_t, n - 1, np.inf)
+    critico = valor_critico(alpha, DOS_COLAS, df)
+    error_estandar = desv / np.sqrt(n)
+    margen = critico * error_estandar
+    return _escalar({
+        "df": df,
+        "valor_critico": critico,
+        "error_estandar": error_estandar,
+        "margen_error": margen,
+        "limite_inferior": media - margen,
+        "limite_superior": media + margen,
+    })
+
+
+def ic_dos_medias(mean1, std1, n1, mean2, std2=None, n2=None, alpha=0.05, apareadas=False):
+    """IC para la diferencia de medias: Welch (independientes) o t apareada.
+
+    En el caso apareado `std1` es la desviación de las diferencias y `n1` el
+    número de pares. Los grados de libertad de Welch se truncan a entero.
+    """
+    std2 = std1 if std2 is None else std2
+    n2 = n1 if n2 is None else n2
+    mean1, std1, n1, mean2, std2, n2, alpha = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (mean1, std1, n1, mean2, std2, n2, alpha))
+    )
+    apareadas = np.asarray(apareadas, dtype=bool)
+
+    v1 = std1 ** 2 / n1
+    v2 = std2 ** 2 / n2
+    se_welch = np.sqrt(v1 + v2)
+    df_welch = np.floor((v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1)))
+
+    se_diff = np.where(apareadas, std1 / np.sqrt(n1), se_welch)
+    df = np.where(apareadas, n1 - 1, df_welch)
+    t_crit = tablas.ppf("t", 1 - alpha / 2, df)
+    diff_means = mean1 - mean2
+    estadistico = diff_means / se_diff
+
+    ci_lower = diff_means - t_crit * se_diff
+    ci_upper = diff_means + t_crit * se_diff
+    return _escalar({
+        "diff_means": diff_means,
+        "se_diff": se_diff,
+        "df": df,
+        "t_crit": t_crit,
+        "estadistico": estadistico,
+        "p_valor": 2 * t.sf(np.abs(estadistico), df),
+        "ci_lower": ci_lower,
+        "ci_upper": ci_upper,
+        "significativo": (ci_lower > 0) | (ci_upper < 0),
+    })
+
+
+# Comparaciones múltiples: p-valores ajustados con un solo ordenamiento
+# (O(m log m)) y máximos/mínimos acumulados en lugar de bucles por hipótesis.
+
+CORRECCIONES = ["Ninguna", "Bonferroni", "Holm", "Benjamini-Hochberg"]
+
+
+def ajustar_p_valores(p, metodo="Holm"):
+    """p-valores ajustados (Bonferroni, Holm o Benjamini-Hochberg); los NaN no cuentan en m."""
+    p = np.asarray(p, dtype=float)
+    if metodo not in CORRECCIONES:
+        raise ValueError(f"Corrección desconocida: {metodo}")
+    ajustados = np.full(p.shape, np.nan)
+    validos = ~np.isnan(p)
+    valores = p[validos]
+    m = len(valores)
+    if metodo == "Ninguna" or m == 0:
+        ajustados[validos] = valores
+        return ajustados
+    if metodo == "Bonferroni":
+        ajustados[validos] = np.minimum(valores * m, 1.0)
+        return ajustados
+
+    orden = np.argsort(valores, kind="stable")
+    ordenados = valores[orden]
+    rango = np.arange(1, m + 1)
+    if metodo == "Holm":
+        corregidos = np.maximum.accumulate((m - rango + 1) * ordenados)
+    else:
+        corregidos = np.minimum.accumulate((m / rango * ordenados)[::-1])[::-1]
+    resultado = np.empty(m)
+    resultado[orden] = np.minimum(corregidos, 1.0)
+    ajustados[validos] = resultado
+    return ajustados
+
+
+def comparar_metricas(mean1, std1, n1, mean2, std2, n2, alpha=0.05, correccion="Holm"):
+    """Welch para muchas métricas a la vez, con p-valores corregidos por comparaciones múltiples."""
+    resultado = ic_dos_medias(np.atleast_1d(mean1), np.atleast_1d(std1), np.atleast_1d(n1),
+                              np.atleast_1d(mean2), np.atleast_1d(std2), np.atleast_1d(n2), alpha)
+    p_ajustado = ajustar_p_valores(resultado["p_valor"], correccion)
+    resultado["p_ajustado"] = p_ajustado
+    resultado["rechazo"] = p_ajustado < alpha
+    return resultado
+
+
+def prueba_proporcion(exitos, n, p0=0.5, alpha=0.05, cola=DOS_COLAS):
+    """Prueba Z para una proporción con aproximación normal."""
+    exitos, n, p0, alpha = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (exitos, n, p0, alpha))
+    )
+    codigo = _codigo_cola(cola)
+    p_hat = exitos / n
+    se = np.sqrt(p0 * (1 - p0) / n)
+    z_stat = (p_hat - p0) / se
+    p = p_valor(z_stat, codigo)
+    return _escalar({
+        "p_hat": p_hat,
+        "estadistico": z_stat,
+        "valor_critico": valor_critico(alpha, codigo),
+        "p_valor": p,
+        "rechazo": p < alpha,
+    })
+
+
+# Intervalos para una proporción. Cada método se calcula para todos los
+# segmentos a la vez; Clopper-Pearson usa cuantiles beta (exacto y conservador),
+# los demás son fórmulas cerradas a partir del mismo valor crítico z.
+
+METODOS_IC_PROPORCION = ["Wald", "Wilson", "Agresti-Coull", "Clopper-Pearson"]
+
+
+def ic_proporcion(exitos, n, confianza=0.95, metodo="Wilson"):
+    """IC para una proporción con el método indicado; acepta arreglos de (éxitos, n)."""
+    if metodo not in METODOS_IC_PROPORCION:
+        raise ValueError(f"Método desconocido: {metodo}")
+    exitos, n, confianza = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (exitos, n, confianza)))
+    alpha = 1 - confianza
+    z = valor_critico(alpha)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p_hat = exitos / n
+        if metodo == "Wald":
+            margen = z * np.sqrt(p_hat * (1 - p_hat) / n)
+            inferior, superior = p_hat - margen, p_hat + margen
+        elif metodo == "Wilson":
+            denominador = 1 + z ** 2 / n
+            centro = (p_hat + z ** 2 / (2 * n)) / denominador
+            margen = z / denominador * np.sqrt(p_hat * (1 - p_hat) / n + z ** 2 / (4 * n ** 2))
+            inferior, superior = centro - margen, centro + margen
+        elif metodo == "Agresti-Coull":
+            n_ajustado = n + z ** 2
+            p_ajustado = (exitos + z ** 2 / 2) / n_ajustado
+            margen = z * np.sqrt(p_ajustado * (1 - p_ajustado) / n_ajustado)
+            inferior, superior = p_ajustado - margen, p_ajustado + margen
+        else:
+            # Con 0 éxitos (o n éxitos) el extremo correspondiente es exactamente 0 (o 1)
+            inferior = np.where(exitos > 0, beta.ppf(alpha / 2, exitos, n - exitos + 1), 0.0)
+            superior = np.where(exitos < n, beta.ppf(1 - alpha / 2, exitos + 1, n - exitos), 1.0)
+    inferior = np.clip(inferior, 0.0, 1.0)
+    superior = np.clip(superior, 0.0, 1.0)
+    return _escalar({
+        "p_hat": p_hat,
+        "limite_inferior": inferior,
+        "limite_superior": superior,
+        "ancho": superior - inferior,
+    })
+
+
+def chi2_bondad(observados, esperados, alpha=0.05):
+    """Chi-cuadrado de bondad de ajuste; la última dimensión son las categorías."""
+    observados = np.asarray(observados, dtype=float)
+    esperados = np.asarray(esperados, dtype=float)
+    if observados.shape[-1] != esperados.shape[-1]:
+        raise ValueError("Los vectores de observados y esperados deben tener la misma longitud.")
+    chi2_stat = np.sum((observados - esperados) ** 2 / esperados, axis=-1)
+    dof = observados.shape[-1] - 1
+    p = chi2.sf(chi2_stat, dof)
+    return _escalar({
+        "estadistico": chi2_stat,
+        "dof": np.full(np.shape(chi2_stat), dof),
+        "p_valor": p,
+        "rechazo": p < np.asarray(alpha),
+    })
+
+
+def chi2_independencia(conteos, alpha=0.05, correccion=True):
+    """Chi-cuadrado de independencia para una tabla (r, c) o un lote (..., r, c).
+
+    Aplica la corrección de Yates en tablas 2x2, igual que `chi2_contingency`.
+    Las matrices dispersas de scipy se resuelven sin formar la tabla esperada.
+    """
+    if sparse.issparse(conteos):
+        return chi2_independencia_dispersa(conteos, alpha, correccion)
+    conteos = np.asarray(conteos, dtype=float)
+    filas = conteos.sum(axis=-1, keepdims=True)
+    columnas = conteos.sum(axis=-2, keepdims=True)
+    total = conteos.sum(axis=(-2, -1), keepdims=True)
+    esperados = filas * columnas / total
+
+    r, c = conteos.shape[-2:]
+    dof = (r - 1) * (c - 1)
+    diferencia = conteos - esperados
+    if correccion and dof == 1:
+        diferencia = diferencia - np.sign(diferencia) * np.minimum(np.abs(diferencia), 0.5)
+    chi2_stat = np.sum(diferencia ** 2 / esperados, axis=(-2, -1))
+    p = chi2.sf(chi2_stat, dof)
+    return _escalar({
+        "estadistico": chi2_stat,
+        "dof": np.full(np.shape(chi2_stat), dof),
+        "p_valor": p,
+        "esperados": esperados,
+        "rechazo": p < np.asarray(alpha),
+    })
+
+
+def chi2_independencia_dispersa(tabla, alpha=0.05, correccion=True):
+    """Chi-cuadrado de independencia para una tabla dispersa (r, c) muy grande.
+
+    Usa χ² = N·Σ O²/(fᵢ·cⱼ) − N, donde la suma recorre solo las celdas no
+    nulas, así que nunca se construye la matriz densa de esperados. Las filas y
+    columnas vacías se descartan al contar los grados de libertad; si queda una
+    tabla 2x2 se aplica la corrección de Yates, como en `chi2_independencia`.
+    """
+    tabla = sparse.coo_matrix(tabla)
+    tabla.sum_duplicates()
+    filas = np.asarray(tabla.sum(axis=1)).ravel().astype(float)
+    columnas = np.asarray(tabla.sum(axis=0)).ravel().astype(float)
+    total = filas.sum()
+
+    observados = tabla.data.astype(float)
+    suma = np.sum(observados ** 2 / (filas[tabla.row] * columnas[tabla.col]))
+    chi2_stat = max(total * suma - total, 0.0)
+
+    filas_no_vacias = filas[filas > 0]
+    columnas_no_vacias = columnas[columnas > 0]
+    dof = (len(filas_no_vacias) - 1) * (len(columnas_no_vacias) - 1)
+    if correccion and dof == 1:
+        # Con un solo grado de libertad la tabla útil es 2x2: se densifica y se
+        # corrige igual que en la versión densa
+        densa = tabla.tocsr()[np.flatnonzero(filas > 0)][:, np.flatnonzero(columnas > 0)].toarray()
+        chi2_stat = chi2_independencia(densa)["estadistico"]
+    p = chi2.sf(chi2_stat, dof)
+    return {
+        "estadistico": float(chi2_stat),
+        "dof": dof,
+        "p_valor": float(p),
+        "rechazo": bool(p < alpha),
+        # El menor esperado sale de los márgenes: min(fᵢ)·min(cⱼ)/N
+        "esperado_minimo": float(filas_no_vacias.min() * columnas_no_vacias.min() / total),
+        "forma": tabla.shape,
+        "celdas_no_nulas": tabla.nnz,
+    }
+
+
+def tabla_contingencia(a, b):
+    """Tabla de contingencia dispersa (CSR) a partir de dos columnas categóricas pareadas.
+
+    Devuelve (niveles_a, niveles_b, tabla); los conteos se acumulan sobre
+    códigos enteros, con una entrada por par observado.
+    """
+    niveles_a, codigos_a = codificar(a)
+    niveles_b, codigos_b = codificar(b)
+    tabla = sparse.coo_matrix(
+        (np.ones(len(codigos_a), dtype=np.int64), (codigos_a, codigos_b)),
+        shape=(len(niveles_a), len(niveles_b)),
+    ).tocsr()
+    return niveles_a, niveles_b, tabla
+
+
+def anova_resumen(n, medias, varianzas, alpha=0.05):
+    """ANOVA de un factor a partir de (n, media, varianza) por grupo.
+
+    La última dimensión recorre los grupos, de modo que un arreglo (m, k)
+    resuelve m ANOVA independientes en una sola llamada.
+    """
+    n, medias, varianzas = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (n, medias, varianzas))
+    )
+    N = n.sum(axis=-1)
+    k = n.shape[-1]
+    media_global = (n * medias).sum(axis=-1) / N
+
+    ss_between = (n * (medias - media_global[..., None]) ** 2).sum(axis=-1)
+    ss_within = ((n - 1) * varianzas).sum(axis=-1)
+
+    df_between = k - 1
+    df_within = N - k
+    ms_between = ss_between / df_between
+    ms_within = ss_within / df_within
+    F = ms_between / ms_within
+    p = f.sf(F, df_between, df_within)
+    return _escalar({
+        "ss_between": ss_between,
+        "ss_within": ss_within,
+        "df_between": np.full(np.shape(F), df_between),
+        "df_within": df_within,
+        "ms_between": ms_between,
+        "ms_within": ms_within,
+        "F": F,
+        "p_valor": p,
+        "rechazo": p < np.asarray(alpha),
+    })
+
+
+def resumen_grupos(valores, grupos, k=None):
+    """(n, media, varianza) por grupo con reducciones agrupadas (`bincount`).
+
+    `grupos` son códigos enteros 0..k-1 alineados con `valores`. Las varianzas
+    se acumulan sobre desviaciones respecto a la media del grupo, no como
+    suma de cuadrados menos cuadrado de la suma, para no perder precisión.
+    """
+    valores = np.asarray(valores, dtype=float)
+    grupos = np.asarray(grupos, dtype=np.intp)
+    k = int(grupos.max()) + 1 if k is None else k
+    n = np.bincount(grupos, minlength=k).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = np.bincount(grupos, weights=valores, minlength=k) / n
+        ss = np.bincount(grupos, weights=(valores - medias[grupos]) ** 2, minlength=k)
+        varianzas = np.where(n > 1, ss / (n - 1), 0.0)
+    return n, medias, varianzas
+
+
+def codificar(etiquetas):
+    """Convierte etiquetas arbitrarias en códigos 0..k-1; devuelve (niveles, códigos)."""
+    return np.unique(np.asarray(etiquetas), return_inverse=True)
+
+
+def anova_un_factor(valores, grupos, alpha=0.05):
+    """ANOVA de un factor sobre datos en formato largo (valor, grupo).
+
+    `grupos` puede ser cualquier arreglo de etiquetas; el resultado incluye
+    los niveles y los resúmenes por grupo además de la tabla ANOVA.
+    """
+    niveles, codigos = codificar(grupos)
+    n, medias, varianzas = resumen_grupos(valores, codigos, len(niveles))
+    resultado = anova_resumen(n, medias, varianzas, alpha)
+    resultado.update(niveles=niveles, n=n, medias=medias, varianzas=varianzas)
+    return resultado
+
+
+# ANOVA factorial: el modelo lineal con factores categóricos solo depende de
+# los datos a través de (n, media, M2) de cada celda (combinación observada de
+# niveles), así que millones de filas se reducen primero a unas cientos de
+# celdas con reducciones agrupadas. La matriz de diseño (codificación de
+# tratamiento, una columna por nivel no de referencia y por producto de ellos
+# en las interacciones) se construye dispersa sobre las celdas, y cada modelo
+# se ajusta con las ecuaciones normales X'WX b = X'Wy, de tamaño columnas ×
+# columnas. Las celdas vacías dejan el diseño sin rango completo: se resuelve
+# con la pseudoinversa y los grados de libertad salen del rango.
+
+SS_TIPO_I = "Tipo I"
+SS_TIPO_II = "Tipo II"
+TIPOS_SS = [SS_TIPO_I, SS_TIPO_II]
+
+
+def resumen_celdas(valores, factores):
+    """(niveles, celdas, n, medias, M2) por combinación observada de niveles.
+
+    `factores` es una lista de arreglos de etiquetas alineados con `valores`;
+    `celdas` tiene una fila por celda con el código de nivel de cada factor.
+    """
+    valores = np.asarray(valores, dtype=float)
+    codificados = [codificar(factor) for factor in factores]
+    niveles = [niveles for niveles, _ in codificados]
+    dimensiones = tuple(len(n) for n in niveles)
+    combinados = np.ravel_multi_index([codigos for _, codigos in codificados], dimensiones)
+    observadas, codigo_celda = np.unique(combinados, return_inverse=True)
+    n, medias, varianzas = resumen_grupos(valores, codigo_celda, len(observadas))
+    celdas = np.column_stack(np.unravel_index(observadas, dimensiones))
+    return niveles, celdas, n, medias, varianzas * np.maximum(n - 1, 0)
+
+
+def terminos_factoriales(num_factores, orden_max=None):
+    """Efectos principales e interacciones hasta `orden_max` factores, por orden creciente."""
+    orden_max = num_factores if orden_max is None else orden_max
+    return [
+        termino
+        for orden in range(1, orden_max + 1)
+        for termino in itertools.combinations(range(num_factores), orden)
+    ]
+
+
+def _diseno_celdas(celdas, dimensiones, terminos):
+    # Matriz dispersa (celdas × columnas): intercepto y, para cada término, una
+    # columna por combinación de niveles distintos del de referencia (el 0)
+    filas, columnas = [np.arange(len(celdas))], [np.zeros(len(celdas), dtype=np.intp)]
+    bloques = [np.array([0])]
+    inicio = 1
+    for termino in terminos:
+        tamanos = tuple(dimensiones[f] - 1 for f in termino)
+        presentes = np.all(celdas[:, termino] > 0, axis=1)
+        filas.append(np.flatnonzero(presentes))
+        columnas.append(inicio + np.ravel_multi_index((celdas[presentes][:, termino] - 1).T, tamanos))
+        bloques.append(np.arange(inicio, inicio + int(np.prod(tamanos))))
+        inicio += int(np.prod(tamanos))
+    filas, columnas = np.concatenate(filas), np.concatenate(columnas)
+    diseno = sparse.csr_matrix((np.ones(len(filas)), (filas, columnas)), shape=(len(celdas), inicio))
+    return diseno, bloques
+
+
+def _suma_explicada(gram, cruzado, columnas):
+    # (SS explicada, rango) del modelo con esas columnas, por descomposición espectral
+    autovalores, autovectores = np.linalg.eigh(gram[np.ix_(columnas, columnas)])
+    utiles = autovalores > autovalores.max() * len(columnas) * 1e-12
+    proyeccion = autovectores[:, utiles].T @ cruzado[columnas]
+    return float(np.sum(proyeccion ** 2 / autovalores[utiles])), int(utiles.sum())
+
+
+def anova_factorial_resumen(celdas, dimensiones, n, medias, m2, terminos, tipo=SS_TIPO_II, alpha=0.05):
+    """Tabla ANOVA factorial a partir de los resúmenes por celda de `resumen_celdas`.
+
+    Tipo I suma los términos en el orden dado (secuencial). Tipo II compara
+    cada término con el modelo de todos los que no lo contienen.
+    """
+    if tipo not in TIPOS_SS:
+        raise ValueError(f"Tipo de suma de cuadrados desconocido: {tipo}")
+    n, medias, m2 = (np.asarray(v, dtype=float) for v in (n, medias, m2))
+    diseno, bloques = _diseno_celdas(np.asarray(celdas), dimensiones, terminos)
+    media_global = (n * medias).sum() / n.sum()
+    centradas = medias - media_global
+    gram = (diseno.T @ diseno.multiply(n[:, None])).toarray()
+    cruzado = diseno.T @ (n * centradas)
+    ss_total = float((n * centradas ** 2).sum() + m2.sum())
+
+    def ajuste(incluidos):
+        return _suma_explicada(gram, cruzado, np.concatenate([bloques[0]] + [bloques[1 + i] for i in incluidos]))
+
+    todos = range(len(terminos))
+    ss, df = np.empty(len(terminos)), np.empty(len(terminos))
+    for i in todos:
+        if tipo == SS_TIPO_I:
+            base = list(range(i))
+        else:
+            base = [j for j in todos if j != i and not set(terminos[i]) <= set(terminos[j])]
+        ss_base, rango_base = ajuste(base)
+        ss_con, rango_con = ajuste(base + [i])
+        ss[i], df[i] = max(ss_con - ss_base, 0.0), rango_con - rango_base
+
+    ss_modelo, rango_modelo = ajuste(list(todos))
+    df_residual = n.sum() - rango_modelo
+    ss_residual = max(ss_total - ss_modelo, 0.0)
+    ms_residual = ss_residual / df_residual
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ms = ss / df
+        F = ms / ms_residual
+        p = f.sf(F, df, df_residual)
+    return {
+        "ss": ss,
+        "df": df,
+        "ms": ms,
+        "F": F,
+        "p_valor": p,
+        "rechazo": p < alpha,
+        "ss_residual": ss_residual,
+        "df_residual": df_residual,
+        "ms_residual": ms_residual,
+        "ss_total": ss_total,
+        "df_total": n.sum() - 1,
+        "celdas": len(n),
+        "columnas": diseno.shape[1],
+    }
+
+
+def anova_factorial(valores, factores, orden_max=None, tipo=SS_TIPO_II, alpha=0.05):
+    """ANOVA factorial sobre datos en formato largo (valor y una columna por factor)."""
+    niveles, celdas, n, medias, m2 = resumen_celdas(valores, factores)
+    terminos = terminos_factoriales(len(factores), orden_max)
+    resultado = anova_factorial_resumen(celdas, [len(v) for v in niveles], n, medias, m2, terminos, tipo, alpha)
+    resultado.update(niveles=niveles, terminos=terminos)
+    return resultado
@@ -0,0 +1,356 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+# Lectura por bloques de archivos CSV, Parquet y .npy con estadísticos de
+# resumen acumulados en streaming. Cada bloque se reduce a (n, media, M2) y los
+# bloques se combinan con la fórmula de Chan et al., así que la memoria máxima
+# depende del tamaño de bloque y no del tamaño del archivo.
+
+FILAS_BLOQUE = 1_000_000
+FORMATOS = (".csv", ".parquet", ".npy")
+
+
+def _extension(fuente):
+    nombre = getattr(fuente, "name", fuente)
+    extension = Path(str(nombre)).suffix.lower()
+    if extension not in FORMATOS:
+        raise ValueError(f"Formato no soportado: '{extension}'. Usa uno de {', '.join(FORMATOS)}.")
+    return extension
+
+
+def _rebobinar(fuente):
+    if hasattr(fuente, "seek"):
+        fuente.seek(0)
+
+
+def _cargar_npy(fuente):
+    # Las rutas se abren como memmap: solo se leen del disco las filas de cada bloque
+    _rebobinar(fuente)
+    if isinstance(fuente, (str, Path)):
+        return np.load(fuente, mmap_mode="r")
+    return np.load(fuente)
+
+
+def _columnas_npy(arreglo):
+    if arreglo.dtype.names:
+        return list(arreglo.dtype.names)
+    if arreglo.ndim == 1:
+        return ["0"]
+    return [str(i) for i in range(arreglo.shape[1])]
+
+
+def columnas_disponibles(fuente):
+    extension = _extension(fuente)
+    _rebobinar(fuente)
+    if extension == ".csv":
+        import pandas as pd
+
+        columnas = list(pd.read_csv(fuente, nrows=0).columns)
+    elif extension == ".parquet":
+        columnas = _parquet(fuente).schema_arrow.names
+    else:
+        columnas = _columnas_npy(_cargar_npy(fuente))
+    _rebobinar(fuente)
+    return columnas
+
+
+def total_filas(fuente):
+    """Filas del archivo si se conocen sin leerlo (Parquet y .npy); None para CSV."""
+    extension = _extension(fuente)
+    if extension == ".csv":
+        return None
+    _rebobinar(fuente)
+    filas = _parquet(fuente).metadata.num_rows if extension == ".parquet" else len(_cargar_npy(fuente))
+    _rebobinar(fuente)
+    return filas
+
+
+def _parquet(fuente):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError("Leer Parquet requiere pyarrow: pip install pyarrow") from error
+    return pq.ParquetFile(fuente)
+
+
+def leer_bloques(fuente, columnas, filas_bloque=FILAS_BLOQUE):
+    """Genera diccionarios {columna: arreglo} con como mucho `filas_bloque` filas."""
+    extension = _extension(fuente)
+    _rebobinar(fuente)
+    if extension == ".csv":
+        import pandas as pd
+
+        for bloque in pd.read_csv(fuente, usecols=columnas, chunksize=filas_bloque):
+            yield {c: bloque[c].to_numpy() for c in columnas}
+    elif extension == ".parquet":
+        for lote in _parquet(fuente).iter_batches(batch_size=filas_bloque, columns=columnas):
+            yield {c: lote.column(c).to_numpy(zero_copy_only=False) for c in columnas}
+    else:
+        arreglo = _cargar_npy(fuente)
+        for inicio in range(0, len(arreglo), filas_bloque):
+            trozo = arreglo[inicio:inicio + filas_bloque]
+            if arreglo.dtype.names:
+                yield {c: np.asarray(trozo[c]) for c in columnas}
+            elif arreglo.ndim == 1:
+                yield {c: np.asarray(trozo) for c in columnas}
+            else:
+                yield {c: np.asarray(trozo[:, int(c)]) for c in columnas}
+
+
+def leer_tabla(fuente, columnas=None, filas_bloque=FILAS_BLOQUE):
+    """DataFrame con las columnas pedidas (todas por defecto), leído por bloques."""
+    import pandas as pd
+
+    columnas = columnas_disponibles(fuente) if columnas is None else list(columnas)
+    bloques = [pd.DataFrame(bloque) for bloque in leer_bloques(fuente, columnas, filas_bloque)]
+    return pd.concat(bloques, ignore_index=True) if bloques else pd.DataFrame(columns=columnas)
+
+
+def leer_nuevas_lineas(ruta, posicion=0):
+    """Líneas completas añadidas a un archivo desde el byte `posicion` (como `tail -f`).
+
+    Devuelve (lineas, nueva_posicion). Una última línea sin salto de línea se
+    deja para la próxima lectura; si el archivo se truncó se vuelve al inicio.
+    """
+    with open(ruta, "rb") as archivo:
+        archivo.seek(0, 2)
+        if archivo.tell() < posicion:
+            posicion = 0
+        archivo.seek(posicion)
+        datos = archivo.read()
+    fin = datos.rfind(b"\n") + 1
+    return datos[:fin].decode("utf-8", errors="replace").splitlines(), posicion + fin
+
+
+# Texto pegado por el usuario: números separados por comas, espacios, punto y
+# coma o saltos de línea. El resultado se guarda por hash del texto, así un
+# rerun que no cambió el texto no lo vuelve a convertir.
+
+MAX_TEXTOS_CACHE = 256
+# Comas y punto y coma pasan a espacios y se parte con str.split, que en C es
+# bastante más rápido que una expresión regular sobre textos largos
+_SEPARADORES = str.maketrans(",;", "  ")
+_textos = OrderedDict()
+_textos_lock = threading.Lock()
+
+
+def _convertir(texto):
+    tokens = texto.translate(_SEPARADORES).split()
+    if not tokens:
+        return np.empty(0)
+    try:
+        return np.array(tokens, dtype=float)
+    except ValueError:
+        # Solo en el camino de error se recorre token a token para señalar el culpable
+        for i, token in enumerate(tokens, start=1):
+            try:
+                float(token)
+            except ValueError:
+                raise ValueError(f"Valor no numérico '{token}' en la posición {i}.") from None
+        raise
+
+
+def parsear_numeros(texto):
+    """Arreglo (de solo lectura) con los números del texto; ValueError indica el token inválido."""
+    clave = hashlib.blake2b(texto.encode(), digest_size=16).digest()
+    with _textos_lock:
+        if clave in _textos:
+            _textos.move_to_end(clave)
+            return _textos[clave]
+    valores = _convertir(texto)
+    valores.setflags(write=False)
+    with _textos_lock:
+        _textos[clave] = valores
+        while len(_textos) > MAX_TEXTOS_CACHE:
+            _textos.popitem(last=False)
+    return valores
+
+
+# Estadísticos en streaming. Un resumen es la tupla (n, media, M2), donde M2 es
+# la suma de cuadrados de las desviaciones respecto a la media.
+
+RESUMEN_VACIO = (0, 0.0, 0.0)
+
+
+def resumen_bloque(valores):
+    valores = np.asarray(valores, dtype=float)
+    valores = valores[~np.isnan(valores)]
+    if len(valores) == 0:
+        return RESUMEN_VACIO
+    media = valores.mean()
+    return len(valores), media, np.sum((valores - media) ** 2)
+
+
+def combinar(a, b):
+    """Combina dos resúmenes (n, media, M2) sin volver a recorrer los datos (Chan et al.)."""
+    n_a, media_a, m2_a = a
+    n_b, media_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return RESUMEN_VACIO
+    delta = media_b - media_a
+    media = media_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / n
+    return n, media, m2
+
+
+def finalizar(resumen):
+    """Convierte (n, media, M2) en (n, media, desviación estándar muestral)."""
+    n, media, m2 = resumen
+    desv = np.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+    return n, media, desv
+
+
+def resumir(fuente, columnas, filas_bloque=FILAS_BLOQUE):
+    """(n, media, desviación) de cada columna, en una sola pasada por bloques."""
+    columnas = [columnas] if isinstance(columnas, str) else list(columnas)
+    resumenes = {c: RESUMEN_VACIO for c in columnas}
+    for bloque in leer_bloques(fuente, columnas, filas_bloque):
+        for c in columnas:
+            resumenes[c] = combinar(resumenes[c], resumen_bloque(bloque[c]))
+    return {c: finalizar(r) for c, r in resumenes.items()}
+
+
+def resumir_por_grupo(fuente, valor, grupo, filas_bloque=FILAS_BLOQUE):
+    """(niveles, n, medias, desviaciones) por grupo, combinando bloques en streaming.
+
+    Dentro de cada bloque los grupos se reducen con `bincount`; entre bloques
+    se combinan con la fórmula de Chan vectorizada sobre todos los grupos.
+    """
+    niveles = None
+    n = medias = m2 = None
+    for bloque in leer_bloques(fuente, [valor, grupo], filas_bloque):
+        valores = np.asarray(bloque[valor], dtype=float)
+        etiquetas = bloque[grupo]
+        validos = ~np.isnan(valores)
+        if etiquetas.dtype.kind == "f":
+            validos &= ~np.isnan(etiquetas)
+        elif etiquetas.dtype == object:
+            import pandas as pd
+
+            validos &= ~pd.isna(etiquetas)
+        valores, etiquetas = valores[validos], etiquetas[validos]
+        if len(valores) == 0:
+            continue
+
+        niveles_b, codigos = np.unique(etiquetas, return_inverse=True)
+        n_b = np.bincount(codigos, minlength=len(niveles_b)).astype(float)
+        medias_b = np.bincount(codigos, weights=valores, minlength=len(niveles_b)) / n_b
+        m2_b = np.bincount(codigos, weights=(valores - medias_b[codigos]) ** 2, minlength=len(niveles_b))
+
+        if niveles is None:
+            niveles, n, medias, m2 = niveles_b, n_b, medias_b, m2_b
+            continue
+
+        # Alinear grupos del bloque con los acumulados (pueden aparecer niveles nuevos)
+        todos = np.union1d(niveles, niveles_b)
+        n_t = np.zeros(len(todos))
+        medias_t = np.zeros(len(todos))
+        m2_t = np.zeros(len(todos))
+        pos = np.searchsorted(todos, niveles)
+        n_t[pos], medias_t[pos], m2_t[pos] = n, medias, m2
+
+        pos_b = np.searchsorted(todos, niveles_b)
+        n_a, media_a, m2_a = n_t[pos_b], medias_t[pos_b], m2_t[pos_b]
+        total = n_a + n_b
+        delta = medias_b - media_a
+        medias_t[pos_b] = media_a + delta * n_b / total
+        m2_t[pos_b] = m2_a + m2_b + delta ** 2 * n_a * n_b / total
+        n_t[pos_b] = total
+        niveles, n, medias, m2 = todos, n_t, medias_t, m2_t
+
+    if niveles is None:
+        raise ValueError("El archivo no contiene filas válidas.")
+    desviaciones = np.sqrt(np.where(n > 1, m2 / np.maximum(n - 1, 1), 0.0))
+    return niveles, n, medias, desviaciones
+
+
+def _avisar(avance, filas, total, **parcial):
+    # Progreso de una lectura por bloques para un trabajo en segundo plano
+    if avance is not None:
+        avance(filas / total if total else None, {"filas": filas, **parcial})
+
+
+def _combinar_celdas(a, b):
+    # Chan et al. sobre dos tablas (n, media, m2) indexadas por celda, alineando celdas nuevas
+    import pandas as pd
+
+    indice = a.index.union(b.index)
+    a = a.reindex(indice, fill_value=0.0)
+    b = b.reindex(indice, fill_value=0.0)
+    total = a["n"] + b["n"]
+    delta = b["media"] - a["media"]
+    return pd.DataFrame({
+        "n": total,
+        "media": a["media"] + delta * b["n"] / total,
+        "m2": a["m2"] + b["m2"] + delta ** 2 * a["n"] * b["n"] / total,
+    })
+
+
+def resumir_por_celdas(fuente, valor, factores, filas_bloque=FILAS_BLOQUE, avance=None):
+    """(niveles, celdas, n, medias, M2) por combinación de niveles de varios factores, en streaming.
+
+    Devuelve lo mismo que `inferencia.resumen_celdas`: una lista de niveles por
+    factor y una fila de códigos por celda observada. Cada bloque se agrupa con
+    pandas y los bloques se combinan con la fórmula de Chan alineando celdas.
+    `avance`, si se da, recibe el progreso tras cada bloque (ver `trabajos`).
+    """
+    import pandas as pd
+
+    factores = list(factores)
+    total_archivo = total_filas(fuente) if avance is not None else None
+    filas = 0
+    acumulado = None
+    for bloque in leer_bloques(fuente, [valor] + factores, filas_bloque):
+        filas += len(bloque[valor])
+        tabla = pd.DataFrame(bloque).dropna()
+        if len(tabla) > 0:
+            grupos = tabla.groupby(factores, sort=False)[valor]
+            nuevo = pd.DataFrame({"n": grupos.count().astype(float), "media": grupos.mean()})
+            nuevo["m2"] = grupos.var(ddof=0) * nuevo["n"]
+            acumulado = nuevo if acumulado is None else _combinar_celdas(acumulado, nuevo)
+        _avisar(avance, filas, total_archivo, celdas=0 if acumulado is None else len(acumulado))
+
+    if acumulado is None:
+        raise ValueError("El archivo no contiene filas válidas.")
+    codificados = [np.unique(acumulado.index.get_level_values(i), return_inverse=True)
+                   for i in range(len(factores))]
+    niveles = [niveles for niveles, _ in codificados]
+    celdas = np.column_stack([codigos for _, codigos in codificados])
+    return (niveles, celdas, acumulado["n"].to_numpy(), acumulado["media"].to_numpy(),
+            acumulado["m2"].to_numpy())
+
+
+def contar_pares(fuente, columna_a, columna_b, filas_bloque=FILAS_BLOQUE, avance=None):
+    """Tabla de contingencia dispersa de dos columnas categóricas leídas por bloques.
+
+    Solo se guardan los pares observados, así que la memoria crece con el
+    número de celdas no nulas y no con el de filas. Devuelve
+    (niveles_a, niveles_b, tabla CSR), igual que `inferencia.tabla_contingencia`.
+    `avance`, si se da, recibe el progreso tras cada bloque (ver `trabajos`).
+    """
+    import pandas as pd
+    from scipy import sparse
+
+    total_archivo = total_filas(fuente) if avance is not None else None
+    filas = 0
+    conteos = None
+    for bloque in leer_bloques(fuente, [columna_a, columna_b], filas_bloque):
+        filas += len(bloque[columna_a])
+        pares = pd.DataFrame({"a": bloque[columna_a], "b": bloque[columna_b]}).value_counts()
+        conteos = pares if conteos is None else conteos.add(pares, fill_value=0)
+        _avisar(avance, filas, total_archivo, celdas=len(conteos))
+    if conteos is None or len(conteos) == 0:
+        raise ValueError("El archivo no contiene filas válidas.")
+
+    niveles_a, codigos_a = np.unique(conteos.index.get_level_values("a"), return_inverse=True)
+    niveles_b, codigos_b = np.unique(conteos.index.get_level_values("b"), return_inverse=True)
+    tabla = sparse.coo_matrix(
+        (conteos.to_numpy().astype(np.int64), (codigos_a, codigos_b)),
+        shape=(len(niveles_a), len(niveles_b)),
+    ).tocsr()
+    return niveles_a, niveles_b, tabla
@@ -0,0 +1,235 @@
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Instrumentación opcional de los reruns. Solo la activa quien opera el
+# servidor, con la variable de entorno APP_DEV=1 (no un parámetro de la URL:
+# el panel escribe perfiles y métricas en disco); desactivada, `seccion()`
+# devuelve un contexto vacío y no mide nada.
+#
+# Cada rerun acumula el tiempo de sus secciones (importación de la página,
+# cálculo estadístico, construcción de figuras y serialización hacia el
+# navegador); lo que no cae en ninguna se reporta como "widgets_y_resto".
+# Al terminar el rerun se añade una línea JSON a APP_METRICAS o, con
+# APP_METRICAS_FORMATO=prometheus, se reescribe un archivo de texto con los
+# contadores acumulados para el textfile collector de node_exporter.
+#
+# Las páginas declaran sus unidades independientes con `fragmento` (un
+# `st.fragment` medido): al tocar un widget de un fragmento solo se vuelve a
+# ejecutar esa función, y ese rerun parcial se registra como
+# "<página> ▸ <fragmento>".
+
+VARIABLE_ENTORNO = "APP_DEV"
+FORMATO = os.environ.get("APP_METRICAS_FORMATO", "jsonl")
+RUTA_METRICAS = Path(os.environ.get("APP_METRICAS",
+                                    "metricas_app.prom" if FORMATO == "prometheus" else "metricas_app.jsonl"))
+DIRECTORIO_PERFILES = Path(os.environ.get("APP_PERFILES", "perfiles"))
+SECCIONES = ["importacion", "calculo", "figura", "serializacion", "widgets_y_resto"]
+MAX_HISTORIAL = 20
+
+_CLAVE = "_instrumentacion"
+_CLAVE_FRAGMENTOS = "_fragmentos"
+_lock = threading.Lock()
+# Contadores por proceso para el formato Prometheus: (pagina, seccion) -> segundos
+_segundos = {}
+_reruns = {}
+
+
+def habilitada():
+    return os.environ.get(VARIABLE_ENTORNO) == "1"
+
+
+def iniciar_rerun(pagina):
+    """Abre el registro del rerun actual (o lo borra si la instrumentación está apagada)."""
+    if not habilitada():
+        st.session_state.pop(_CLAVE, None)
+        return
+    st.session_state.setdefault("_instrumentacion_sesion", uuid.uuid4().hex[:8])
+    st.session_state[_CLAVE] = {"pagina": pagina, "inicio": time.perf_counter(),
+                                "secciones": dict.fromkeys(SECCIONES[:-1], 0.0)}
+
+
+def _registro():
+    registro = st.session_state.get(_CLAVE)
+    return None if registro is None or registro.get("cerrado") else registro
+
+
+@contextmanager
+def _medir(registro, nombre):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registro["secciones"][nombre] = registro["secciones"].get(nombre, 0.0) + time.perf_counter() - inicio
+
+
+def seccion(nombre):
+    """Contexto que suma su duración a la sección `nombre` del rerun actual."""
+    registro = _registro()
+    return nullcontext() if registro is None else _medir(registro, nombre)
+
+
+def marcar_inicio_figura():
+    # La figura se construye entre `graficos.subplots` y `graficos.mostrar`
+    registro = _registro()
+    if registro is not None:
+        registro["_figura_desde"] = time.perf_counter()
+
+
+def marcar_fin_figura():
+    registro = _registro()
+    if registro is not None and "_figura_desde" in registro:
+        registro["secciones"]["figura"] += time.perf_counter() - registro.pop("_figura_desde")
+
+
+def ejecutar_pagina(run):
+    """Ejecuta `run()`; si se pidió un perfil para este rerun, lo hace bajo cProfile."""
+    registro = _registro()
+    if registro is None or not st.session_state.get("_perfil_pendiente"):
+        run()
+        return
+    st.session_state["_perfil_pendiente"] = False
+    # El widget todavía no se ha creado en este rerun, así que se puede desmarcar
+    st.session_state["_dev_perfilar"] = False
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        run()
+    finally:
+        perfil.disable()
+        DIRECTORIO_PERFILES.mkdir(parents=True, exist_ok=True)
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S")
+        ruta = DIRECTORIO_PERFILES / f"rerun_{marca}_{registro['pagina'].replace(' ', '_')}.pstats"
+        perfil.dump_stats(ruta)
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats("cumulative").print_stats(25)
+        st.session_state["_ultimo_perfil"] = {"ruta": str(ruta), "resumen": texto.getvalue()}
+
+
+def _ids_widgets(ctx):
+    # Detalle interno de Streamlit, solo informativo: si cambia de sitio el conjunto queda vacío
+    ids = getattr(getattr(ctx, "shared", ctx), "widget_ids_this_run", None)
+    if ids is None:
+        return frozenset()
+    return ids.snapshot() if hasattr(ids, "snapshot") else frozenset(ids)
+
+
+def fragmento(funcion):
+    """Decorador: `st.fragment` que además mide cada ejecución de la función.
+
+    En `st.session_state["_fragmentos"]` queda, por fragmento, la duración de
+    su última ejecución y los widgets que creó (lo usa el benchmark de
+    latencia). Si la instrumentación está activa y el rerun es solo del
+    fragmento, se abre un registro propio para él.
+    """
+    nombre = funcion.__name__.lstrip("_")
+
+    @functools.wraps(funcion)
+    def medida(*args, **kwargs):
+        ctx = get_script_run_ctx()
+        antes = _ids_widgets(ctx)
+        anterior = st.session_state.get(_CLAVE)
+        propio = (anterior is not None and anterior.get("cerrado") and habilitada()
+                  and ctx is not None and bool(ctx.fragment_ids_this_run))
+        if propio:
+            base = anterior.get("base", anterior["pagina"])
+            iniciar_rerun(f"{base} ▸ {nombre}")
+            st.session_state[_CLAVE]["base"] = base
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            duracion = time.perf_counter() - inicio
+            creados = _ids_widgets(ctx) - antes
+            st.session_state.setdefault(_CLAVE_FRAGMENTOS, {})[nombre] = {
+                "ms": duracion * 1000, "widgets": creados}
+            if propio:
+                finalizar_rerun()
+
+    return st.fragment(medida)
+
+
+def finalizar_rerun():
+    """Cierra el registro, lo guarda en el archivo de métricas y devuelve la fila del rerun."""
+    registro = _registro()
+    if registro is None:
+        return None
+    registro["cerrado"] = True
+    total = time.perf_counter() - registro["inicio"]
+    secciones = dict(registro["secciones"])
+    secciones["widgets_y_resto"] = max(0.0, total - sum(secciones.values()))
+    fila = {
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "sesion": st.session_state["_instrumentacion_sesion"],
+        "pagina": registro["pagina"],
+        "total_ms": round(total * 1000, 3),
+        **{f"{s}_ms": round(secciones[s] * 1000, 3) for s in SECCIONES},
+    }
+    historial = st.session_state.setdefault("_instrumentacion_historial", [])
+    historial.append(fila)
+    del historial[:-MAX_HISTORIAL]
+    try:
+        _escribir(fila, secciones)
+    except OSError as e:
+        fila["error_escritura"] = str(e)
+    return fila
+
+
+def _escribir(fila, secciones):
+    with _lock:
+        if FORMATO != "prometheus":
+            with open(RUTA_METRICAS, "a", encoding="utf-8") as archivo:
+                archivo.write(json.dumps(fila, ensure_ascii=False) + "\n")
+            return
+        pagina = fila["pagina"]
+        _reruns[pagina] = _reruns.get(pagina, 0) + 1
+        for nombre, segundos in secciones.items():
+            _segundos[(pagina, nombre)] = _segundos.get((pagina, nombre), 0.0) + segundos
+        lineas = [
+            "# HELP app_reruns_total Reruns instrumentados por página.",
+            "# TYPE app_reruns_total counter",
+            *(f'app_reruns_total{{pagina="{p}"}} {n}' for p, n in sorted(_reruns.items())),
+            "# HELP app_seccion_segundos_total Tiempo acumulado por sección de los reruns.",
+            "# TYPE app_seccion_segundos_total counter",
+            *(f'app_seccion_segundos_total{{pagina="{p}",seccion="{s}"}} {v:.6f}'
+              for (p, s), v in sorted(_segundos.items())),
+        ]
+        # Escritura atómica: el collector nunca lee un archivo a medias
+        temporal = RUTA_METRICAS.with_suffix(RUTA_METRICAS.suffix + ".tmp")
+        temporal.write_text("\n".join(lineas) + "\n", encoding="utf-8")
+        os.replace(temporal, RUTA_METRICAS)
+
+
+def panel(fila):
+    """Panel de desarrollador en la barra lateral con los tiempos y el perfilador."""
+    if fila is None:
+        return
+    with st.sidebar.expander("🛠️ Desarrollador", expanded=True):
+        st.caption(f"Último rerun: {fila['total_ms']:.1f} ms")
+        st.dataframe({s: [fila[f"{s}_ms"]] for s in SECCIONES}, hide_index=True)
+        historial = st.session_state.get("_instrumentacion_historial", [])
+        if len(historial) > 1:
+            st.line_chart({"total_ms": [f["total_ms"] for f in historial]}, height=120)
+        st.caption(f"Métricas en {RUTA_METRICAS} ({FORMATO}).")
+
+        st.checkbox("Perfilar el próximo rerun (cProfile)", key="_dev_perfilar")
+        st.session_state["_perfil_pendiente"] = st.session_state["_dev_perfilar"]
+        perfil = st.session_state.get("_ultimo_perfil")
+        if perfil is not None:
+            st.caption(f"Perfil guardado en {perfil['ruta']}")
+            st.code(perfil["resumen"], language=None)
+            with open(perfil["ruta"], "rb") as archivo:
+                st.download_button("Descargar .pstats", archivo.read(), file_name=Path(perfil["ruta"]).name,
+                                   key="_dev_descargar_perfil")
@@ -0,0 +1,227 @@
+import functools
+
+import numpy as np
+from scipy.special import ndtr
+from scipy.stats import t
+
+import inferencia
+
+# Comparaciones post-hoc por pares después de un ANOVA de un factor, a partir
+# de los mismos (n, media, varianza) por grupo que usa `inferencia.anova_resumen`.
+#
+# Los k(k-1)/2 pares son el triángulo superior de la matriz de grupos
+# (`np.triu_indices`): diferencias, errores estándar, grados de libertad y
+# p-valores se calculan como arreglos, sin bucles por par, así que k = 200
+# (19 900 pares) se resuelve en una llamada.
+#
+# Tukey HSD (Tukey-Kramer con tamaños distintos) y Games-Howell usan la
+# distribución del rango studentizado. scipy la evalúa con una integral doble
+# por valor (~10 ms cada una), demasiado para miles de pares, así que aquí se
+# separa en dos pasos:
+#   1. la cola con df = ∞, P(Q > w), sobre una rejilla de w, una sola vez por k;
+#   2. la mezcla sobre s = χ_df / √df, con una regla del trapecio en log s sobre
+#      nodos adaptados al df. Tukey tiene un solo df y su cola se tabula sobre
+#      la misma rejilla; Games-Howell tiene un df por par y se integra por par.
+# La cola con df = ∞ se calcula como diferencia de potencias con expm1/log1p,
+# sin restar de 1, de modo que los p-valores pequeños conservan precisión.
+#
+# La visualización con letras (compact letter display) resume la matriz de
+# decisiones: dos grupos comparten una letra si y solo si no difieren.
+
+METODOS_POSTHOC = ["Tukey HSD", "Games-Howell", "Bonferroni"]
+
+# Rejilla de w para la cola con df = ∞; por encima de W_MAX la cola es < 1e-20
+W_MAX = 24.0
+PUNTOS_W = 1201
+# Nodos en z para la integral interior y en log s para la mezcla sobre df
+PUNTOS_Z = 801
+PUNTOS_S = 61
+# Con pocos grados de libertad la densidad de log s es muy ancha y necesita más nodos
+DF_POCOS = 8.0
+PUNTOS_S_POCOS_DF = 241
+# Las colas de la densidad de log s se cortan donde caen por debajo de e^-40
+CORTE_LOG = 40.0
+# Hasta este número de df distintos se tabula la cola de cada uno sobre la rejilla
+DF_DISTINTOS_TABLA = 8
+# Con más grados de libertad la mezcla sobre s no cambia el resultado
+DF_INFINITO = 1e6
+
+
+def _cola_rango_infinito(w, k):
+    # P(Q > w) con df = ∞: k ∫ φ(z) [Φ(z)^(k-1) - (Φ(z) - Φ(z - w))^(k-1)] dz
+    z = np.linspace(-9.0, 9.0 + np.sqrt(2 * np.log(k)), PUNTOS_Z)
+    arriba = ndtr(z)
+    abajo = ndtr(z - np.asarray(w, dtype=float)[..., None])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diferencia = -np.expm1((k - 1) * np.log1p(-abajo / arriba))
+    integrando = np.exp(-z ** 2 / 2) / np.sqrt(2 * np.pi) * arriba ** (k - 1) * np.nan_to_num(diferencia)
+    return np.clip(k * np.trapezoid(integrando, z, axis=-1), 0.0, 1.0)
+
+
+@functools.lru_cache(maxsize=32)
+def _log_cola_infinita(k):
+    # log P(Q > w) con df = ∞ sobre la rejilla; se memoriza por k entre llamadas y sesiones
+    with np.errstate(divide="ignore"):
+        log_cola = np.log(_cola_rango_infinito(np.linspace(0.0, W_MAX, PUNTOS_W), k))
+    log_cola.setflags(write=False)
+    return log_cola
+
+
+def _limites_log_s(df):
+    # Puntos donde la densidad de x = log s cae e^-CORTE_LOG bajo su moda (x = 0):
+    # df · (x + (1 - e^(2x)) / 2) = -CORTE_LOG, resuelto por iteración de punto fijo
+    c = CORTE_LOG / df
+    izquierda = -np.sqrt(2 * c)
+    derecha = np.sqrt(2 * c)
+    for _ in range(60):
+        izquierda = -c - (1 - np.exp(2 * izquierda)) / 2
+        derecha = 0.5 * np.log1p(2 * derecha + 2 * c)
+    return izquierda, derecha
+
+
+def _mezcla(q, df, cola, puntos):
+    # E[cola(q·s)] con s = χ_df / √df, integrando en x = log s con nodos por df
+    izquierda, derecha = _limites_log_s(df)
+    x = izquierda[:, None] + (derecha - izquierda)[:, None] * np.linspace(0.0, 1.0, puntos)
+    # Densidad de log s, salvo constante: df·x - df·e^(2x)/2 (máximo 0 en x = 0)
+    pesos = np.exp(df[:, None] * (x + (1 - np.exp(2 * x)) / 2))
+    pesos[:, [0, -1]] /= 2
+    return (pesos * cola(q[:, None] * np.exp(x))).sum(axis=-1) / pesos.sum(axis=-1)
+
+
+def rango_studentizado_sf(q, k, df):
+    """P(Q > q) del rango studentizado con k medias y df grados de libertad.
+
+    `q` y `df` admiten arreglos (con broadcasting); `k` es un único entero.
+    """
+    q, df = np.broadcast_arrays(np.asarray(q, dtype=float), np.asarray(df, dtype=float))
+    rejilla = np.linspace(0.0, W_MAX, PUNTOS_W)
+    log_cola = _log_cola_infinita(int(k))
+
+    def cola(w):
+        return np.where(w >= W_MAX, 0.0, np.exp(np.interp(w, rejilla, log_cola)))
+
+    resultado = np.where(q <= 0, 1.0, cola(np.abs(q)))
+    finitos = np.isfinite(df) & (df < DF_INFINITO) & (q > 0)
+    distintos, cual = np.unique(df[finitos], return_inverse=True)
+    if len(distintos) <= DF_DISTINTOS_TABLA:
+        # Pocos df (Tukey tiene uno): la cola de cada df se tabula sobre la
+        # rejilla y los pares solo interpolan
+        for indice, nu in enumerate(distintos):
+            puntos = PUNTOS_S_POCOS_DF if nu < DF_POCOS else PUNTOS_S
+            with np.errstate(divide="ignore"):
+                log_tabla = np.log(_mezcla(rejilla, np.array([nu]), cola, puntos))
+            elegidos = np.flatnonzero(finitos)[cual == indice]
+            resultado.flat[elegidos] = np.exp(np.interp(q.flat[elegidos], rejilla, log_tabla))
+    else:
+        for grupo, puntos in ((finitos & (df < DF_POCOS), PUNTOS_S_POCOS_DF), (finitos & (df >= DF_POCOS), PUNTOS_S)):
+            if np.any(grupo):
+                resultado[grupo] = _mezcla(q[grupo], df[grupo], cola, puntos)
+    return inferencia._escalar({"sf": np.clip(resultado, 0.0, 1.0)})["sf"]
+
+
+def comparaciones_por_pares(n, medias, varianzas, alpha=0.05, metodo="Tukey HSD"):
+    """Todas las comparaciones entre pares de grupos (triángulo superior i < j).
+
+    Tukey HSD y Bonferroni usan la varianza combinada del ANOVA (MS dentro);
+    Games-Howell usa las varianzas de cada grupo y df de Welch por par.
+    """
+    if metodo not in METODOS_POSTHOC:
+        raise ValueError(f"Método post-hoc desconocido: {metodo}")
+    n, medias, varianzas = (np.asarray(v, dtype=float) for v in (n, medias, varianzas))
+    k = len(n)
+    if k < 2:
+        raise ValueError("Se necesitan al menos 2 grupos.")
+    i, j = np.triu_indices(k, 1)
+    diferencia = medias[i] - medias[j]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if metodo == "Games-Howell":
+            a, b = varianzas[i] / n[i], varianzas[j] / n[j]
+            error_estandar = np.sqrt(a + b)
+            df = (a + b) ** 2 / (a ** 2 / (n[i] - 1) + b ** 2 / (n[j] - 1))
+        else:
+            ms_within = ((n - 1) * varianzas).sum() / (n.sum() - k)
+            error_estandar = np.sqrt(ms_within * (1 / n[i] + 1 / n[j]))
+            df = np.full(len(i), n.sum() - k)
+
+        if metodo == "Bonferroni":
+            estadistico = diferencia / error_estandar
+            p = inferencia.ajustar_p_valores(2 * t.sf(np.abs(estadistico), df), "Bonferroni")
+        else:
+            # q = |Δ| / √(EE² / 2): el rango studentizado de dos medias
+            estadistico = np.abs(diferencia) / error_estandar * np.sqrt(2)
+            p = rango_studentizado_sf(estadistico, k, df)
+    return {
+        "i": i,
+        "j": j,
+        "diferencia": diferencia,
+        "error_estandar": error_estandar,
+        "estadistico": estadistico,
+        "df": df,
+        "p_valor": p,
+        "rechazo": p < alpha,
+    }
+
+
+def _nombre_letra(indice):
+    # a … z, A … Z, aa, ab, …
+    alfabeto = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    nombre = ""
+    indice += 1
+    while indice > 0:
+        indice, resto = divmod(indice - 1, len(alfabeto))
+        nombre = alfabeto[resto] + nombre
+    return nombre
+
+
+def letras_compactas(medias, i, j, rechazo):
+    """Letras por grupo a partir de las decisiones por pares.
+
+    Devuelve una lista de cadenas alineada con `medias`; dos grupos comparten
+    alguna letra si y solo si su diferencia no es significativa. Las letras se
+    asignan de la media más alta a la más baja.
+    """
+    medias = np.asarray(medias, dtype=float)
+    k = len(medias)
+    orden = np.argsort(-medias, kind="stable")
+    # Matriz de "no difieren" en el orden de las medias (diagonal incluida)
+    iguales = np.ones((k, k), dtype=bool)
+    iguales[i[rechazo], j[rechazo]] = False
+    iguales[j[rechazo], i[rechazo]] = False
+    iguales = iguales[np.ix_(orden, orden)]
+
+    # Cada letra es un conjunto de grupos que no difieren entre sí. Se abre una
+    # letra con el primer par aún sin letra común y se completa recorriendo las
+    # medias en orden con los grupos compatibles con todos sus miembros, hasta
+    # cubrir todos los pares no significativos (y los grupos aislados).
+    pendientes = iguales.copy()
+    columnas = []
+    while pendientes.any():
+        a = int(np.flatnonzero(pendientes.any(axis=1))[0])
+        b = int(np.flatnonzero(pendientes[a])[-1])
+        columna = np.zeros(k, dtype=bool)
+        candidatos = iguales[a] & iguales[b]
+        for c in np.flatnonzero(candidatos):
+            if candidatos[c]:
+                columna[c] = True
+                candidatos &= iguales[c]
+        pendientes &= ~(columna[:, None] & columna[None, :])
+        columnas.append(columna)
+
+    # Quita las letras cuyos pares ya quedan cubiertos por otras
+    columnas = np.array(columnas).T
+    cobertura = columnas.astype(np.int32) @ columnas.T.astype(np.int32)
+    for c in range(columnas.shape[1] - 1, -1, -1):
+        miembros = np.flatnonzero(columnas[:, c])
+        if (cobertura[np.ix_(miembros, miembros)] > 1).all():
+            cobertura[np.ix_(miembros, miembros)] -= 1
+            columnas[:, c] = False
+    columnas = columnas[:, columnas.any(axis=0)]
+
+    nombres = [_nombre_letra(c) for c in range(columnas.shape[1])]
+    separador = "" if columnas.shape[1] <= 52 else " "
+    letras = [""] * k
+    for posicion, grupo in enumerate(orden):
+        letras[grupo] = separador.join(nombres[c] for c in np.flatnonzero(columnas[posicion]))
+    return letras
@@ -0,0 +1,175 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.stats import nct, norm
+
+import inferencia
+
+# Potencia (1 - β) de las pruebas Z y t para una media, las mismas del
+# "Ejemplo interactivo" del bloque 2. Todas las entradas admiten arreglos con
+# broadcasting, así que una rejilla completa (n × efecto × α) se evalúa en una
+# sola llamada. El efecto es el tamaño estandarizado d = (μ - μ₀) / σ.
+
+
+def potencia_media(n, efecto, alpha=0.05, cola=inferencia.DOS_COLAS, sigma_conocida=True):
+    """Probabilidad de rechazar H₀ cuando el efecto verdadero es `efecto`.
+
+    Con σ conocida el estadístico sigue una normal desplazada d·√n; con σ
+    desconocida, una t no central con df = n - 1 y parámetro de no centralidad d·√n.
+    """
+    n, efecto, alpha = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (n, efecto, alpha)))
+    codigo = inferencia._codigo_cola(cola)
+    desplazamiento = efecto * np.sqrt(n)
+    if sigma_conocida:
+        potencia = _potencia_z(desplazamiento, alpha, codigo)
+    else:
+        potencia = _potencia_t(desplazamiento, n - 1, alpha, codigo)
+    return _resultado(potencia)
+
+
+def _resultado(valores):
+    return valores.item() if np.ndim(valores) == 0 else valores
+
+
+def _potencia_z(desplazamiento, alpha, codigo):
+    critico = inferencia.valor_critico(alpha, codigo)
+    derecha = norm.sf(critico - desplazamiento)
+    izquierda = norm.cdf(critico - desplazamiento)
+    dos = norm.sf(critico - desplazamiento) + norm.cdf(-critico - desplazamiento)
+    return np.where(codigo == 0, dos, np.where(codigo == 1, derecha, izquierda))
+
+
+def _potencia_t(desplazamiento, df, alpha, codigo):
+    critico = inferencia.valor_critico(alpha, codigo, df)
+    derecha = nct.sf(critico, df, desplazamiento)
+    izquierda = nct.cdf(critico, df, desplazamiento)
+    dos = nct.sf(critico, df, desplazamiento) + nct.cdf(-critico, df, desplazamiento)
+    return np.where(codigo == 0, dos, np.where(codigo == 1, derecha, izquierda))
+
+
+def _welch(n1, n2, desv1, desv2):
+    # Error estándar y grados de libertad de Welch-Satterthwaite
+    v1, v2 = desv1 ** 2 / n1, desv2 ** 2 / n2
+    return np.sqrt(v1 + v2), (v1 + v2) ** 2 / (v1 ** 2 / (n1 - 1) + v2 ** 2 / (n2 - 1))
+
+
+def potencia_dos_medias(n1, diferencia, desv1, desv2, alpha=0.05, cola=inferencia.DOS_COLAS, razon=1.0):
+    """Potencia de la prueba t de Welch con n1 y n2 = ⌈razon · n1⌉ observaciones."""
+    n1, diferencia, desv1, desv2, alpha, razon = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (n1, diferencia, desv1, desv2, alpha, razon))
+    )
+    n2 = np.maximum(np.ceil(razon * n1), 2)
+    error_estandar, df = _welch(n1, n2, desv1, desv2)
+    return _resultado(_potencia_t(diferencia / error_estandar, df, alpha, inferencia._codigo_cola(cola)))
+
+
+def potencia_proporcion(n, p0, p1, alpha=0.05, cola=inferencia.DOS_COLAS):
+    """Potencia de la prueba Z para una proporción (aproximación normal) si la verdadera es p1."""
+    n, p0, p1, alpha = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (n, p0, p1, alpha)))
+    codigo = inferencia._codigo_cola(cola)
+    critico = inferencia.valor_critico(alpha, codigo)
+    # El estadístico usa el error estándar bajo H₀; p̂ se distribuye con el de p1
+    se0 = np.sqrt(p0 * (1 - p0) / n)
+    se1 = np.sqrt(p1 * (1 - p1) / n)
+    derecha = norm.sf((critico * se0 - (p1 - p0)) / se1)
+    izquierda = norm.cdf((critico * se0 - (p1 - p0)) / se1)
+    dos = norm.sf((critico * se0 - (p1 - p0)) / se1) + norm.cdf((-critico * se0 - (p1 - p0)) / se1)
+    return _resultado(np.where(codigo == 0, dos, np.where(codigo == 1, derecha, izquierda)))
+
+
+@lru_cache(maxsize=256)
+def _rejilla(ns, efectos, alphas, cola, sigma_conocida):
+    potencia = potencia_media(np.array(ns)[:, None, None], np.array(efectos)[None, :, None],
+                              np.array(alphas)[None, None, :], cola, sigma_conocida)
+    potencia.setflags(write=False)
+    return potencia
+
+
+def rejilla_potencia(ns, efectos, alphas, cola=inferencia.DOS_COLAS, sigma_conocida=True):
+    """Potencia sobre la rejilla ns × efectos × alphas, con forma (len(ns), len(efectos), len(alphas)).
+
+    El resultado se memoriza por proceso (compartido entre sesiones) y es de
+    solo lectura; explorar la misma rejilla otra vez no recalcula nada.
+    """
+    return _rejilla(tuple(np.atleast_1d(ns).tolist()), tuple(np.atleast_1d(efectos).tolist()),
+                    tuple(np.atleast_1d(alphas).tolist()), cola, bool(sigma_conocida))
+
+
+# Tamaño de muestra: el n mínimo que cumple una condición monótona en n
+# (potencia ≥ objetivo o margen de error ≤ máximo). Cada celda de la tabla se
+# resuelve a la vez: primero se duplica n hasta acotar la solución y después se
+# hace bisección sobre enteros, evaluando la función vectorizada en cada paso.
+
+N_MAX = 10_000_000
+
+
+def _n_minimo(cumple, forma, n_min=2, n_max=N_MAX):
+    """Menor entero n en [n_min, n_max] con cumple(n) verdadero; NaN si no existe."""
+    lo = np.full(forma, n_min - 1, dtype=np.int64)
+    hi = np.full(forma, n_min, dtype=np.int64)
+    ok = cumple(hi)
+    while True:
+        pendientes = ~ok & (hi < n_max)
+        if not np.any(pendientes):
+            break
+        lo = np.where(pendientes, hi, lo)
+        hi = np.where(pendientes, np.minimum(hi * 2, n_max), hi)
+        ok = cumple(hi)
+
+    # Invariante: cumple(lo) es falso (o lo = n_min - 1) y cumple(hi) es verdadero
+    while np.any(ok & (hi - lo > 1)):
+        medio = (lo + hi) // 2
+        ok_medio = cumple(np.maximum(medio, n_min))
+        hi = np.where(ok & ok_medio, medio, hi)
+        lo = np.where(ok & ~ok_medio, medio, lo)
+    return _resultado(np.where(ok, hi, np.nan))
+
+
+def n_una_media(efecto, alpha=0.05, objetivo=0.8, cola=inferencia.DOS_COLAS, sigma_conocida=True):
+    """n mínimo para detectar el efecto estandarizado d con la potencia objetivo."""
+    efecto, alpha, objetivo = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (efecto, alpha, objetivo)))
+    return _n_minimo(lambda n: potencia_media(n, efecto, alpha, cola, sigma_conocida) >= objetivo, efecto.shape)
+
+
+def n_dos_medias(diferencia, desv1, desv2, alpha=0.05, objetivo=0.8, cola=inferencia.DOS_COLAS, razon=1.0):
+    """n1 mínimo (con n2 = ⌈razon · n1⌉) para la prueba de Welch."""
+    diferencia, desv1, desv2, alpha, objetivo, razon = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (diferencia, desv1, desv2, alpha, objetivo, razon))
+    )
+    return _n_minimo(lambda n: potencia_dos_medias(n, diferencia, desv1, desv2, alpha, cola, razon) >= objetivo,
+                     diferencia.shape)
+
+
+def n_proporcion(p0, p1, alpha=0.05, objetivo=0.8, cola=inferencia.DOS_COLAS):
+    """n mínimo para que la prueba Z de una proporción detecte p1 frente a p0."""
+    p0, p1, alpha, objetivo = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (p0, p1, alpha, objetivo)))
+    return _n_minimo(lambda n: potencia_proporcion(n, p0, p1, alpha, cola) >= objetivo, p0.shape, n_min=1)
+
+
+def n_margen_media(desv, margen, confianza=0.95, sigma_conocida=True):
+    """n mínimo para que el IC de la media tenga semiamplitud ≤ margen."""
+    desv, margen, confianza = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (desv, margen, confianza)))
+
+    def cumple(n):
+        df = None if sigma_conocida else n - 1
+        return inferencia.valor_critico(1 - confianza, inferencia.DOS_COLAS, df) * desv / np.sqrt(n) <= margen
+    return _n_minimo(cumple, desv.shape)
+
+
+def n_margen_dos_medias(desv1, desv2, margen, confianza=0.95, razon=1.0):
+    """n1 mínimo (n2 = ⌈razon · n1⌉) para que el IC de Welch de μ₁ - μ₂ tenga semiamplitud ≤ margen."""
+    desv1, desv2, margen, confianza, razon = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (desv1, desv2, margen, confianza, razon))
+    )
+
+    def cumple(n):
+        error_estandar, df = _welch(n, np.maximum(np.ceil(razon * n), 2), desv1, desv2)
+        return inferencia.valor_critico(1 - confianza, inferencia.DOS_COLAS, df) * error_estandar <= margen
+    return _n_minimo(cumple, desv1.shape)
+
+
+def n_margen_proporcion(p, margen, confianza=0.95):
+    """n mínimo para que el IC (Wald) de una proporción tenga semiamplitud ≤ margen."""
+    p, margen, confianza = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (p, margen, confianza)))
+    critico = inferencia.valor_critico(1 - confianza)
+    return _n_minimo(lambda n: critico * np.sqrt(p * (1 - p) / n) <= margen, p.shape, n_min=1)
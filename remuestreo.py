@@ -0,0 +1,229 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import norm
+
+import inferencia
+
+# Bootstrap y pruebas de permutación para la diferencia de medias de dos
+# muestras (independientes o apareadas) a partir de los datos crudos.
+#
+# Los remuestreos se generan por bloques de como mucho `max_elementos` números
+# aleatorios, así que la memoria máxima no depende del número de remuestreos.
+# El trabajo se reparte en tareas de tamaño fijo, cada una con su propio
+# generador derivado de la semilla (SeedSequence.spawn): el resultado es el
+# mismo con uno o con varios procesos.
+#
+# Cuando una muestra tiene pocos valores distintos (0/1, escalas Likert,
+# conteos) se remuestrean las frecuencias en lugar de los índices: multinomial
+# para el bootstrap, hipergeométrica multivariante para la permutación y
+# binomial para el cambio de signo. Es exacto y cuesta O(valores distintos)
+# por remuestreo en lugar de O(n).
+
+MAX_ELEMENTOS_BLOQUE = 2_000_000
+REMUESTREOS_POR_TAREA = 20_000
+# Por debajo de este número de elementos aleatorios no compensa arrancar procesos
+UMBRAL_PARALELO = 50_000_000
+
+
+def _preparar(valores):
+    valores = np.asarray(valores, dtype=float)
+    distintos, conteos = np.unique(valores, return_counts=True)
+    if len(distintos) * 8 <= len(valores):
+        return {"n": len(valores), "distintos": distintos, "conteos": conteos}
+    return {"n": len(valores), "valores": valores}
+
+
+def _costo(muestra):
+    # Números aleatorios por remuestreo
+    return len(muestra["distintos"]) if "distintos" in muestra else muestra["n"]
+
+
+def _medias_bootstrap(muestra, rng, filas):
+    n = muestra["n"]
+    if "distintos" in muestra:
+        frecuencias = rng.multinomial(n, muestra["conteos"] / n, size=filas)
+        return frecuencias @ muestra["distintos"] / n
+    return muestra["valores"][rng.integers(0, n, size=(filas, n))].mean(axis=1)
+
+
+def _signos(muestra, rng, filas):
+    # Media de las diferencias con signos aleatorios (H₀: diferencias simétricas en 0)
+    n = muestra["n"]
+    if "distintos" in muestra:
+        positivos = rng.binomial(muestra["conteos"], 0.5, size=(filas, len(muestra["conteos"])))
+        return (2 * positivos - muestra["conteos"]) @ muestra["distintos"] / n
+    signos = rng.integers(0, 2, size=(filas, n), dtype=np.int8) * 2 - 1
+    return (signos * muestra["valores"]).mean(axis=1)
+
+
+def _permutaciones(conjunta, n1, rng, filas):
+    # Diferencia de medias al repartir al azar la muestra conjunta en n1 y n2
+    n2 = conjunta["n"] - n1
+    if "distintos" in conjunta:
+        frecuencias = rng.multivariate_hypergeometric(conjunta["conteos"], n1, size=filas)
+        suma1 = frecuencias @ conjunta["distintos"]
+        total = conjunta["conteos"] @ conjunta["distintos"]
+    else:
+        valores = conjunta["valores"]
+        suma1 = rng.permuted(np.broadcast_to(valores, (filas, len(valores))), axis=1)[:, :n1].sum(axis=1)
+        total = valores.sum()
+    return suma1 / n1 - (total - suma1) / n2
+
+
+def _tarea(datos, semilla, repeticiones, max_elementos):
+    """Estadísticos de `repeticiones` remuestreos, generados por bloques."""
+    rng = np.random.default_rng(semilla)
+    tipo = datos["tipo"]
+    filas_bloque = max(1, max_elementos // max(1, datos["costo"]))
+    partes = []
+    restantes = repeticiones
+    while restantes > 0:
+        filas = min(filas_bloque, restantes)
+        if tipo == "bootstrap_apareadas":
+            partes.append(_medias_bootstrap(datos["d"], rng, filas))
+        elif tipo == "bootstrap_independientes":
+            partes.append(_medias_bootstrap(datos["x"], rng, filas) - _medias_bootstrap(datos["y"], rng, filas))
+        elif tipo == "permutacion_apareadas":
+            partes.append(_signos(datos["d"], rng, filas))
+        else:
+            partes.append(_permutaciones(datos["conjunta"], datos["n1"], rng, filas))
+        restantes -= filas
+    return np.concatenate(partes)
+
+
+_DATOS_PROCESO = None
+
+
+def _iniciar_proceso(datos):
+    global _DATOS_PROCESO
+    _DATOS_PROCESO = datos
+
+
+def _tarea_en_proceso(argumentos):
+    return _tarea(_DATOS_PROCESO, *argumentos)
+
+
+def _contexto():
+    # fork dentro de un servidor con hilos (Streamlit) puede bloquearse
+    metodos = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+
+
+def _ejecutar(datos, repeticiones, semilla, procesos, max_elementos):
+    """Reparte los remuestreos en tareas con semillas independientes y une los resultados en orden."""
+    tamanos = [REMUESTREOS_POR_TAREA] * (repeticiones // REMUESTREOS_POR_TAREA)
+    if repeticiones % REMUESTREOS_POR_TAREA:
+        tamanos.append(repeticiones % REMUESTREOS_POR_TAREA)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+    tareas = [(s, t, max_elementos) for s, t in zip(semillas, tamanos)]
+
+    procesos = min(os.cpu_count() or 1, len(tareas)) if procesos is None else min(procesos, len(tareas))
+    if procesos <= 1 or repeticiones * datos["costo"] < UMBRAL_PARALELO:
+        return np.concatenate([_tarea(datos, *t) for t in tareas])
+    with ProcessPoolExecutor(procesos, mp_context=_contexto(),
+                             initializer=_iniciar_proceso, initargs=(datos,)) as pool:
+        return np.concatenate(list(pool.map(_tarea_en_proceso, tareas)))
+
+
+def _muestras(x, y, apareadas):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if apareadas and len(x) != len(y):
+        raise ValueError(f"Las muestras apareadas deben tener el mismo tamaño ({len(x)} ≠ {len(y)}).")
+    if min(len(x), len(y)) < 2:
+        raise ValueError("Cada muestra necesita al menos 2 observaciones.")
+    return x, y
+
+
+def _semilla(semilla):
+    # Sin semilla se toma una al azar y se devuelve para poder repetir el cálculo
+    return np.random.SeedSequence().entropy if semilla is None else int(semilla)
+
+
+def _aceleracion(x, y, apareadas):
+    # Aceleración de BCa por jackknife; para la media la influencia de cada dato es (xᵢ - x̄)/(n - 1)
+    if apareadas:
+        d = x - y
+        influencias = [(d - d.mean()) / (len(d) - 1)]
+    else:
+        influencias = [(x - x.mean()) / (len(x) - 1), (y.mean() - y) / (len(y) - 1)]
+    u = np.concatenate(influencias)
+    suma2 = np.sum(u ** 2)
+    return 0.0 if suma2 == 0 else np.sum(u ** 3) / (6 * suma2 ** 1.5)
+
+
+def bootstrap_diferencia(x, y, repeticiones=10_000, confianza=0.95, apareadas=False, semilla=None,
+                         procesos=None, max_elementos=MAX_ELEMENTOS_BLOQUE):
+    """IC bootstrap (percentil y BCa) para μ₁ - μ₂ a partir de los datos crudos."""
+    x, y = _muestras(x, y, apareadas)
+    semilla = _semilla(semilla)
+    if apareadas:
+        d = _preparar(x - y)
+        datos = {"tipo": "bootstrap_apareadas", "d": d, "costo": _costo(d)}
+    else:
+        mx, my = _preparar(x), _preparar(y)
+        datos = {"tipo": "bootstrap_independientes", "x": mx, "y": my, "costo": _costo(mx) + _costo(my)}
+    distribucion = _ejecutar(datos, repeticiones, semilla, procesos, max_elementos)
+
+    diferencia = x.mean() - y.mean()
+    alpha = 1 - confianza
+    percentil = np.quantile(distribucion, [alpha / 2, 1 - alpha / 2])
+
+    # BCa: corrección de sesgo z0 y aceleración a
+    proporcion = (np.count_nonzero(distribucion < diferencia)
+                  + 0.5 * np.count_nonzero(distribucion == diferencia)) / repeticiones
+    z0 = norm.ppf(np.clip(proporcion, 1 / (repeticiones + 1), repeticiones / (repeticiones + 1)))
+    a = _aceleracion(x, y, apareadas)
+    z = norm.ppf([alpha / 2, 1 - alpha / 2])
+    niveles = norm.cdf(z0 + (z0 + z) / (1 - a * (z0 + z)))
+    bca = np.quantile(distribucion, niveles)
+
+    return {
+        "diferencia": diferencia,
+        "error_estandar": distribucion.std(ddof=1),
+        "percentil": tuple(percentil.tolist()),
+        "bca": tuple(bca.tolist()),
+        "z0": z0,
+        "aceleracion": a,
+        "distribucion": distribucion,
+        "repeticiones": repeticiones,
+        "semilla": semilla,
+    }
+
+
+def permutacion_diferencia(x, y, repeticiones=10_000, cola=inferencia.DOS_COLAS, apareadas=False, semilla=None,
+                           procesos=None, max_elementos=MAX_ELEMENTOS_BLOQUE):
+    """Prueba de permutación para H₀: μ₁ = μ₂ (reasignando grupos, o cambiando signos si son apareadas)."""
+    x, y = _muestras(x, y, apareadas)
+    semilla = _semilla(semilla)
+    if apareadas:
+        d = _preparar(x - y)
+        datos = {"tipo": "permutacion_apareadas", "d": d, "costo": _costo(d)}
+    else:
+        conjunta = _preparar(np.concatenate([x, y]))
+        datos = {"tipo": "permutacion_independientes", "conjunta": conjunta, "n1": len(x),
+                 "costo": _costo(conjunta)}
+    distribucion = _ejecutar(datos, repeticiones, semilla, procesos, max_elementos)
+
+    diferencia = x.mean() - y.mean()
+    # Tolerancia relativa para que empates numéricos cuenten como "al menos tan extremo"
+    tolerancia = 1e-9 * max(1.0, abs(diferencia))
+    codigo = int(inferencia._codigo_cola(cola))
+    if codigo == 0:
+        extremos = np.count_nonzero(np.abs(distribucion) >= abs(diferencia) - tolerancia)
+    elif codigo == 1:
+        extremos = np.count_nonzero(distribucion >= diferencia - tolerancia)
+    else:
+        extremos = np.count_nonzero(distribucion <= diferencia + tolerancia)
+
+    return {
+        "diferencia": diferencia,
+        "p_valor": (extremos + 1) / (repeticiones + 1),
+        "extremos": extremos,
+        "distribucion": distribucion,
+        "repeticiones": repeticiones,
+        "semilla": semilla,
+    }
@@ -0,0 +1,158 @@
+import numpy as np
+from scipy.stats import norm
+
+import inferencia
+
+# Monitoreo secuencial de una proporción a medida que llegan lotes de conteos
+# (éxitos, n). El estado guarda solo los totales acumulados y un par de
+# indicadores, así que cada lote se procesa en O(1) sin volver a leer la
+# historia. Mirar el p-valor clásico después de cada lote infla el error tipo I;
+# por eso la decisión se toma con una frontera válida para mirar siempre:
+#
+# - "Siempre válida (mSPRT)": razón de verosimilitud con mezcla normal sobre el
+#   efecto (Robbins; Johari et al.). Se rechaza cuando Λₙ ≥ 1/α, y 1/max Λ es un
+#   p-valor que sigue siendo válido sin importar cuándo se mire ni se pare.
+# - "Valor B constante (tipo O'Brien-Fleming)": con un n máximo planificado y
+#   t = n / n_max, se rechaza cuando |Z| ≥ c/√t, es decir, cuando el valor B
+#   Z·√t supera la constante c = z_{α/4}. Con monitoreo continuo, por el
+#   principio de reflexión, esta frontera gasta hasta t un α acumulado de
+#   4(1 - Φ(c/√t)), que llega a α en t = 1. Se parece a la función de gasto de
+#   Lan-DeMets tipo O'Brien-Fleming, 2 - 2Φ(z_{α/2}/√t), pero no es la misma.
+#   Con miradas discretas es conservadora. Desde n ≥ n_max se toma t = 1 y la
+#   frontera queda fija en c: las miradas posteriores al plan ya no están
+#   cubiertas por α.
+#
+# La trayectoria para el gráfico se guarda en un búfer de tamaño fijo: cuando se
+# llena se descarta un punto de cada dos y se duplica el paso de muestreo.
+
+FRONTERA_MSPRT = "Siempre válida (mSPRT)"
+FRONTERA_VALOR_B = "Valor B constante (tipo O'Brien-Fleming)"
+FRONTERAS = [FRONTERA_MSPRT, FRONTERA_VALOR_B]
+
+CAPACIDAD_TRAYECTORIA = 500
+
+
+def estado_inicial(p0=0.5, alpha=0.05, cola=inferencia.DOS_COLAS, frontera=FRONTERA_MSPRT, tau=0.05,
+                   n_max=10_000, capacidad=CAPACIDAD_TRAYECTORIA):
+    """Estado vacío del monitoreo. `tau` es la escala del efecto (mSPRT); `n_max`, el n planificado (valor B)."""
+    if frontera not in FRONTERAS:
+        raise ValueError(f"Frontera desconocida: {frontera}")
+    return {
+        "p0": p0, "alpha": alpha, "codigo": int(inferencia._codigo_cola(cola)), "frontera": frontera,
+        "tau": tau, "n_max": n_max,
+        "exitos": 0, "n": 0, "lotes": 0,
+        "estadistico": np.nan, "p_valor": np.nan, "p_siempre_valido": 1.0, "limite": np.nan,
+        "rechazo": False, "n_rechazo": None,
+        # Búfer de la trayectoria: número de lote, n acumulado, Z y frontera
+        "paso": 1, "ocupados": 0, "capacidad": capacidad,
+        "trayectoria": np.full((4, capacidad), np.nan),
+    }
+
+
+def _limite(estado, n):
+    """Valor de |Z| a partir del cual se rechaza después de n observaciones."""
+    alpha = estado["alpha"]
+    # Con una cola solo cuenta el cruce en la dirección de H₁: α se reparte en una sola frontera
+    alpha_frontera = alpha if estado["codigo"] == 0 else 2 * alpha
+    if estado["frontera"] == FRONTERA_MSPRT:
+        varianza = estado["p0"] * (1 - estado["p0"])
+        r = n * estado["tau"] ** 2 / varianza
+        return np.sqrt((1 + r) / r * (2 * np.log(1 / alpha_frontera) + np.log1p(r)))
+    # Fracción de información, recortada a 1 una vez alcanzado n_max
+    t = np.minimum(n / estado["n_max"], 1.0)
+    # Valor B constante: P(sup |B(s)| ≥ c, s ≤ 1) ≈ 4(1 - Φ(c)) para el movimiento browniano
+    c = norm.isf(alpha_frontera / 4)
+    return c / np.sqrt(t)
+
+
+def _log_razon(estado, z, n):
+    # log Λₙ del mSPRT con mezcla normal N(0, τ²) sobre p - p0
+    varianza = estado["p0"] * (1 - estado["p0"])
+    r = n * estado["tau"] ** 2 / varianza
+    return r * z ** 2 / (2 * (1 + r)) - 0.5 * np.log1p(r)
+
+
+def actualizar(estado, exitos, n):
+    """Incorpora uno o varios lotes (arreglos de éxitos y tamaños) y devuelve el estado nuevo.
+
+    Varios lotes se procesan vectorizados con sumas acumuladas; el costo solo
+    depende del número de lotes nuevos, nunca de la historia.
+    """
+    exitos = np.atleast_1d(np.asarray(exitos, dtype=float))
+    n = np.atleast_1d(np.asarray(n, dtype=float))
+    if np.any(n < 0) or np.any(exitos < 0) or np.any(exitos > n):
+        raise ValueError("Cada lote debe cumplir 0 ≤ éxitos ≤ n.")
+    if len(n) == 0:
+        return estado
+    estado = dict(estado)
+
+    exitos_acum = estado["exitos"] + np.cumsum(exitos)
+    n_acum = estado["n"] + np.cumsum(n)
+    lotes = estado["lotes"] + np.arange(1, len(n) + 1)
+    p0 = estado["p0"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (exitos_acum / n_acum - p0) / np.sqrt(p0 * (1 - p0) / n_acum)
+        limite = _limite(estado, n_acum)
+    codigo = estado["codigo"]
+    if codigo == 0:
+        cruza = np.abs(z) >= limite
+    else:
+        cruza = codigo * z >= limite
+    cruza &= n_acum > 0
+
+    if estado["frontera"] == FRONTERA_MSPRT:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_razon = _log_razon(estado, z, n_acum)
+        if codigo != 0:
+            # Con una cola, la evidencia en la dirección contraria no cuenta
+            log_razon = np.where(codigo * z > 0, log_razon + np.log(2), 0.0)
+        log_razon = np.where(n_acum > 0, log_razon, 0.0)
+        estado["p_siempre_valido"] = float(min(estado["p_siempre_valido"], np.exp(-np.max(log_razon))))
+
+    if not estado["rechazo"] and np.any(cruza):
+        estado["rechazo"] = True
+        estado["n_rechazo"] = int(n_acum[np.argmax(cruza)])
+
+    estado["exitos"], estado["n"], estado["lotes"] = int(exitos_acum[-1]), int(n_acum[-1]), int(lotes[-1])
+    estado["estadistico"] = float(z[-1])
+    estado["p_valor"] = float(inferencia.p_valor(z[-1], codigo)) if n_acum[-1] > 0 else np.nan
+    estado["limite"] = float(limite[-1])
+    _guardar_trayectoria(estado, np.vstack([lotes, n_acum, z, limite]))
+    return estado
+
+
+def _guardar_trayectoria(estado, puntos):
+    trayectoria = estado["trayectoria"].copy()
+    ocupados, paso, capacidad = estado["ocupados"], estado["paso"], estado["capacidad"]
+    while True:
+        nuevos = puntos[:, puntos[0] % paso == 0]
+        if ocupados + nuevos.shape[1] <= capacidad:
+            break
+        # Búfer lleno: se queda con los lotes múltiplos del doble de paso
+        paso *= 2
+        conservar = trayectoria[0, :ocupados] % paso == 0
+        ocupados = int(np.count_nonzero(conservar))
+        trayectoria[:, :ocupados] = trayectoria[:, :len(conservar)][:, conservar]
+        trayectoria[:, ocupados:] = np.nan
+    trayectoria[:, ocupados:ocupados + nuevos.shape[1]] = nuevos
+    estado["trayectoria"] = trayectoria
+    estado["ocupados"] = ocupados + nuevos.shape[1]
+    estado["paso"] = paso
+
+
+def trayectoria(estado):
+    """(lote, n acumulado, Z, frontera) de los puntos guardados, como cuatro arreglos."""
+    return tuple(estado["trayectoria"][:, :estado["ocupados"]])
+
+
+def parsear_lotes(lineas):
+    """Convierte líneas "éxitos,n" (o separadas por espacio o punto y coma) en dos arreglos."""
+    filas = [linea.replace(",", " ").replace(";", " ").split() for linea in lineas if linea.strip()]
+    filas = [f for f in filas if not (f[0].lower().startswith("exit") or f[0].lower().startswith("éxit"))]
+    if not filas:
+        return np.empty(0), np.empty(0)
+    try:
+        valores = np.array([f[:2] for f in filas], dtype=float)
+    except ValueError:
+        raise ValueError("Cada línea debe tener dos números: éxitos y n.") from None
+    return valores[:, 0], valores[:, 1]
@@ -0,0 +1,83 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy.stats import norm, t
+
+# Simulación vectorizada de intervalos de confianza. Las muestras se generan
+# como matrices (filas, n) en bloques de tamaño acotado, de modo que la memoria
+# máxima no depende del número total de repeticiones.
+
+MAX_ELEMENTOS_BLOQUE = 2_000_000  # ~16 MB de float64 por bloque
+# Muestras memorizadas por semilla y parámetros: un rerun que no cambia
+# ninguno de ellos reutiliza el arreglo en lugar de volver a sortearlo
+MAX_RESULTADOS_CACHE = 64
+
+
+def cobertura_ic(mu, sigma, n, confianza=0.95, repeticiones=1000, sigma_conocida=True,
+                 max_escalera=100, rng=None, max_elementos=MAX_ELEMENTOS_BLOQUE, avance=None):
+    """Cobertura empírica de intervalos Z (sigma conocida) o t para la media.
+
+    Devuelve la proporción de intervalos que contienen `mu` y, para la
+    "escalera" de intervalos, los límites de las primeras `max_escalera`
+    repeticiones (una submuestra aleatoria, ya que son independientes).
+    `avance`, si se da, recibe tras cada bloque el progreso y la cobertura
+    acumulada (para ejecutarla como trabajo en segundo plano, ver `trabajos`).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    alpha = 1 - confianza
+    critico = norm.ppf(1 - alpha / 2) if sigma_conocida else t.ppf(1 - alpha / 2, n - 1)
+    filas_bloque = max(1, max_elementos // n)
+
+    cubiertos = 0
+    escalera_inferior = np.empty(0)
+    escalera_superior = np.empty(0)
+    restantes = repeticiones
+    while restantes > 0:
+        filas = min(filas_bloque, restantes)
+        muestras = rng.normal(mu, sigma, size=(filas, n))
+        medias = muestras.mean(axis=1)
+        desv = sigma if sigma_conocida else muestras.std(axis=1, ddof=1)
+        margen = critico * desv / np.sqrt(n)
+        inferior = medias - margen
+        superior = medias + margen
+        cubiertos += np.count_nonzero((inferior <= mu) & (mu <= superior))
+
+        faltan = max_escalera - len(escalera_inferior)
+        if faltan > 0:
+            escalera_inferior = np.concatenate([escalera_inferior, inferior[:faltan]])
+            escalera_superior = np.concatenate([escalera_superior, superior[:faltan]])
+        restantes -= filas
+        if avance is not None:
+            hechas = repeticiones - restantes
+            avance(hechas / repeticiones, {"cubiertos": cubiertos, "repeticiones": hechas})
+
+    return {
+        "cobertura": cubiertos / repeticiones,
+        "cubiertos": cubiertos,
+        "repeticiones": repeticiones,
+        "valor_critico": critico,
+        "escalera_inferior": escalera_inferior,
+        "escalera_superior": escalera_superior,
+    }
+
+
+@lru_cache(maxsize=MAX_RESULTADOS_CACHE)
+def muestra_normal(semilla, mu, sigma, n):
+    """Muestra N(mu, sigma²) de tamaño n, determinada por la semilla (de solo lectura)."""
+    muestra = np.random.default_rng(semilla).normal(mu, sigma, n)
+    muestra.setflags(write=False)
+    return muestra
+
+
+def cobertura_ic_semilla(semilla, mu, sigma, n, confianza=0.95, repeticiones=1000, sigma_conocida=True,
+                         avance=None):
+    """`cobertura_ic` reproducible a partir de una semilla.
+
+    No se memoriza aquí: la página la lanza con `trabajos`, que conserva los
+    resultados terminados por (semilla, parámetros) y los comparte entre sesiones.
+    """
+    resultado = cobertura_ic(mu, sigma, n, confianza, repeticiones, sigma_conocida,
+                             rng=np.random.default_rng(semilla), avance=avance)
+    for clave in ("escalera_inferior", "escalera_superior"):
+        resultado[clave].setflags(write=False)
+    return resultado
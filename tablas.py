@@ -0,0 +1,142 @@
+from functools import lru_cache
+
+import numpy as np
+from scipy import stats
+from scipy.special import expit, logit
+
+# Tabla precalculada de cuantiles de la t de Student.
+#
+# La tabla guarda cuantiles superiores Q[fila, j] sobre una rejilla de
+# probabilidades de cola equiespaciada en logit(α); las filas recorren los
+# grados de libertad. Los cuantiles se obtienen por interpolación lineal en la
+# tabla; fuera de la rejilla se usa scipy.
+#
+# Solo compensa en llamadas vectorizadas (p. ej. las rejillas de potencia):
+# scipy resuelve cada cuantil t iterativamente y la interpolación es mucho más
+# rápida para miles de valores. Un solo valor va directo a scipy, igual de
+# rápido y exacto. La normal (ndtri) y las colas sf/cdf ya son funciones
+# especiales en C, así que los cuantiles z, `sf` y `cdf` también van a scipy.
+#
+# La tabla se construye la primera vez que se usa, una vez por proceso (~30 ms).
+
+# Rejilla de probabilidades de cola: logit(α) entre -14 y 14 (α ≈ 8e-7 … 1 - 8e-7)
+LOGITS = np.linspace(-14.0, 14.0, 801)
+
+# Por debajo de este df las filas están demasiado separadas para interpolar
+# entre ellas: los df no enteros pequeños van a scipy
+DF_INTERPOLACION_MIN = 30
+# Nodos de df: enteros hasta 30 y después equiespaciados en 1/df hasta ∞
+with np.errstate(divide="ignore"):
+    T_DF = np.concatenate([np.arange(1.0, DF_INTERPOLACION_MIN + 1),
+                           1 / np.linspace(1 / DF_INTERPOLACION_MIN, 0, 31)[1:]])
+
+DISTRIBUCIONES = ("t",)
+
+
+def _coordenada_df(df):
+    # -1/df crece con df y vale 0 en df = ∞; los cuantiles son suaves en esa escala
+    with np.errstate(divide="ignore"):
+        return -1.0 / np.asarray(df, dtype=float)
+
+
+_NODOS_T = _coordenada_df(T_DF)
+
+
+def _construir(dist):
+    if dist == "t":
+        alfas = expit(LOGITS)
+        return np.vstack([stats.t.isf(alfas, T_DF[:-1, None]), stats.norm.isf(alfas)])
+    raise ValueError(f"Distribución desconocida: {dist}")
+
+
+@lru_cache(maxsize=None)
+def tabla(dist):
+    valores = _construir(dist)
+    valores.setflags(write=False)
+    return valores
+
+
+def _interpolar_nodos(nodos, c):
+    # Devuelve (lo, hi, w) para interpolar linealmente entre nodos crecientes
+    lo = np.clip(np.searchsorted(nodos, c, side="right") - 1, 0, len(nodos) - 2)
+    w = (c - nodos[lo]) / (nodos[lo + 1] - nodos[lo])
+    return lo, lo + 1, np.clip(w, 0.0, 1.0)
+
+
+def _filas(df):
+    """Filas de la tabla t (lo, hi), peso w entre ellas y máscara de validez."""
+    df = np.asarray(df, dtype=float)
+    valido = (df >= 1) & ((df == np.round(df)) | (df >= DF_INTERPOLACION_MIN))
+    lo, hi, w = _interpolar_nodos(_NODOS_T, _coordenada_df(np.where(valido, df, 1.0)))
+    return lo, hi, w, valido
+
+
+def _isf_logit(dist, lg, df=None):
+    """Cuantil superior para una probabilidad de cola dada en escala logit."""
+    if dist == "z":
+        # La cola más pequeña se pasa siempre como probabilidad para no perder precisión
+        lg = np.asarray(lg, dtype=float)
+        return np.where(lg <= 0, stats.norm.isf(expit(lg)), -stats.norm.isf(expit(-lg)))
+    if dist != "t":
+        raise ValueError(f"Distribución desconocida: {dist}")
+    lg, df = np.broadcast_arrays(np.asarray(lg, dtype=float), np.asarray(df, dtype=float))
+    Q = tabla(dist)
+    lo, hi, wf, valido = _filas(df)
+    valido = valido & (lg >= LOGITS[0]) & (lg <= LOGITS[-1])
+
+    j, _, wa = _interpolar_nodos(LOGITS, np.where(valido, lg, 0.0))
+    abajo = (1 - wa) * Q[lo, j] + wa * Q[lo, j + 1]
+    arriba = (1 - wa) * Q[hi, j] + wa * Q[hi, j + 1]
+    valores = (1 - wf) * abajo + wf * arriba
+
+    if not np.all(valido):
+        valores[~valido] = stats.t.isf(expit(lg[~valido]), df[~valido])
+    return valores
+
+
+def _scipy(dist):
+    return {"z": stats.norm, "t": stats.t}[dist]
+
+
+def _args(dist, df):
+    return () if dist == "z" else (df,)
+
+
+def _resultado(valores):
+    return valores.item() if np.ndim(valores) == 0 else valores
+
+
+# Interfaz con los mismos nombres que scipy.stats: ppf, isf, sf, cdf
+
+def _escalar(*valores):
+    # Un solo valor va directo a scipy: es igual de rápido que la tabla y exacto
+    return all(np.ndim(v) == 0 for v in valores)
+
+
+def isf(dist, alpha, df=None):
+    if _escalar(alpha, df):
+        return float(_scipy(dist).isf(alpha, *_args(dist, df)))
+    with np.errstate(divide="ignore"):
+        return _resultado(_isf_logit(dist, logit(np.asarray(alpha, dtype=float)), df))
+
+
+def ppf(dist, q, df=None):
+    if _escalar(q, df):
+        return float(_scipy(dist).ppf(q, *_args(dist, df)))
+    with np.errstate(divide="ignore"):
+        return _resultado(_isf_logit(dist, -logit(np.asarray(q, dtype=float)), df))
+
+
+def sf(dist, x, df=None):
+    x = np.asarray(x, dtype=float)
+    return _resultado(np.asarray(_scipy(dist).sf(x, *_args(dist, df))))
+
+
+def cdf(dist, x, df=None):
+    x = np.asarray(x, dtype=float)
+    return _resultado(np.asarray(_scipy(dist).cdf(x, *_args(dist, df))))
+
+
+def memoria_bytes():
+    return sum(tabla(d).nbytes for d in DISTRIBUCIONES)
+
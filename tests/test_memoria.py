@@ -0,0 +1,14 @@
+# Prueba de memoria de graficos con AppTest: versión corta de
+# benchmarks/memoria.py para ejecutarla con pytest. MEMORIA_RERUNS permite
+# alargarla (p. ej. MEMORIA_RERUNS=1000 para la prueba completa).
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+import memoria  # noqa: E402
+
+
+def test_memoria_estable_tras_reruns():
+    reruns = int(os.environ.get("MEMORIA_RERUNS", "200"))
+    assert memoria.comprobar(reruns=reruns, calentamiento=50) == []
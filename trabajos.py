@@ -0,0 +1,192 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+
+# Trabajos en segundo plano para los cálculos largos (simulaciones, lectura de
+# archivos grandes). Se ejecutan en un pool de hilos compartido por todas las
+# sesiones del proceso, así que el hilo del script de Streamlit no se bloquea:
+# la página consulta periódicamente el estado y dibuja los resultados parciales.
+# NumPy y pandas liberan el GIL en las operaciones pesadas, por eso basta con
+# hilos (y el progreso y la cancelación se comparten sin serializar nada).
+#
+# Un trabajo es un diccionario con su estado, progreso (0-1 o None si no se
+# conoce el total), el último resultado parcial y el resultado o el error. La
+# función del trabajo recibe `avance=`, que publica progreso y parciales y,
+# si se pidió cancelar, lanza `Cancelado`: la cancelación es cooperativa y
+# ocurre en el siguiente bloque.
+#
+# Los trabajos se identifican por una huella de (función, argumentos): enviar
+# lo mismo desde otra sesión reutiliza el trabajo en curso o ya terminado.
+# Cada trabajo lleva el conjunto de sesiones interesadas y solo se cancela de
+# verdad cuando la última lo suelta.
+
+MAX_HILOS = min(4, os.cpu_count() or 1)
+# Trabajos terminados que se conservan para reutilizarlos (los más recientes)
+MAX_TRABAJOS_TERMINADOS = 32
+
+PENDIENTE = "pendiente"
+EN_CURSO = "en curso"
+TERMINADO = "terminado"
+CANCELADO = "cancelado"
+ERROR = "error"
+FINALES = (TERMINADO, CANCELADO, ERROR)
+
+_pool = None
+_trabajos = OrderedDict()
+_lock = threading.Lock()
+
+
+class Cancelado(Exception):
+    """Lanzada por `avance` cuando el trabajo ya no le interesa a nadie."""
+
+
+def _ejecutor():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(MAX_HILOS, thread_name_prefix="trabajo")
+    return _pool
+
+
+def _actualizar_huella(h, valor):
+    # Recorre tuplas, listas y diccionarios; los arreglos y archivos subidos
+    # cuentan por su contenido, no por su identidad
+    if isinstance(valor, (tuple, list)):
+        h.update(b"(")
+        for elemento in valor:
+            _actualizar_huella(h, elemento)
+        h.update(b")")
+    elif isinstance(valor, dict):
+        _actualizar_huella(h, sorted(valor.items(), key=lambda par: str(par[0])))
+    elif isinstance(valor, np.ndarray):
+        h.update(f"{valor.dtype}{valor.shape}".encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif hasattr(valor, "getvalue"):
+        h.update(getattr(valor, "name", "").encode())
+        h.update(valor.getvalue())
+    elif callable(valor):
+        h.update(f"{valor.__module__}.{valor.__qualname__}".encode())
+    elif isinstance(valor, str) and os.path.isfile(valor):
+        # Una ruta cuenta con su tamaño y fecha: si el archivo cambia, es otro trabajo
+        estado = os.stat(valor)
+        h.update(f"{valor}|{estado.st_size}|{estado.st_mtime_ns}".encode())
+    else:
+        h.update(pickle.dumps(valor))
+
+
+def huella(funcion, args, kwargs):
+    """Clave de deduplicación de una llamada `funcion(*args, **kwargs)`."""
+    h = hashlib.blake2b(digest_size=16)
+    _actualizar_huella(h, (funcion, args, kwargs))
+    return h.hexdigest()
+
+
+def _ejecutar(trabajo, funcion, args, kwargs):
+    if trabajo["cancelar"].is_set():
+        trabajo["estado"] = CANCELADO
+        return
+
+    def avance(progreso=None, parcial=None):
+        if trabajo["cancelar"].is_set():
+            raise Cancelado()
+        if progreso is not None:
+            trabajo["progreso"] = min(max(float(progreso), 0.0), 1.0)
+        if parcial is not None:
+            trabajo["parcial"] = parcial
+
+    trabajo["estado"] = EN_CURSO
+    try:
+        trabajo["resultado"] = funcion(*args, avance=avance, **kwargs)
+    except Cancelado:
+        trabajo["estado"] = CANCELADO
+    except (ValueError, ImportError) as e:
+        trabajo["error"] = str(e)
+        trabajo["estado"] = ERROR
+    except Exception as e:
+        # Cualquier otro fallo también termina el trabajo: la página lo muestra
+        trabajo["error"] = f"{type(e).__name__}: {e}"
+        trabajo["estado"] = ERROR
+    else:
+        trabajo["progreso"] = 1.0
+        trabajo["estado"] = TERMINADO
+    finally:
+        trabajo["fin"] = time.time()
+
+
+def _podar():
+    # Con el lock tomado: descarta los terminados más antiguos por encima del máximo
+    terminados = [clave for clave, t in _trabajos.items() if t["estado"] in FINALES]
+    for clave in terminados[:max(0, len(terminados) - MAX_TRABAJOS_TERMINADOS)]:
+        del _trabajos[clave]
+
+
+def enviar(funcion, *args, interesado=None, descripcion="", clave=None, **kwargs):
+    """Lanza `funcion(*args, avance=..., **kwargs)` en segundo plano y devuelve el trabajo.
+
+    Si ya hay un trabajo idéntico en curso o terminado (de esta u otra sesión)
+    se devuelve ese; uno cancelado o con error se vuelve a lanzar. `clave` es
+    la huella de la llamada si ya se calculó (evita recorrer dos veces
+    archivos y arreglos grandes).
+    """
+    if clave is None:
+        clave = huella(funcion, args, kwargs)
+    with _lock:
+        trabajo = _trabajos.get(clave)
+        if trabajo is not None and trabajo["estado"] not in (CANCELADO, ERROR) and not trabajo["cancelar"].is_set():
+            _trabajos.move_to_end(clave)
+        else:
+            trabajo = {
+                "clave": clave,
+                "descripcion": descripcion,
+                "estado": PENDIENTE,
+                "progreso": None,
+                "parcial": None,
+                "resultado": None,
+                "error": None,
+                "inicio": time.time(),
+                "fin": None,
+                "interesados": set(),
+                "cancelar": threading.Event(),
+            }
+            _trabajos[clave] = trabajo
+            trabajo["futuro"] = _ejecutor().submit(_ejecutar, trabajo, funcion, args, kwargs)
+            _podar()
+        if interesado is not None:
+            trabajo["interesados"].add(interesado)
+    return trabajo
+
+
+def terminado(trabajo):
+    return trabajo["estado"] in FINALES
+
+
+def esperar(trabajo, segundos):
+    """Espera como mucho `segundos` a que el trabajo termine; devuelve si terminó."""
+    try:
+        trabajo["futuro"].result(timeout=segundos)
+    except (TimeoutError, CancelledError):
+        pass
+    return terminado(trabajo)
+
+
+def soltar(trabajo, interesado=None):
+    """La sesión deja de necesitar el trabajo; si nadie más lo necesita, se cancela."""
+    with _lock:
+        trabajo["interesados"].discard(interesado)
+        if trabajo["interesados"] or terminado(trabajo):
+            return
+        trabajo["cancelar"].set()
+        if trabajo["futuro"].cancel():
+            trabajo["estado"] = CANCELADO
+            trabajo["fin"] = time.time()
+
+
+def en_curso():
+    """Trabajos aún no terminados del proceso (para el panel de desarrollador)."""
+    with _lock:
+        return [t for t in _trabajos.values() if not terminado(t)]